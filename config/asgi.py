@@ -0,0 +1,19 @@
+"""
+ASGI config for Comparte Ride project.
+
+Used by the events service, which serves the long lived ride event
+streams with Uvicorn workers. The rest of the API is served over WSGI.
+
+"""
+import os
+import sys
+
+from django.core.asgi import get_asgi_application
+
+app_path = os.path.abspath(os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), os.pardir))
+sys.path.append(os.path.join(app_path, 'cride'))
+
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "config.settings.production")
+
+application = get_asgi_application()
@@ -31,6 +31,7 @@ ROOT_URLCONF = 'config.urls'
 
 # WSGI
 WSGI_APPLICATION = 'config.wsgi.application'
+ASGI_APPLICATION = 'config.asgi.application'
 
 # Users and authentication 
 AUTH_USER_MODEL = 'users.user'
@@ -160,6 +161,24 @@ CELERY_TASK_SERIALIZER = 'json'
 CELERY_RESULT_SERIALIZER = 'json'
 CELERYD_TASK_TIME_LIMIT = 5 * 60
 CELERYD_TASK_SOFT_TIME_LIMIT = 60
+CELERY_BEAT_SCHEDULE = {
+    'flush-counters': {
+        'task': 'flush_counters',
+        'schedule': env.float('COUNTERS_FLUSH_INTERVAL', default=10.0),
+    },
+    'finish-departed-rides': {
+        'task': 'finish_departed_rides',
+        'schedule': env.float('FINISH_RIDES_INTERVAL', default=5 * 60.0),
+    },
+    'extend-ride-schedules': {
+        'task': 'extend_ride_schedules',
+        'schedule': 60 * 60.0,
+    },
+    'rebuild-leaderboards': {
+        'task': 'rebuild_leaderboards',
+        'schedule': env.float('LEADERBOARDS_REBUILD_INTERVAL', default=60 * 60.0),
+    },
+}
 
 # Django REST Framework
 # Default renderers but with their position switched.
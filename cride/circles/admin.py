@@ -4,6 +4,7 @@
 from django.contrib import admin
 
 # Models
+from cride.circles import directory, slugs
 from cride.circles.models import Circle
 
 
@@ -21,13 +22,38 @@ class CircleAdmin(admin.ModelAdmin):
     )
     actions= ["make_verified", "make_unverified"]
 
+    def save_model(self, request, obj, form, change):
+        """Save the circle and drop its cached copies."""
+        super(CircleAdmin, self).save_model(request, obj, form, change)
+        directory.invalidate()
+        slugs.invalidate(*{obj.slug_name, form.initial.get("slug_name", obj.slug_name)})
+
+    def delete_model(self, request, obj):
+        """Delete the circle and drop its cached copies."""
+        super(CircleAdmin, self).delete_model(request, obj)
+        directory.invalidate()
+        slugs.invalidate(obj.slug_name)
+
+    def delete_queryset(self, request, queryset):
+        """Delete the circles and drop their cached copies."""
+        slug_names= list(queryset.values_list("slug_name", flat=True))
+        super(CircleAdmin, self).delete_queryset(request, queryset)
+        directory.invalidate()
+        slugs.invalidate(*slug_names)
+
     def make_verified(self, request, queryset):
         """Make circles verified."""
+        slug_names= list(queryset.values_list("slug_name", flat=True))
         queryset.update(is_verified=True)
+        directory.invalidate()
+        slugs.invalidate(*slug_names)
     make_verified.short_description= "Make selected circles verified."
 
     def make_unverified(self, request, queryset):
         """Make circles unverified."""
+        slug_names= list(queryset.values_list("slug_name", flat=True))
         queryset.update(is_verified=False)
+        directory.invalidate()
+        slugs.invalidate(*slug_names)
     make_unverified.short_description= "Make selected circles unverified."
 
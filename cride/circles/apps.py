@@ -9,3 +9,7 @@ class CirclesAppConfig(AppConfig):
     name= 'cride.circles'
     verbose_name= 'circles'
 
+    def ready(self):
+        """Connect the app signals."""
+        from cride.circles import signals
+
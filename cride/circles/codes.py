@@ -0,0 +1,150 @@
+"""Invitation codes.
+
+Codes are built from the circle they grant access to and a sequence
+number that never repeats, followed by an HMAC check segment:
+
+    <circle length><circle><sequence><check>
+
+all written with Crockford's base 32 alphabet. Sequence numbers pack the
+time in milliseconds, a node number leased by each process from a counter
+in the shared cache and a per process counter, so new codes are unique
+without asking the database, and forged or mistyped codes are told apart
+without it too. Codes issued before this scheme are 10 random characters
+and are still accepted.
+"""
+
+# Django
+from django.core.cache import cache
+from django.utils.crypto import constant_time_compare, salted_hmac
+
+# Utilities
+import os
+import secrets
+import threading
+import time
+from redis.exceptions import RedisError
+
+
+ALPHABET= "0123456789ABCDEFGHJKMNPQRSTVWXYZ"
+SEQUENCE_LENGTH= 13
+CHECK_LENGTH= 6
+LEGACY_LENGTH= 10
+LEGACY_ALPHABET= frozenset("ABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789")
+KEY_SALT= "cride.circles.invitations"
+NODE_KEY= "invitations:node"
+
+NODE_BITS= 10
+COUNTER_BITS= 12
+
+_node= None
+_lock= threading.Lock()
+_millis= 0
+_counter= 0
+
+
+def _forget_node():
+    """Make forked processes lease their own node."""
+    global _node
+    _node= None
+
+
+os.register_at_fork(after_in_child=_forget_node)
+
+
+def encode(number, length=None):
+    """Return a number in base 32, left padded to length."""
+
+    digits= []
+    while number:
+        number, digit= divmod(number, 32)
+        digits.append(ALPHABET[digit])
+    text= "".join(reversed(digits)) or ALPHABET[0]
+    return text.rjust(length or 0, ALPHABET[0])
+
+
+def decode(text):
+    """Return the number written in base 32, or None if it isn't one."""
+
+    number= 0
+    for char in text:
+        digit= ALPHABET.find(char)
+        if digit < 0:
+            return None
+        number= number * 32 + digit
+    return number
+
+
+def get_node():
+    """Return the node number of this process.
+
+    Every process takes the next value of a counter in the shared cache,
+    so running processes get different nodes unless more than a thousand
+    others started in between. If the cache can't be reached, a random
+    node is picked instead.
+    """
+
+    global _node
+    if _node is None:
+        try:
+            cache.add(NODE_KEY, secrets.randbits(NODE_BITS), timeout=None)
+            _node= cache.incr(NODE_KEY) % (1 << NODE_BITS)
+        except (ValueError, RedisError):
+            _node= secrets.randbits(NODE_BITS)
+    return _node
+
+
+def next_sequence():
+    """Return a sequence number no other call of this process returned.
+
+    Numbers always grow: codes issued in the same millisecond take the
+    next counter value, and once it runs out, or if the clock goes back,
+    the following milliseconds are borrowed.
+    """
+
+    global _millis, _counter
+    with _lock:
+        millis= time.time_ns() // 1000000
+        if millis > _millis:
+            _millis, _counter= millis, 0
+        elif _counter + 1 < 1 << COUNTER_BITS:
+            _counter += 1
+        else:
+            _millis, _counter= _millis + 1, 0
+        return (_millis << (NODE_BITS + COUNTER_BITS)) | (get_node() << COUNTER_BITS) | _counter
+
+
+def sign(body):
+    """Return the check segment of a code body."""
+
+    digest= salted_hmac(KEY_SALT, body, algorithm="sha256").digest()
+    return encode(int.from_bytes(digest[:4], "big") >> 2, CHECK_LENGTH)
+
+
+def generate(circle_pk):
+    """Return a new code for a circle."""
+
+    circle= encode(circle_pk)
+    body= ALPHABET[len(circle)] + circle + encode(next_sequence(), SEQUENCE_LENGTH)
+    return body + sign(body)
+
+
+def is_legacy(code):
+    """Return whether a code looks like one issued before signed codes."""
+    return len(code) == LEGACY_LENGTH and set(code) <= LEGACY_ALPHABET
+
+
+def verify(code, circle_pk):
+    """Return whether a code could have been issued for a circle.
+
+    Legacy codes can't be verified without the database, so they pass.
+    """
+
+    if is_legacy(code):
+        return True
+    length= decode(code[:1])
+    if length is None or len(code) != 1 + length + SEQUENCE_LENGTH + CHECK_LENGTH:
+        return False
+    body, check= code[:-CHECK_LENGTH], code[-CHECK_LENGTH:]
+    if decode(body[1:1 + length]) != circle_pk or decode(body[1 + length:]) is None:
+        return False
+    return constant_time_compare(sign(body), check)
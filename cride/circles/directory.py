@@ -0,0 +1,60 @@
+"""Public circle directory cache.
+
+Serialized pages of the public circle list are the same for every user,
+so they are cached by their search, ordering, filter and page parameters.
+Every entry is keyed with a single directory version, which is bumped
+whenever a circle is created, updated, verified or gains or loses members.
+Ride counters change far too often for that, so pages hold the stored
+counters only and the buffered increments are added when serving them.
+Counters written straight to the database, when there is no Redis buffer,
+show up once the pages are dropped for another reason or expire.
+"""
+
+# Django
+from django.core.cache import cache
+
+# Local modules
+from cride.utils import cache as cache_utils
+
+# Utilities
+import time
+from urllib.parse import urlencode
+
+
+DIRECTORY_TIMEOUT= 300
+NAMESPACE= "circles:directory"
+
+
+def invalidate():
+    """Drop every cached page of the directory."""
+    cache_utils.bump_version(NAMESPACE)
+
+
+def get_version():
+    """Return the current directory version."""
+    return cache_utils.get_version(NAMESPACE)
+
+
+def get_page(request, build):
+    """Return a directory page from the cache, or build it and cache it.
+
+    Parameters are sorted, so their order in the URL doesn't split the
+    cache. Returns the page data and whether it came from the cache.
+    """
+
+    start= time.perf_counter()
+    params= urlencode(sorted(request.query_params.lists()), doseq=True)
+    key= cache_utils.make_key(
+        NAMESPACE,
+        request.build_absolute_uri(request.path),
+        params
+    )
+    data, hit= cache_utils.get_or_build(key, build, DIRECTORY_TIMEOUT)
+
+    cache_utils.record_lookup(NAMESPACE, hit, time.perf_counter() - start)
+    return data, hit
+
+
+def get_stats():
+    """Return the directory cache hit rate and latencies."""
+    return cache_utils.get_stats(NAMESPACE)
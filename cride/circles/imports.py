@@ -0,0 +1,221 @@
+"""Bulk membership imports.
+
+Large organizations join a circle all at once from a CSV or NDJSON list of
+people, one per row, with their 'email' and 'username' and optionally
+their 'first_name', 'last_name' and 'phone_number'. Rows are imported in
+chunks: each chunk creates the missing users, profiles and memberships
+with a handful of bulk inserts in its own transaction and reports its
+progress once committed.
+
+Imported users get an unusable password and an unverified email, so they
+sign in by resetting their password.
+"""
+
+# Django
+from django.contrib.auth.hashers import make_password
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from django.utils import timezone
+
+# Local modules
+from cride.circles import leaderboards, resolver
+from cride.circles.models import Circle, Membership
+from cride.users.models import User, Profile
+
+# Utilities
+import csv
+import json
+from itertools import islice
+
+
+CHUNK_SIZE= 1000
+FIELDS= ("email", "username", "first_name", "last_name", "phone_number")
+REQUIRED_FIELDS= ("email", "username")
+
+
+def read_rows(lines, format="csv"):
+    """Yield the line number and fields of each row of a CSV or NDJSON file.
+
+    Lines may be bytes or text. Rows that can't be parsed are yielded as
+    None, so they are reported instead of stopping the import.
+    """
+
+    lines= (line.decode("utf-8-sig") if isinstance(line, bytes) else line for line in lines)
+    if format == "csv":
+        reader= csv.DictReader(lines)
+        for row in reader:
+            row.pop(None, None)
+            yield reader.line_num, row
+        return
+
+    for number, line in enumerate(lines, 1):
+        if not line.strip():
+            continue
+        try:
+            row= json.loads(line)
+        except ValueError:
+            row= None
+        yield number, row if isinstance(row, dict) else None
+
+
+class MembershipImport:
+    """Import people as members of a circle.
+
+    Existing users, matched by email, are added as they are, and inactive
+    members are activated again. Once the circle reaches its member limit,
+    the remaining rows are rejected.
+    """
+
+    def __init__(self, circle, invited_by=None, chunk_size=CHUNK_SIZE):
+        self.circle= circle
+        self.invited_by= invited_by
+        self.chunk_size= chunk_size
+        self.password= make_password(None)
+        self.seen= {"email": set(), "username": set()}
+        self.totals= {"processed": 0, "users_created": 0, "members_added": 0, "already_members": 0, "rejected": 0}
+        self.errors= []
+
+    def run(self, rows):
+        """Import the rows and yield the progress after each chunk."""
+
+        rows= iter(rows)
+        while True:
+            chunk= list(islice(rows, self.chunk_size))
+            if not chunk:
+                break
+            self.errors= []
+            with transaction.atomic():
+                self.import_chunk(chunk)
+            yield {**self.totals, "errors": self.errors}
+        yield {**self.totals, "done": True}
+
+    def reject(self, number, error):
+        """Record a row that wasn't imported."""
+
+        self.totals["rejected"] += 1
+        self.errors.append({"line": number, "error": error})
+
+    def clean(self, number, row):
+        """Return the user fields of a row, or None if it is invalid."""
+
+        if row is None:
+            return self.reject(number, "Malformed row.")
+
+        fields= {name: str(row.get(name) or "").strip() for name in FIELDS}
+        fields["email"]= fields["email"].lower()
+        for name in REQUIRED_FIELDS:
+            if not fields[name]:
+                return self.reject(number, f"Missing {name}.")
+        for name, value in fields.items():
+            try:
+                User._meta.get_field(name).run_validators(value)
+            except ValidationError as error:
+                return self.reject(number, f"Invalid {name}: {' '.join(error.messages)}")
+        for name in REQUIRED_FIELDS:
+            if fields[name] in self.seen[name]:
+                return self.reject(number, f"Duplicated {name}.")
+        for name in REQUIRED_FIELDS:
+            self.seen[name].add(fields[name])
+        return fields
+
+    def import_chunk(self, chunk):
+        """Import a chunk of rows with a constant number of queries."""
+
+        people= {}
+        for number, row in chunk:
+            self.totals["processed"] += 1
+            fields= self.clean(number, row)
+            if fields:
+                people[fields["email"]]= (number, fields)
+        if not people:
+            return
+
+        found= User.objects.filter(email__in=people).values_list("email", "pk", "username")
+        existing= {email: user_pk for email, user_pk, username in found}
+        usernames= {user_pk: username for email, user_pk, username in found}
+        memberships= {
+            membership.user_id: membership
+            for membership in Membership.objects.filter(circle=self.circle, user_id__in=existing.values())
+        }
+
+        joining= []
+        for email, (number, fields) in people.items():
+            membership= memberships.get(existing.get(email))
+            if membership and membership.is_active:
+                self.totals["already_members"] += 1
+            else:
+                joining.append((number, email, membership))
+
+        new= [people[email][1] for number, email, membership in joining if email not in existing]
+        taken= set(User.objects.filter(
+            username__in=[fields["username"] for fields in new]
+        ).values_list("username", flat=True))
+        for number, email, membership in joining:
+            if people[email][1]["username"] in taken:
+                self.reject(number, "Username already taken.")
+        joining= [entry for entry in joining if people[entry[1]][1]["username"] not in taken]
+
+# The circle stays locked until the chunk commits, so the limit can't be overrun.
+        available= Circle.objects.lock_members(self.circle)
+        if available is not None:
+            for number, email, membership in joining[available:]:
+                self.reject(number, "Circle has reached its member limit.")
+            joining= joining[:available]
+        if not joining:
+            return
+
+        User.objects.bulk_create(
+            [
+                User(**people[email][1], password=self.password)
+                for number, email, membership in joining if email not in existing
+            ],
+            ignore_conflicts=True
+        )
+        found= User.objects.filter(
+            email__in=[email for number, email, membership in joining]
+        ).values_list("email", "pk", "username")
+        users= {email: user_pk for email, user_pk, username in found}
+        usernames.update({user_pk: username for email, user_pk, username in found})
+# Users created meanwhile with the same username are skipped by the insert.
+        for number, email, membership in joining:
+            if email not in users:
+                self.reject(number, "Username already taken.")
+        joining= [entry for entry in joining if entry[1] in users]
+        self.totals["users_created"] += len(set(users) - set(existing))
+        if not joining:
+            return
+
+        Profile.objects.bulk_create(
+            [Profile(user_id=user_pk) for user_pk in users.values()],
+            ignore_conflicts=True
+        )
+        profiles= {
+            user_pk: (profile_pk, reputation)
+            for profile_pk, user_pk, reputation in Profile.objects.filter(
+                user_id__in=users.values()
+            ).values_list("pk", "user_id", "reputation")
+        }
+
+        returning= [membership for number, email, membership in joining if membership]
+        Membership.objects.filter(pk__in=[membership.pk for membership in returning]).update(
+            is_active=True, modified=timezone.now()
+        )
+        created= Membership.objects.bulk_create([
+            Membership(
+                user_id=users[email],
+                profile_id=profiles[users[email]][0],
+                circle=self.circle,
+                invited_by=self.invited_by
+            )
+            for number, email, membership in joining if not membership
+        ])
+        Circle.objects.add_members(self.circle, len(joining))
+        self.totals["members_added"] += len(joining)
+
+# Bulk writes skip the membership signals, so do their work here.
+        for user_pk in set(existing.values()) & set(users.values()):
+            resolver.invalidate(user_pk)
+        leaderboards.add_members(self.circle.pk, [
+            (membership, usernames[membership.user_id], profiles[membership.user_id][1])
+            for membership in returning + created
+        ])
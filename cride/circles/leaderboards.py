@@ -0,0 +1,297 @@
+"""Circle leaderboards.
+
+Members of each circle are ranked by the rides they offered, the rides
+they took and their reputation. Rankings are kept as Redis sorted sets
+and are updated as the counters change, so top lists and rank lookups
+never query the database. Each circle also keeps the usernames of its
+members, to show top lists without looking users up. When the default
+cache isn't Redis, rankings are read from the memberships instead.
+
+Redis may evict or lose the sets, so they are rebuilt from the database
+by the 'rebuild_leaderboards' task and command, and right away when a
+circle's boards don't rank as many members as it has.
+"""
+
+# Django
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import F, Q
+
+# Local modules
+from cride.utils import counters
+
+# Utilities
+from itertools import groupby
+
+
+BOARDS= ("rides_offered", "rides_taken", "reputation")
+REBUILD_INTERVAL= 60
+
+
+def get_key(circle_pk, board):
+    """Return the key of a circle's leaderboard."""
+    return f"leaderboards:{circle_pk}:{board}"
+
+
+class DatabaseLeaderboards:
+    """Leaderboards read from the memberships.
+
+    Used when the default cache isn't Redis, which means local
+    development and tests. There is no store shared by the web and
+    Celery processes there, and counters are written through, so the
+    database is always current and updates are ignored.
+    """
+
+    def get_queryset(self, circle_pk, board):
+        """Return the active members of a circle with their score."""
+        from cride.circles.models import Membership
+        field= "profile__reputation" if board == "reputation" else board
+        return Membership.objects.filter(circle_id=circle_pk, is_active=True).annotate(score=F(field))
+
+    def add_members(self, circle_pk, members):
+        """Members are ranked once they are saved."""
+
+    def remove_member(self, circle_pk, member):
+        """Members stop being ranked once they are saved."""
+
+    def increment(self, circle_pk, board, member, amount):
+        """Scores change along with the counters."""
+
+    def set_score(self, circle_pks, board, member, score):
+        """Scores change along with the profiles."""
+
+    def replace(self, circle_pk, names, scores):
+        """Rankings are always current."""
+
+    def top(self, circle_pk, board, count):
+        """Return the member, username and score of the count highest scores."""
+        return list(
+            self.get_queryset(circle_pk, board).order_by("-score", "user_id")[:count]
+            .values_list("user_id", "user__username", "score")
+        )
+
+    def rank(self, circle_pk, board, member):
+        """Return the zero based rank and score of a member, or None."""
+        queryset= self.get_queryset(circle_pk, board)
+        score= queryset.filter(user_id=member).values_list("score", flat=True).first()
+        if score is None:
+            return None
+        return queryset.filter(Q(score__gt=score) | Q(score=score, user_id__lt=member)).count(), score
+
+    def size(self, circle_pk, board):
+        """Return the number of ranked members."""
+        return self.get_queryset(circle_pk, board).count()
+
+
+class RedisLeaderboards:
+    """Leaderboards kept in Redis sorted sets shared by every worker."""
+
+    def __init__(self):
+        from django_redis import get_redis_connection
+        self.client= get_redis_connection("default")
+
+    def add_members(self, circle_pk, members):
+        """Add members with their usernames and initial scores, keeping scores they already have."""
+        if not members:
+            return
+        pipe= self.client.pipeline()
+        names= {member: username for member, username, scores in members}
+        pipe.hset(get_key(circle_pk, "names"), mapping=names)
+        for board in BOARDS:
+            board_scores= {member: scores[board] for member, username, scores in members}
+            pipe.zadd(get_key(circle_pk, board), board_scores, nx=True)
+        pipe.execute()
+
+    def remove_member(self, circle_pk, member):
+        """Remove a member from the circle's leaderboards."""
+        pipe= self.client.pipeline()
+        pipe.hdel(get_key(circle_pk, "names"), member)
+        for board in BOARDS:
+            pipe.zrem(get_key(circle_pk, board), member)
+        pipe.execute()
+
+    def increment(self, circle_pk, board, member, amount):
+        """Add amount to the score of a ranked member.
+
+        Members missing from the board, like all of them once Redis lost
+        it, are left for the next rebuild instead of being ranked alone.
+        """
+        self.client.zadd(get_key(circle_pk, board), {member: amount}, xx=True, incr=True)
+
+    def set_score(self, circle_pks, board, member, score):
+        """Set the score of a member ranked in several circles."""
+        pipe= self.client.pipeline()
+        for circle_pk in circle_pks:
+            pipe.zadd(get_key(circle_pk, board), {member: score}, xx=True)
+        pipe.execute()
+
+    def top(self, circle_pk, board, count):
+        """Return the member, username and score of the count highest scores."""
+        if count <= 0:
+            return []
+        rows= self.client.zrevrange(get_key(circle_pk, board), 0, count - 1, withscores=True)
+        members= [int(member) for member, score in rows]
+        names= self.client.hmget(get_key(circle_pk, "names"), members) if members else []
+        return [
+            (member, name.decode() if name else None, score)
+            for member, name, (_, score) in zip(members, names, rows)
+        ]
+
+    def rank(self, circle_pk, board, member):
+        """Return the zero based rank and score of a member, or None."""
+        pipe= self.client.pipeline()
+        pipe.zrevrank(get_key(circle_pk, board), member)
+        pipe.zscore(get_key(circle_pk, board), member)
+        rank, score= pipe.execute()
+        return None if rank is None else (rank, score)
+
+    def size(self, circle_pk, board):
+        """Return the number of ranked members."""
+        return self.client.zcard(get_key(circle_pk, board))
+
+    def replace(self, circle_pk, names, scores):
+        """Replace the leaderboards of a circle.
+
+        The new sets are written aside and renamed over the old ones in
+        a single transaction, so readers never see half of them.
+        """
+        pipe= self.client.pipeline()
+        boards= {board: scores[board] for board in BOARDS}
+        boards["names"]= names
+        for board, values in boards.items():
+            building= f"{get_key(circle_pk, board)}:building"
+            pipe.delete(building)
+            if values and board == "names":
+                pipe.hset(building, mapping=values)
+            elif values:
+                pipe.zadd(building, values)
+        pipe.execute()
+
+        pipe= self.client.pipeline(transaction=True)
+        for board, values in boards.items():
+            key= get_key(circle_pk, board)
+            if values:
+                pipe.rename(f"{key}:building", key)
+            else:
+                pipe.delete(key)
+        pipe.execute()
+
+
+_leaderboards= None
+
+
+def get_leaderboards():
+    """Return the leaderboards for the configured cache."""
+
+    global _leaderboards
+    if _leaderboards is None:
+        backend= settings.CACHES["default"]["BACKEND"]
+        if backend.startswith("django_redis."):
+            _leaderboards= RedisLeaderboards()
+        else:
+            _leaderboards= DatabaseLeaderboards()
+    return _leaderboards
+
+
+def rebuild(circle_pks):
+    """Recompute the leaderboards of circles from their active memberships.
+
+    Returns the number of members ranked.
+    """
+
+    from cride.circles.models import Membership
+
+    circle_pks= list(circle_pks)
+    rows= Membership.objects.filter(
+        circle_id__in=circle_pks, is_active=True
+    ).order_by("circle_id").values_list(
+        "circle_id", "user_id", "user__username", "rides_offered", "rides_taken", "profile__reputation"
+    )
+    rankings= get_leaderboards()
+    empty= set(circle_pks)
+    total= 0
+# Rows come sorted by circle, so only one circle's members are held at a time.
+    for circle_pk, group in groupby(rows.iterator(), key=lambda row: row[0]):
+        group= list(group)
+        replace(rankings, circle_pk, group)
+        empty.discard(circle_pk)
+        total += len(group)
+    for circle_pk in empty:
+        replace(rankings, circle_pk, [])
+    return total
+
+
+def replace(rankings, circle_pk, rows):
+    """Replace the leaderboards of a circle with the rows of its members."""
+
+    rankings.replace(
+        circle_pk,
+        {user_pk: username for _, user_pk, username, *_ in rows},
+        {
+            "rides_offered": {row[1]: row[3] for row in rows},
+            "rides_taken": {row[1]: row[4] for row in rows},
+            "reputation": {row[1]: row[5] for row in rows},
+        }
+    )
+
+
+def check(circle, board):
+    """Rebuild a circle's leaderboards if a board doesn't rank all its members.
+
+    Boards lost by Redis, or recreated by new members joining afterwards,
+    rank fewer members than the circle has. They are rebuilt at most once
+    every REBUILD_INTERVAL seconds, so a stale members count can't make
+    every request rebuild them. Buffered counters are flushed first, since
+    the boards already count them and the memberships don't yet.
+    """
+
+    if get_leaderboards().size(circle.pk, board) == circle.members_count:
+        return
+    if cache.add(get_key(circle.pk, "rebuilt"), True, timeout=REBUILD_INTERVAL):
+        counters.flush()
+        rebuild([circle.pk])
+
+
+def add_member(membership, username, reputation):
+    """Rank a new member once the transaction commits."""
+    add_members(membership.circle_id, [(membership, username, reputation)])
+
+
+def add_members(circle_pk, members):
+    """Rank new members of a circle, given with usernames and reputations, once the transaction commits."""
+
+    entries= [
+        (
+            membership.user_id,
+            username,
+            {
+                "rides_offered": membership.rides_offered,
+                "rides_taken": membership.rides_taken,
+                "reputation": reputation
+            }
+        )
+        for membership, username, reputation in members
+    ]
+    transaction.on_commit(lambda: get_leaderboards().add_members(circle_pk, entries))
+
+
+def remove_member(membership):
+    """Stop ranking a member once the transaction commits."""
+
+    circle_pk, member= membership.circle_id, membership.user_id
+    transaction.on_commit(lambda: get_leaderboards().remove_member(circle_pk, member))
+
+
+def increment(membership, board, amount=1):
+    """Add to a member's score once the transaction commits."""
+
+    circle_pk, member= membership.circle_id, membership.user_id
+    transaction.on_commit(lambda: get_leaderboards().increment(circle_pk, board, member, amount))
+
+
+def set_reputation(user_pk, circle_pks, reputation):
+    """Update a user's reputation in the leaderboards of its circles once the transaction commits."""
+
+    circle_pks= list(circle_pks)
+    transaction.on_commit(lambda: get_leaderboards().set_score(circle_pks, "reputation", user_pk, reputation))
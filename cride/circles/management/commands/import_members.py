@@ -0,0 +1,55 @@
+"""Import circle members command."""
+
+# Django
+from django.core.management.base import BaseCommand, CommandError
+
+# Local modules
+from cride.circles import imports
+from cride.circles.models import Circle
+from cride.users.models import User
+
+
+class Command(BaseCommand):
+    """Import circle members.
+
+    Add the people of a CSV or NDJSON file to a circle, creating the
+    users and profiles that don't exist yet, and print the progress after
+    every chunk.
+    """
+
+    help= "Bulk import the members of a circle from a CSV or NDJSON file."
+
+    def add_arguments(self, parser):
+        parser.add_argument("circle", help="Slug name of the circle.")
+        parser.add_argument("path", help="CSV or NDJSON file with a row per person.")
+        parser.add_argument("--format", choices=("csv", "ndjson"), help="Defaults to the file extension.")
+        parser.add_argument("--chunk-size", type=int, default=imports.CHUNK_SIZE)
+        parser.add_argument("--invited-by", help="Username of the member recorded as the inviter.")
+
+    def handle(self, *args, **options):
+        try:
+            circle= Circle.objects.get(slug_name=options["circle"])
+        except Circle.DoesNotExist:
+            raise CommandError(f"Circle '{options['circle']}' does not exist.")
+
+        invited_by= None
+        if options["invited_by"]:
+            invited_by= User.objects.filter(username=options["invited_by"]).first()
+            if invited_by is None:
+                raise CommandError(f"User '{options['invited_by']}' does not exist.")
+
+        format= options["format"] or ("ndjson" if options["path"].endswith((".ndjson", ".jsonl")) else "csv")
+        importer= imports.MembershipImport(circle, invited_by=invited_by, chunk_size=options["chunk_size"])
+        with open(options["path"], "rb") as lines:
+            for progress in importer.run(imports.read_rows(lines, format)):
+                if progress.get("done"):
+                    break
+                for error in progress.get("errors", []):
+                    self.stderr.write(f"Line {error['line']}: {error['error']}")
+                self.stdout.write(
+                    f"{progress['processed']} rows, {progress['members_added']} members added, "
+                    f"{progress['users_created']} users created, {progress['already_members']} already members, "
+                    f"{progress['rejected']} rejected."
+                )
+
+        self.stdout.write(self.style.SUCCESS(f"Imported {importer.totals['members_added']} members into {circle}."))
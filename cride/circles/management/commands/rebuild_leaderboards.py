@@ -0,0 +1,39 @@
+"""Rebuild circle leaderboards command."""
+
+# Django
+from django.core.management.base import BaseCommand, CommandError
+
+# Local modules
+from cride.circles import leaderboards
+from cride.circles.models import Circle
+from cride.utils import counters
+
+
+class Command(BaseCommand):
+    """Rebuild circle leaderboards.
+
+    Recompute the rankings of every circle, or of a single one, from the
+    active memberships, to fill them for the first time or to reconcile
+    them after bulk edits. Buffered counters are flushed first so the
+    rankings include them. The 'rebuild_leaderboards' task does the
+    same for every circle periodically.
+    """
+
+    help= "Rebuild the member leaderboards of circles from the database."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--circle", help="Slug name of the only circle to rebuild.")
+
+    def handle(self, *args, **options):
+        circles= Circle.objects.order_by("pk")
+        if options["circle"]:
+            circles= circles.filter(slug_name=options["circle"])
+            if not circles.exists():
+                raise CommandError(f"Circle '{options['circle']}' does not exist.")
+
+        counters.flush()
+        total= leaderboards.rebuild(circles.values_list("pk", flat=True))
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Rebuilt the leaderboards of {circles.count()} circles and {total} members."
+        ))
@@ -0,0 +1,37 @@
+"""Rebuild circle member counts command."""
+
+# Django
+from django.core.management.base import BaseCommand
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+# Local modules
+from cride.circles import directory, slugs
+from cride.circles.models import Circle, Membership
+
+
+class Command(BaseCommand):
+    """Rebuild circle member counts.
+
+    Recount the active memberships of every circle and fix the circles
+    whose members_count drifted, like after memberships were edited in
+    bulk or through the admin. Counts are fixed by a single UPDATE, so
+    members joining meanwhile aren't lost.
+    """
+
+    help= "Rebuild the members_count of circles from their active memberships."
+
+    def handle(self, *args, **options):
+        members= Membership.objects.filter(
+            circle=OuterRef("pk"), is_active=True
+        ).order_by().values("circle").annotate(total=Count("pk")).values("total")
+        total= Coalesce(Subquery(members), 0)
+
+        drifted= Circle.objects.exclude(members_count=total)
+        slug_names= list(drifted.values_list("slug_name", flat=True))
+        rebuilt= drifted.update(members_count=total, modified=timezone.now())
+        if rebuilt:
+            directory.invalidate()
+            slugs.invalidate(*slug_names)
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt the member count of {rebuilt} circles."))
@@ -1 +1,2 @@
-from .invitations import *
\ No newline at end of file
+from .invitations import *
+from .circles import *
\ No newline at end of file
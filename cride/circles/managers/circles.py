@@ -0,0 +1,67 @@
+"""Circle managers."""
+
+# Django REST Framework
+from django.db import models
+from django.db.models import F, Q
+from django.utils import timezone
+
+# Local modules
+from cride.circles import directory, slugs
+
+
+class CircleManager(models.Manager):
+    """Circle manager.
+
+    Keeps the members_count column and the circle directory in sync as
+    members join and leave.
+    Counts are updated with single UPDATE statements, so concurrent joins
+    can't overwrite each other or overfill a limited circle.
+    """
+
+    def add_member(self, circle):
+        """Count a new member, unless the circle is full.
+
+        Returns whether the member fit in the circle.
+        """
+
+        added= self.filter(
+            Q(is_limited=False) | Q(members_count__lt=F("members_limit")),
+            pk=circle.pk
+        ).update(members_count=F("members_count") + 1, modified=timezone.now())
+        if added:
+            circle.members_count += 1
+            directory.invalidate()
+            slugs.invalidate(circle.slug_name)
+        return bool(added)
+
+    def lock_members(self, circle):
+        """Return how many more members fit in the circle, or None if it isn't limited.
+
+        Must run inside a transaction: the circle's row stays locked until
+        it ends, so no one else can join before the new members are added.
+        """
+
+        locked= self.select_for_update().only("members_count", "members_limit", "is_limited").get(pk=circle.pk)
+        circle.members_count= locked.members_count
+        if not locked.is_limited:
+            return None
+        return max(locked.members_limit - locked.members_count, 0)
+
+    def add_members(self, circle, count):
+        """Count several new members at once."""
+
+        if count:
+            self.filter(pk=circle.pk).update(members_count=F("members_count") + count, modified=timezone.now())
+            circle.members_count += count
+            directory.invalidate()
+            slugs.invalidate(circle.slug_name)
+
+    def remove_member(self, circle):
+        """Discount a member who left the circle."""
+
+        self.filter(pk=circle.pk, members_count__gt=0).update(
+            members_count=F("members_count") - 1, modified=timezone.now()
+        )
+        circle.members_count= max(circle.members_count - 1, 0)
+        directory.invalidate()
+        slugs.invalidate(circle.slug_name)
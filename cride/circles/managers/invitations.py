@@ -1,11 +1,11 @@
 """Circle invitation managers."""
 
 # Django REST Framework
-from django.db import models
+from django.db import IntegrityError, models, transaction
+from django.utils import timezone
 
 # Local modules
-import random
-from string import ascii_uppercase, digits
+from cride.circles import codes
 
 
 class InvitationManager(models.Manager):
@@ -13,16 +13,59 @@ class InvitationManager(models.Manager):
     
     Used to handle code creation.
     """
-    CODE_LENGTH= 10
+    MAX_ATTEMPTS= 5
 
     def create(self, **kwargs):
-        """Handles code creation."""
+        """Handles code creation.
 
-        pool= ascii_uppercase + digits
-        code= kwargs.get("code", "".join(random.choices(pool, k=self.CODE_LENGTH )))
-    
-# If there is a code being sent and it already exists, it creates a new one.
-        while self.filter(code=code).exists():
-            code= "".join(random.choices(pool, k=self.CODE_LENGTH))
-        kwargs["code"]= code
-        return super(InvitationManager, self).create(**kwargs)
\ No newline at end of file
+        Generated codes are unique by construction, so the invitation is
+        inserted right away.
+        """
+
+        if "code" not in kwargs:
+            circle= kwargs.get("circle")
+            kwargs["code"]= codes.generate(circle.pk if circle else kwargs["circle_id"])
+        return super(InvitationManager, self).create(**kwargs)
+
+    def issue(self, circle, issued_by, count):
+        """Create count invitations of a member with a single insert and return their codes.
+
+        Generated codes only collide if two processes ended up with the
+        same node, in which case the insert fails and the codes are issued
+        again skipping the conflicts.
+        """
+
+        invitations= [
+            self.model(code=codes.generate(circle.pk), circle=circle, issued_by=issued_by)
+            for _ in range(count)
+        ]
+        try:
+            with transaction.atomic():
+                self.bulk_create(invitations)
+        except IntegrityError:
+            return self.issue_skipping_conflicts(circle, issued_by, count)
+        return [invitation.code for invitation in invitations]
+
+    def issue_skipping_conflicts(self, circle, issued_by, count):
+        """Create count invitations of a member and return their codes.
+
+        Codes are inserted together, skipping the ones that collide with
+        existing codes through the unique constraint, and the missing ones
+        are generated again.
+        """
+
+        start= timezone.now()
+        issued= []
+        for _ in range(self.MAX_ATTEMPTS):
+            missing= count - len(issued)
+            if missing <= 0:
+                break
+            batch= [codes.generate(circle.pk) for _ in range(missing)]
+            self.bulk_create(
+                [self.model(code=code, circle=circle, issued_by=issued_by) for code in batch],
+                ignore_conflicts=True
+            )
+            issued += self.filter(
+                code__in=batch, circle=circle, issued_by=issued_by, created__gte=start
+            ).values_list("code", flat=True)
+        return issued
@@ -0,0 +1,20 @@
+# Generated by Django 5.2.18 on 2026-10-18 06:31
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('circles', '0002_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='circle',
+            name='members',
+            field=models.ManyToManyField(through='circles.Membership', through_fields=('circle', 'user'), to=settings.AUTH_USER_MODEL),
+        ),
+    ]
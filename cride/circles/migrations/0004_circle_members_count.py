@@ -0,0 +1,36 @@
+# Generated by Django 5.2.18 on 2026-10-18 07:11
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def count_members(apps, schema_editor):
+    Circle = apps.get_model('circles', 'Circle')
+    Membership = apps.get_model('circles', 'Membership')
+    members = Membership.objects.filter(
+        circle=OuterRef('pk'), is_active=True
+    ).order_by().values('circle').annotate(total=Count('pk')).values('total')
+    Circle.objects.update(members_count=Coalesce(Subquery(members), 0))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('circles', '0003_alter_circle_members'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='circle',
+            name='members_count',
+            field=models.PositiveIntegerField(default=0, help_text='Number of active members, kept up to date as they join and leave.'),
+        ),
+        migrations.AddIndex(
+            model_name='circle',
+            index=models.Index(condition=models.Q(('is_public', True)), fields=['-members_count', '-rides_offered', '-rides_taken', '-id'], name='circle_public_size_idx'),
+        ),
+        migrations.RunPython(count_members, migrations.RunPython.noop),
+    ]
@@ -5,6 +5,7 @@ from django.db import models
 
 # Utilities
 from cride.utils.models import CRideModel
+from cride.circles.managers import CircleManager
 
 
 
@@ -32,6 +33,10 @@ class Circle(CRideModel):
     )
 
 # Stats
+    members_count= models.PositiveIntegerField(
+        default=0,
+        help_text="Number of active members, kept up to date as they join and leave."
+    )
     rides_offered= models.PositiveSmallIntegerField(default=0)
     rides_taken= models.PositiveSmallIntegerField(default=0)
 
@@ -57,6 +62,8 @@ class Circle(CRideModel):
         help_text="If circle is limited, this will be the limit on the number of members."
     )
 
+    objects= CircleManager()
+
     def __str__(self):
         """Return circle name"""
         return self.name
@@ -65,4 +72,12 @@ class Circle(CRideModel):
     class Meta(CRideModel.Meta):
         """Meta class"""
         ordering = ["-rides_taken", "rides_offered"]
+        indexes= [
+# Serves the default ordering of the public circle list.
+            models.Index(
+                fields=["-members_count", "-rides_offered", "-rides_taken", "-id"],
+                condition=models.Q(is_public=True),
+                name="circle_public_size_idx"
+            ),
+        ]
 
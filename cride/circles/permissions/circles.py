@@ -4,7 +4,7 @@
 from rest_framework.permissions import BasePermission
 
 # Local modules
-from cride.circles.models import Membership
+from cride.circles import resolver
 
 
 class IsCircleAdmin(BasePermission):
@@ -12,13 +12,5 @@ class IsCircleAdmin(BasePermission):
 
     def has_object_permission(self, request, view, obj):
         """Verify User has a membership on the object."""
-        try:
-            Membership.objects.get(
-                user=request.user,
-                circle=obj,
-                is_admin=True,
-                is_active=True
-            )
-        except Membership.DoesNotExist:
-            return False
-        return True
\ No newline at end of file
+        membership= resolver.get_membership(request.user.pk, obj.pk, request)
+        return membership is not None and membership.is_admin
\ No newline at end of file
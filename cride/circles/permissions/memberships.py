@@ -4,7 +4,7 @@
 from rest_framework.permissions import BasePermission
 
 # Local modules
-from cride.circles.models import Membership
+from cride.circles import resolver
 
 
 class IsActiveCircleMember(BasePermission):
@@ -16,12 +16,20 @@ class IsActiveCircleMember(BasePermission):
     def has_permission(self, request, view):
         """Verify user is an active member of the circle."""
 
-        try:
-            Membership.objects.filter(user=request.user, circle=view.circle, is_active=True)
+        return resolver.get_membership(request.user.pk, view.circle.pk, request) is not None
 
-        except Membership.DoesNotExist:
-            return False
-        return True
+
+class IsCircleAdminMember(BasePermission):
+    """Allow access only to circle admins.
+
+    Expect that the views using this permission have a 'circle' attribute assigned.
+    """
+
+    def has_permission(self, request, view):
+        """Verify user is an active admin of the circle."""
+
+        membership= resolver.get_membership(request.user.pk, view.circle.pk, request)
+        return membership is not None and membership.is_admin
 
 
 class IsSelfMember(BasePermission):
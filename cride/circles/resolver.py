@@ -0,0 +1,63 @@
+"""Membership resolver.
+
+Permissions and serializers ask whether a user is an active member of a
+circle several times per request. The resolver loads all the active
+memberships of a user at once, keeps them on the request for the rest of
+it and shares them between requests through the cache for a short while.
+Cached memberships are dropped whenever one of the user's memberships is
+saved or deleted.
+"""
+
+# Django
+from django.core.cache import cache
+
+# Local modules
+from cride.circles.models import Membership
+from cride.utils import cache as cache_utils
+
+
+MEMBERSHIPS_TIMEOUT= 60
+
+
+def get_namespace(user_pk):
+    """Return the cache namespace of a user's memberships."""
+    return f"circles:memberships:{user_pk}"
+
+
+def invalidate(user_pk):
+    """Drop the cached memberships of a user."""
+    cache_utils.bump_version(get_namespace(user_pk))
+
+
+def get_memberships(user_pk, request=None):
+    """Return the active memberships of a user by circle id.
+
+    Pass the request to reuse the memberships loaded earlier in it.
+    """
+
+    loaded= getattr(request, "_memberships", None)
+    if loaded is None:
+        loaded= {}
+        if request is not None:
+            request._memberships= loaded
+    if user_pk in loaded:
+        return loaded[user_pk]
+
+    key= cache_utils.make_key(get_namespace(user_pk))
+    memberships= cache.get(key)
+    if memberships is None:
+        memberships= {
+            membership.circle_id: membership
+            for membership in Membership.objects.filter(user_id=user_pk, is_active=True)
+        }
+        cache.set(key, memberships, MEMBERSHIPS_TIMEOUT)
+    loaded[user_pk]= memberships
+    return memberships
+
+
+def get_membership(user_pk, circle_pk, request=None):
+    """Return the active membership of a user in a circle, or None."""
+
+    if user_pk is None:
+        return None
+    return get_memberships(user_pk, request).get(circle_pk)
@@ -47,6 +47,7 @@ for circle in circles:
             circle=circle,
             remaining_invitations=10
         )
+        Circle.objects.add_member(circle)
         print("New member added", m)
 
 
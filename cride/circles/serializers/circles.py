@@ -6,12 +6,14 @@ from django.db.models import fields
 
 # Local modules
 from cride.circles.models import Circle
+from cride.utils.serializers import PendingCountersMixin
 
 
-
-class CircleModelSerializer(serializers.ModelSerializer):
+class CircleModelSerializer(PendingCountersMixin, serializers.ModelSerializer):
     """Circle model serializer"""
-        
+
+    counter_fields= ("rides_offered", "rides_taken")
+
     members_limit= serializers.IntegerField(
         required=False,
         min_value=10,
@@ -30,6 +32,7 @@ class CircleModelSerializer(serializers.ModelSerializer):
         read_only_fields=(
             "is_public",
             "verified",
+            "members_count",
             "rides_offered",
             "rides_taken"
         )
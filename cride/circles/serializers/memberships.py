@@ -5,13 +5,17 @@ from rest_framework import serializers
 from django.utils import timezone
 
 # Local modules
+from cride.circles import codes, leaderboards
 from cride.users.serializers import UserModelSerializer
-from cride.circles.models import Membership, Invitation
+from cride.circles.models import Circle, Membership, Invitation
+from cride.utils.serializers import PendingCountersMixin
 
 
-class MembershipModelSerializer(serializers.ModelSerializer):
+class MembershipModelSerializer(PendingCountersMixin, serializers.ModelSerializer):
     """Member model serializer."""
 
+    counter_fields = ('rides_taken', 'rides_offered')
+
     user = UserModelSerializer(read_only=True)
     invited_by = serializers.StringRelatedField()
     joined_at = serializers.DateTimeField(source='created', read_only=True)
@@ -36,6 +40,16 @@ class MembershipModelSerializer(serializers.ModelSerializer):
         )
 
 
+class LeaderboardSerializer(serializers.Serializer):
+    """Leaderboard query serializer.
+
+    Validates the stat members are ranked by and how many of them to list.
+    """
+
+    by = serializers.ChoiceField(choices=leaderboards.BOARDS, default='rides_offered')
+    limit = serializers.IntegerField(min_value=1, max_value=100, default=10)
+
+
 class AddMemberSerializer(serializers.Serializer):
     """Add member serializer.
     Handle the addition of a new member to a circle.
@@ -56,6 +70,9 @@ class AddMemberSerializer(serializers.Serializer):
 
     def validate_invitation_code(self, data):
         """Verify code exists and that it is related to the circle."""
+        # Malformed, forged and other circles' codes don't need a query
+        if not codes.verify(data, self.context['circle'].pk):
+            raise serializers.ValidationError('Invalid invitation code.')
         try:
             invitation = Invitation.objects.get(
                 code=data,
@@ -72,7 +89,7 @@ class AddMemberSerializer(serializers.Serializer):
         """Verify circle is capable of accepting a new member."""
         
         circle = self.context['circle']
-        if circle.is_limited and circle.members.count() >= circle.members_limit:
+        if circle.is_limited and circle.members_count >= circle.members_limit:
             raise serializers.ValidationError('Circle has reached its member limit :(')
         return data
 
@@ -85,6 +102,10 @@ class AddMemberSerializer(serializers.Serializer):
 
         now = timezone.now()
 
+        # The count is checked again by the update, in case the circle filled up meanwhile
+        if not Circle.objects.add_member(circle):
+            raise serializers.ValidationError('Circle has reached its member limit :(')
+
         # Member creation
         member = Membership.objects.create(
             user=user,
@@ -0,0 +1,36 @@
+"""Circles signals."""
+
+# Django
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+# Local modules
+from cride.circles import leaderboards, resolver
+from cride.circles.models import Membership
+
+
+@receiver(post_save, sender=Membership)
+@receiver(post_delete, sender=Membership)
+def invalidate_memberships(sender, instance, **kwargs):
+    """Drop the cached memberships of the member's user."""
+    resolver.invalidate(instance.user_id)
+
+
+@receiver(post_save, sender=Membership)
+def rank_member(sender, instance, created, **kwargs):
+    """Rank new members and stop ranking the ones that leave.
+
+    Memberships are created along with their user and profile, so ranking
+    them doesn't query them again.
+    """
+
+    if not instance.is_active:
+        leaderboards.remove_member(instance)
+    elif created:
+        leaderboards.add_member(instance, instance.user.username, instance.profile.reputation)
+
+
+@receiver(post_delete, sender=Membership)
+def unrank_member(sender, instance, **kwargs):
+    """Stop ranking deleted members."""
+    leaderboards.remove_member(instance)
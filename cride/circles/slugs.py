@@ -0,0 +1,80 @@
+"""Circle slug lookups.
+
+Nested routes like 'circles/<slug_name>/rides/' look their circle up on
+every request. Circles are kept in a small LRU in each process and in the
+shared cache, both keyed with a version of the slug that is bumped
+whenever the circle changes, so a warm lookup costs a single cache read
+and no query.
+"""
+
+# Django
+from django.core.cache import cache
+from django.http import Http404
+
+# Local modules
+from cride.utils import cache as cache_utils
+
+# Utilities
+import copy
+import threading
+from collections import OrderedDict
+
+
+CIRCLE_TIMEOUT= 60 * 60
+MAX_CIRCLES= 1024
+
+_circles= OrderedDict()
+_lock= threading.Lock()
+
+
+def get_namespace(slug_name):
+    """Return the cache namespace of a circle slug."""
+    return f"circles:slug:{slug_name}"
+
+
+def invalidate(*slug_names):
+    """Drop the cached circles of some slugs."""
+
+    for slug_name in slug_names:
+        cache_utils.bump_version(get_namespace(slug_name))
+
+
+def get_circle(slug_name):
+    """Return the circle of a slug, or None if there is none.
+
+    Each call returns its own copy, so callers can change it freely.
+    """
+
+    namespace= get_namespace(slug_name)
+    version= cache_utils.get_version(namespace)
+    with _lock:
+        cached= _circles.get(slug_name)
+        if cached and cached[0] == version:
+            _circles.move_to_end(slug_name)
+            return copy.copy(cached[1])
+
+    key= f"{namespace}:{version}"
+    circle= cache.get(key)
+    if circle is None:
+# Imported here since the circle manager invalidates slugs.
+        from cride.circles.models import Circle
+        circle= Circle.objects.filter(slug_name=slug_name).first()
+        if circle is None:
+            return None
+        cache.set(key, circle, CIRCLE_TIMEOUT)
+
+    with _lock:
+        _circles[slug_name]= (version, circle)
+        _circles.move_to_end(slug_name)
+        while len(_circles) > MAX_CIRCLES:
+            _circles.popitem(last=False)
+    return copy.copy(circle)
+
+
+def get_circle_or_404(slug_name):
+    """Return the circle of a slug, or raise Http404."""
+
+    circle= get_circle(slug_name)
+    if circle is None:
+        raise Http404("No Circle matches the given query.")
+    return circle
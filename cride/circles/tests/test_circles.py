@@ -0,0 +1,149 @@
+"""Circles tests."""
+
+# Django REST Framework
+from django.contrib.admin.sites import site
+from django.core.cache import cache
+from rest_framework.test import APITestCase
+from unittest import mock
+
+# Local modules
+from cride.circles import slugs
+from cride.circles.admin import CircleAdmin
+from cride.circles.models import Circle
+from cride.users.models import User
+from cride.utils import cache as cache_utils, counters
+
+# Utilities
+import threading
+import time
+
+
+class CircleListAPITestCase(APITestCase):
+    """Circle list API test case."""
+
+    def setUp(self):
+        """Test case set up."""
+
+        self.user= User.objects.create(
+            first_name="velo",
+            last_name="Betancur",
+            email="velo@test.com",
+            username="velo",
+            password="admin12345"
+        )
+        self.client.force_authenticate(self.user)
+        cache.clear()
+
+    def test_default_ordering(self):
+        """Public circles should be listed from the largest to the smallest."""
+
+        for slug_name, members_count, is_public in (("small", 3, True), ("big", 40, True), ("hidden", 90, False), ("medium", 12, True)):
+            Circle.objects.create(
+                name=slug_name,
+                slug_name=slug_name,
+                about="Circle",
+                members_count=members_count,
+                is_public=is_public
+            )
+
+        response= self.client.get("/circles/")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([circle["slug_name"] for circle in response.data["results"]], ["big", "medium", "small"])
+
+    def test_keyset_ordering(self):
+        """Cursor pages should list the newest circles first and refuse orderings by counts."""
+
+        for slug_name, members_count in (("small", 3), ("big", 40), ("medium", 12)):
+            Circle.objects.create(name=slug_name, slug_name=slug_name, about="Circle", members_count=members_count)
+
+        response= self.client.get("/circles/?cursor=")
+        self.assertEqual([circle["slug_name"] for circle in response.data["results"]], ["medium", "big", "small"])
+        response= self.client.get("/circles/?cursor=&ordering=name")
+        self.assertEqual(response.status_code, 400)
+        response= self.client.get("/circles/?cursor=&ordering=-members_count")
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("ordering", response.data)
+
+    def test_directory_cache(self):
+        """The directory should be cached until a circle changes, even through admin bulk actions."""
+
+        Circle.objects.create(name="Gaviotas", slug_name="gaviota", about="Circle")
+        url= "/circles/?search=gaviota&ordering=name"
+
+        self.assertEqual(self.client.get(url)["X-Cache"], "MISS")
+        response= self.client.get("/circles/?ordering=name&search=gaviota")
+        self.assertEqual(response["X-Cache"], "HIT")
+        self.assertFalse(response.data["results"][0]["is_verified"])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            CircleAdmin(Circle, site).make_verified(None, Circle.objects.all())
+        response= self.client.get(url)
+        self.assertEqual(response["X-Cache"], "MISS")
+        self.assertTrue(response.data["results"][0]["is_verified"])
+
+    def test_directory_counters(self):
+        """Cached directory pages should show buffered ride counters and outlive their writes."""
+
+        circle= Circle.objects.create(name="Gaviotas", slug_name="gaviota", about="Circle")
+        self.assertEqual(self.client.get("/circles/")["X-Cache"], "MISS")
+
+        class Buffer:
+            def get_many(self, keys):
+                return {key: 2 for key in keys if key.endswith(":rides_offered")}
+
+        with mock.patch.object(counters, "_buffer", Buffer()):
+            response= self.client.get("/circles/")
+        self.assertEqual(response["X-Cache"], "HIT")
+        self.assertEqual(response.data["results"][0]["rides_offered"], 2)
+        self.assertEqual(self.client.get("/circles/").data["results"][0]["rides_offered"], 0)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            counters.increment(Circle, circle.pk, "rides_taken")
+        self.assertEqual(self.client.get("/circles/")["X-Cache"], "HIT")
+        with self.captureOnCommitCallbacks(execute=True):
+            CircleAdmin(Circle, site).make_verified(None, Circle.objects.all())
+        response= self.client.get("/circles/")
+        self.assertEqual(response["X-Cache"], "MISS")
+        self.assertEqual(response.data["results"][0]["rides_taken"], 1)
+
+    def test_cold_cache_single_rebuild(self):
+        """Concurrent misses of the same entry should build it only once."""
+
+        builds= []
+
+        def build():
+            builds.append(1)
+            time.sleep(0.2)
+            return {"results": []}
+
+        results= []
+        threads= [
+            threading.Thread(target=lambda: results.append(cache_utils.get_or_build("cold", build, 60)))
+            for _ in range(8)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(len(builds), 1)
+        self.assertEqual(sorted(hit for data, hit in results), [False] + [True] * 7)
+
+    def test_slug_lookup_cache(self):
+        """Circles should be looked up by slug without queries until they change."""
+
+        Circle.objects.create(name="Gaviotas", slug_name="gaviota", about="Circle")
+        self.assertFalse(slugs.get_circle("gaviota").is_verified)
+        with self.assertNumQueries(0):
+            circle= slugs.get_circle("gaviota")
+        circle.is_verified= True
+        self.assertFalse(slugs.get_circle("gaviota").is_verified)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            CircleAdmin(Circle, site).make_verified(None, Circle.objects.filter(is_verified=False))
+        self.assertTrue(slugs.get_circle("gaviota").is_verified)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            CircleAdmin(Circle, site).make_unverified(None, Circle.objects.filter(is_verified=True))
+        self.assertFalse(slugs.get_circle("gaviota").is_verified)
+        self.assertIsNone(slugs.get_circle("missing"))
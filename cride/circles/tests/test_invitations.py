@@ -1,13 +1,18 @@
 """Invitations tests."""
 
 # Django REST Framework
+from django.core.cache import cache
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
 from rest_framework.test import APITestCase
 from rest_framework.authtoken.models import Token
+from unittest import mock
 
 # Local modules
+from cride.circles import codes
 from cride.circles.models import Invitation, Circle, Membership
-from cride.users.models import User
+from cride.users.models import User, Profile
 
 
 class InvitationsManagerTestCase(TestCase):
@@ -39,6 +44,39 @@ class InvitationsManagerTestCase(TestCase):
         )
         self.assertIsNotNone(invitation.code)
 
+    def test_bulk_issue(self):
+        """Codes should be issued with a single insert and be verifiable."""
+
+        with CaptureQueriesContext(connection) as queries:
+            issued= Invitation.objects.issue(self.circle, self.user, 10)
+
+        self.assertEqual([query["sql"].split()[0] for query in queries if "circles_invitation" in query["sql"]], ["INSERT"])
+        self.assertEqual(len(set(issued)), 10)
+        self.assertTrue(all(codes.verify(code, self.circle.pk) for code in issued))
+        self.assertFalse(codes.verify(issued[0], self.circle.pk + 1))
+        self.assertFalse(codes.verify(issued[0][:-1] + ("0" if issued[0][-1] != "0" else "1"), self.circle.pk))
+
+    def test_bulk_issue_conflicts(self):
+        """Codes colliding with existing ones should be issued again."""
+
+        taken= Invitation.objects.create(issued_by=self.user, circle=self.circle).code
+        generate= codes.generate
+        with mock.patch.object(codes, "generate", side_effect=[taken] + [generate(self.circle.pk) for _ in range(4)]):
+            issued= Invitation.objects.issue(self.circle, self.user, 2)
+
+        self.assertEqual(len(set(issued)), 2)
+        self.assertNotIn(taken, issued)
+        self.assertEqual(Invitation.objects.count(), 3)
+
+    def test_nodes_are_leased(self):
+        """Processes should take different nodes from the shared cache."""
+
+        nodes= set()
+        for _ in range(3):
+            codes._forget_node()
+            nodes.add(codes.get_node())
+        self.assertEqual(len(nodes), 3)
+
 
 class MemberInvitationsAPITestCase(APITestCase):
     """Member invitation API Test case."""
@@ -60,8 +98,45 @@ class MemberInvitationsAPITestCase(APITestCase):
             is_verified=True
         )
         self.membership = Membership.objects.create(
-            user=self.user, profile=self.user.profile,
+            user=self.user, profile=Profile.objects.create(user=self.user),
             circle=self.circle, remaining_invitations=10
         )
         self.token = Token.objects.create(user=self.user).key
 
+        self.client.credentials(HTTP_AUTHORIZATION=f"Token {self.token}")
+
+    def test_invitations_issued_in_bulk(self):
+        """Topping up a member's codes should take the same queries for any number of codes."""
+
+        url= f"/circles/{self.circle.slug_name}/members/{self.user.username}/invitations/"
+        counts= []
+        for remaining in (1, 10):
+            Invitation.objects.all().delete()
+            cache.clear()
+            Membership.objects.filter(pk=self.membership.pk).update(remaining_invitations=remaining)
+            with CaptureQueriesContext(connection) as queries:
+                response= self.client.get(url, HTTP_ACCEPT="application/json")
+            self.assertEqual(len(set(response.data["invitations"])), remaining)
+            counts.append(len(queries))
+
+        self.assertEqual(counts[0], counts[1])
+        self.assertEqual(Invitation.objects.filter(issued_by=self.user, used=False).count(), 10)
+
+    def test_join_with_codes(self):
+        """Forged codes should be rejected without queries and legacy codes should still work."""
+
+        invited= User.objects.create(username="nuevo", email="nuevo@test.com", password="admin12345")
+        Profile.objects.create(user=invited)
+        self.client.force_authenticate(invited)
+        url= f"/circles/{self.circle.slug_name}/members/"
+
+        code= Invitation.objects.issue(self.circle, self.user, 1)[0]
+        forged= code[:-1] + ("0" if code[-1] != "0" else "1")
+        with CaptureQueriesContext(connection) as queries:
+            response= self.client.post(url, {"invitation_code": forged}, HTTP_ACCEPT="application/json")
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse([query for query in queries if "circles_invitation" in query["sql"]])
+
+        Invitation.objects.create(issued_by=self.user, circle=self.circle, code="LEGACY1234")
+        response= self.client.post(url, {"invitation_code": "LEGACY1234"}, HTTP_ACCEPT="application/json")
+        self.assertEqual(response.status_code, 201)
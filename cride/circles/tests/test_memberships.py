@@ -0,0 +1,317 @@
+"""Memberships tests."""
+
+# Django REST Framework
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils.http import http_date
+from rest_framework.test import APITestCase
+from rest_framework.authtoken.models import Token
+from unittest import mock
+
+# Local modules
+from cride.circles import leaderboards
+from cride.circles.models import Circle, Membership, Invitation
+from cride.users.models import User, Profile
+from cride.utils import counters
+
+# Utilities
+import json
+import os
+import tempfile
+import warnings
+from asgiref.sync import sync_to_async
+from io import StringIO
+
+
+class MembershipListAPITestCase(APITestCase):
+    """Membership list API test case."""
+
+    def setUp(self):
+        """Test case set up."""
+
+        self.circle= Circle.objects.create(
+            name="Gaviotas",
+            slug_name="gaviota",
+            about="Circulo el barrio Gaviotas",
+            is_verified=True
+        )
+        self.user= self.create_member("velo")
+        token= Token.objects.create(user=self.user).key
+        self.client.credentials(HTTP_AUTHORIZATION=f"Token {token}")
+        self.url= f"/circles/{self.circle.slug_name}/members/"
+        cache.clear()
+
+    def create_member(self, username):
+        """Create a user with its profile and an active membership in the circle."""
+
+        user= User.objects.create(
+            first_name=username,
+            last_name="Betancur",
+            email=f"{username}@test.com",
+            username=username,
+            password="admin12345"
+        )
+        profile= Profile.objects.create(user=user)
+        Membership.objects.create(user=user, profile=profile, circle=self.circle, remaining_invitations=10)
+        return user
+
+    def test_conditional_list(self):
+        """Member lists should be revalidated by their ETag and Last-Modified date."""
+
+        response= self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        etag, last_modified= response["ETag"], response["Last-Modified"]
+
+        self.assertEqual(self.client.get(self.url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        self.assertEqual(self.client.get(self.url, HTTP_IF_MODIFIED_SINCE=last_modified).status_code, 304)
+
+        profile= self.user.profile
+        profile.biography= "Conductor"
+        profile.save()
+        response= self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["results"][0]["user"]["profile"]["biography"], "Conductor")
+
+    def test_conditional_retrieve(self):
+        """A member's ETag should only depend on that member."""
+
+        other= self.create_member("other")
+        response= self.client.get(f"{self.url}{self.user.username}/")
+        self.assertEqual(response.status_code, 200)
+        etag= response["ETag"]
+
+        other.first_name= "Renamed"
+        other.save()
+        response= self.client.get(f"{self.url}{self.user.username}/", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response["ETag"], etag)
+
+    def test_members_count(self):
+        """Joining and leaving should keep the member count and limit up to date."""
+
+        call_command("rebuild_members_count", stdout=StringIO())
+        self.circle.refresh_from_db()
+        self.assertEqual(self.circle.members_count, 1)
+        Circle.objects.filter(pk=self.circle.pk).update(is_limited=True, members_limit=2)
+        Membership.objects.filter(user=self.user).update(remaining_invitations=10)
+
+        responses= []
+        for username in ("nuevo", "tarde"):
+            user= User.objects.create(username=username, email=f"{username}@test.com", password="admin12345")
+            Profile.objects.create(user=user)
+            invitation= Invitation.objects.create(issued_by=self.user, circle=self.circle)
+            self.client.force_authenticate(user)
+            responses.append(self.client.post(self.url, {"invitation_code": invitation.code}))
+        self.assertEqual([response.status_code for response in responses], [201, 400])
+        self.circle.refresh_from_db()
+        self.assertEqual(self.circle.members_count, 2)
+
+        self.client.force_authenticate(self.user)
+        response= self.client.delete(f"{self.url}{self.user.username}/", HTTP_ACCEPT="application/json")
+        self.assertEqual(response.status_code, 204)
+        self.circle.refresh_from_db()
+        self.assertEqual(self.circle.members_count, 1)
+        self.assertFalse(Membership.objects.get(user=self.user).is_active)
+
+    def test_query_counts(self):
+        """Listing, retrieving and the invitations of members shouldn't query each member."""
+
+        Membership.objects.filter(user=self.user).update(remaining_invitations=0)
+        urls= (
+            f"{self.url}?limit=1000",
+            f"{self.url}{self.user.username}/",
+            f"{self.url}{self.user.username}/invitations/",
+        )
+
+        counts= {}
+        for size in (10, 100, 1000):
+            start= Membership.objects.filter(circle=self.circle).count()
+            users= User.objects.bulk_create([
+                User(username=f"member{i}", email=f"member{i}@test.com", password="admin12345")
+                for i in range(start, size)
+            ])
+            profiles= Profile.objects.bulk_create([Profile(user=user) for user in users])
+            Membership.objects.bulk_create([
+                Membership(user=user, profile=profile, circle=self.circle, invited_by=self.user)
+                for user, profile in zip(users, profiles)
+            ])
+
+            counts[size]= []
+            for url in urls:
+                cache.clear()
+                with CaptureQueriesContext(connection) as queries:
+                    response= self.client.get(url, HTTP_ACCEPT="application/json")
+                self.assertEqual(response.status_code, 200)
+                counts[size].append(len(queries))
+            self.assertEqual(len(response.data["used_invitations"]), size - 1)
+
+        self.assertEqual(counts[10], counts[100])
+        self.assertEqual(counts[10], counts[1000])
+
+    def test_leaderboard(self):
+        """Members should be ranked by their stats, and rankings kept up to date."""
+
+        for username, rides_offered in (("ana", 5), ("beto", 0)):
+            user= self.create_member(username)
+            Membership.objects.filter(user=user).update(rides_offered=rides_offered)
+        Membership.objects.filter(user=self.user).update(rides_offered=2)
+        call_command("rebuild_leaderboards", stdout=StringIO())
+
+        url= f"{self.url}leaderboard/?by=rides_offered"
+        response= self.client.get(url)
+        self.assertEqual([row["username"] for row in response.data["results"]], ["ana", "velo", "beto"])
+        self.assertEqual(response.data["me"], {"rank": 2, "score": 2})
+
+        with self.captureOnCommitCallbacks(execute=True):
+            counters.increment(Membership, Membership.objects.get(user=self.user).pk, "rides_offered", 4)
+            self.create_member("carla")
+            Membership.objects.get(user__username="beto").delete()
+        response= self.client.get(f"{url}&limit=2")
+        self.assertEqual(response.data["size"], 3)
+        self.assertEqual(response.data["results"], [
+            {"rank": 1, "username": "velo", "score": 6},
+            {"rank": 2, "username": "ana", "score": 5},
+        ])
+        response= self.client.get(f"{self.url}leaderboard/?by=reputation")
+        self.assertEqual(response.data["results"][0]["score"], 5.0)
+
+    def test_lost_leaderboard_is_rebuilt(self):
+        """Boards that don't rank every member should be rebuilt, at most once per interval."""
+
+        self.create_member("ana")
+        Circle.objects.filter(pk=self.circle.pk).update(members_count=2)
+        cache.clear()
+        replaced= []
+
+        class Rankings(leaderboards.DatabaseLeaderboards):
+            def size(self, circle_pk, board):
+                return 1
+
+            def replace(self, circle_pk, names, scores):
+                replaced.append((circle_pk, sorted(names.values())))
+
+        with mock.patch.object(leaderboards, "_leaderboards", Rankings()):
+            self.client.get(f"{self.url}leaderboard/")
+            self.client.get(f"{self.url}leaderboard/")
+        self.assertEqual(replaced, [(self.circle.pk, ["ana", "velo"])])
+
+    def test_rebuild_keeps_buffered_counters(self):
+        """Rebuilding a lost board should not roll back increments still in the buffer."""
+
+        self.create_member("ana")
+        Circle.objects.filter(pk=self.circle.pk).update(members_count=2)
+        cache.clear()
+        membership= Membership.objects.get(user=self.user)
+        scores= {}
+
+        class Buffer:
+            def __init__(self):
+                self.pending= {counters.make_key(Membership, membership.pk, "rides_offered"): 3}
+
+            def get_many(self, keys):
+                return {key: self.pending[key] for key in keys if key in self.pending}
+
+            def drain(self):
+                return dict(self.pending)
+
+            def ack(self):
+                self.pending= {}
+
+        class Rankings(leaderboards.DatabaseLeaderboards):
+            def size(self, circle_pk, board):
+                return 0
+
+            def replace(self, circle_pk, names, boards):
+                scores.update(boards["rides_offered"])
+
+        with mock.patch.object(counters, "_buffer", Buffer()):
+            with mock.patch.object(leaderboards, "_leaderboards", Rankings()):
+                self.client.get(f"{self.url}leaderboard/")
+        self.assertEqual(scores[self.user.pk], 3)
+
+    def test_import_members(self):
+        """Admins should import people in bulk, up to the member limit, with streamed progress."""
+
+        existing= User.objects.create(username="otro", email="otro@test.com", password="admin12345")
+        Circle.objects.filter(pk=self.circle.pk).update(members_count=1, is_limited=True, members_limit=4)
+        rows= [
+            "email,username,first_name,last_name",
+            "ana@test.com,ana,Ana,Lopez",
+            "VELO@test.com,velo,,",
+            "not-an-email,beto,,",
+            "ana@test.com,ana2,,",
+            "otro@test.com,otro,,",
+            "carla@test.com,carla,,",
+            "dario@test.com,dario,,",
+        ]
+        upload= SimpleUploadedFile("members.csv", "\n".join(rows).encode(), content_type="text/csv")
+        url= f"{self.url}import/"
+
+        self.assertEqual(self.client.post(url, {"file": upload}, format="multipart").status_code, 403)
+
+        Membership.objects.filter(user=self.user).update(is_admin=True)
+        cache.clear()
+        upload.seek(0)
+        response= self.client.post(url, {"file": upload}, format="multipart")
+        self.assertEqual(response.status_code, 200)
+        progress= [json.loads(line) for line in b"".join(response.streaming_content).splitlines()]
+
+        self.assertTrue(progress[-1]["done"])
+        self.assertEqual(
+            {
+                key: progress[-1][key]
+                for key in ("processed", "users_created", "members_added", "already_members", "rejected")
+            },
+            {"processed": 7, "users_created": 2, "members_added": 3, "already_members": 1, "rejected": 3}
+        )
+        self.assertEqual([error["line"] for error in progress[0]["errors"]], [4, 5, 8])
+        self.assertEqual(
+            set(Membership.objects.filter(circle=self.circle).values_list("user__username", flat=True)),
+            {"velo", "ana", "otro", "carla"}
+        )
+        self.assertTrue(Profile.objects.filter(user__username="ana").exists())
+        self.assertTrue(Profile.objects.filter(user=existing).exists())
+        self.assertFalse(User.objects.get(username="ana").has_usable_password())
+        self.circle.refresh_from_db()
+        self.assertEqual(self.circle.members_count, 4)
+
+    async def test_import_members_over_asgi(self):
+        """ASGI servers should stream the import progress instead of buffering it whole."""
+
+        def make_admin():
+            Membership.objects.filter(user=self.user).update(is_admin=True)
+            cache.clear()
+            return Token.objects.get(user=self.user).key
+        token= await sync_to_async(make_admin)()
+
+        rows= ["email,username"] + [f"member{i}@test.com,member{i}" for i in range(3)]
+        upload= SimpleUploadedFile("members.csv", "\n".join(rows).encode(), content_type="text/csv")
+        with warnings.catch_warnings(record=True) as caught:
+            warnings.simplefilter("always")
+            response= await self.async_client.post(
+                f"{self.url}import/", {"file": upload}, headers={"authorization": f"Token {token}"}
+            )
+            self.assertEqual(response.status_code, 200)
+            progress= [json.loads(line) async for line in response.streaming_content]
+
+        self.assertFalse([warning for warning in caught if "synchronous iterators" in str(warning.message)])
+        self.assertTrue(progress[-1]["done"])
+        self.assertEqual(progress[-1]["members_added"], 3)
+
+    def test_import_members_command(self):
+        """The command should import NDJSON files chunk by chunk."""
+
+        lines= [json.dumps({"email": f"member{i}@test.com", "username": f"member{i}"}) for i in range(5)]
+        with tempfile.NamedTemporaryFile("w", suffix=".ndjson", delete=False) as file:
+            file.write("\n".join(lines + ["{broken"]))
+        self.addCleanup(os.remove, file.name)
+
+        output= StringIO()
+        call_command(
+            "import_members", self.circle.slug_name, file.name, "--chunk-size=2", stdout=output, stderr=StringIO()
+        )
+        self.assertEqual(output.getvalue().count("rows,"), 3)
+        self.assertEqual(Membership.objects.filter(circle=self.circle).count(), 6)
@@ -2,17 +2,23 @@
 
 # Django REST Framework
 from rest_framework import viewsets, mixins
+from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.filters import SearchFilter, OrderingFilter
 from django_filters.rest_framework import DjangoFilterBackend
 
 # Local modules
+from cride.circles import directory, slugs
 from cride.circles.models import Circle, Membership
 from cride.circles.serializers import CircleModelSerializer
 from cride.circles.permissions import IsCircleAdmin
+from cride.utils.pagination import KeysetPagination
+from cride.utils import counters
+from cride.utils.views import ConditionalGetMixin
 
 
-class CircleViewSet(mixins.CreateModelMixin,
+class CircleViewSet(ConditionalGetMixin,
+                   mixins.CreateModelMixin,
                    mixins.RetrieveModelMixin,
                    mixins.UpdateModelMixin,
                    mixins.ListModelMixin,
@@ -20,15 +26,18 @@ class CircleViewSet(mixins.CreateModelMixin,
     """Circle view set."""
 
     serializer_class= CircleModelSerializer
+    pagination_class= KeysetPagination
 # With this, we only look up circles using their slug_name
     lookup_field= "slug_name"
 
     # Filters
     filter_backends= (SearchFilter, OrderingFilter, DjangoFilterBackend)
     search_fields= ("slug_name", "name")
-    ordering_fields= ("rides_offered", "rides_taken", "name", "created", "member_limit")
+    ordering_fields= ("members_count", "rides_offered", "rides_taken", "name", "created", "members_limit")
 # This one is the default ordering.    
-    ordering= ("-members__count", "-rides_offered", "-rides_taken")
+    ordering= ("-members_count", "-rides_offered", "-rides_taken")
+# Member and ride counts change all the time, so cursors follow the newest circles instead.
+    cursor_ordering= ("-created",)
     filter_fields= ("verified", "is_limited")
 
 
@@ -49,6 +58,33 @@ class CircleViewSet(mixins.CreateModelMixin,
             permissions.append(IsCircleAdmin)
         return [permission() for permission in permissions]
 
+    def get_validators(self):
+        """Use the directory version for lists, which every circle change bumps."""
+
+        if self.action == "list":
+            return [directory.get_version()], None
+        return super(CircleViewSet, self).get_validators()
+
+    def get_serializer_context(self):
+        """Leave buffered counters out of the cached directory pages."""
+
+        context= super(CircleViewSet, self).get_serializer_context()
+        if self.action == "list":
+            context["pending_counters"]= False
+        return context
+
+    def list(self, request, *args, **kwargs):
+        """List public circles, served from the directory cache when possible."""
+
+        data, hit= directory.get_page(
+            request,
+            lambda: super(CircleViewSet, self).list(request, *args, **kwargs).data
+        )
+        counters.add_pending(Circle, data["results"], CircleModelSerializer.counter_fields)
+        response= Response(data)
+        response["X-Cache"]= "HIT" if hit else "MISS"
+        return response
+
 
     def perform_create(self, serializer):
         """Assign circle admin"""
@@ -64,6 +100,15 @@ class CircleViewSet(mixins.CreateModelMixin,
             is_admin=True,
             remaining_invitations=10
         )
+        Circle.objects.add_member(circle)
+
+    def perform_update(self, serializer):
+        """Update the circle and drop its cached copies."""
+
+        slug_name= serializer.instance.slug_name
+        circle= serializer.save()
+        directory.invalidate()
+        slugs.invalidate(slug_name, circle.slug_name)
 
 
 
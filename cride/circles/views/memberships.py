@@ -6,14 +6,22 @@ from rest_framework.generics import get_object_or_404
 from rest_framework.decorators import action
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
+from rest_framework.parsers import MultiPartParser
 
 # Local modules
+from cride.circles import imports, leaderboards, slugs
 from cride.circles.models import Circle, Membership, Invitation
-from cride.circles.serializers import MembershipModelSerializer, AddMemberSerializer
-from cride.circles.permissions.memberships import IsActiveCircleMember, IsSelfMember
+from cride.circles.serializers import MembershipModelSerializer, AddMemberSerializer, LeaderboardSerializer
+from cride.circles.permissions.memberships import IsActiveCircleMember, IsCircleAdminMember, IsSelfMember
+from cride.utils.pagination import KeysetPagination
+from cride.utils.views import ConditionalGetMixin, stream
 
+# Utilities
+import json
 
-class MembershipViewSet(mixins.ListModelMixin,
+
+class MembershipViewSet(ConditionalGetMixin,
+    mixins.ListModelMixin,
     mixins.CreateModelMixin,
     mixins.RetrieveModelMixin,
     mixins.DestroyModelMixin,
@@ -21,12 +29,16 @@ class MembershipViewSet(mixins.ListModelMixin,
     """Circle membership view set."""
 
     serializer_class= MembershipModelSerializer
+    pagination_class= KeysetPagination
+# The model ordering also uses 'modified', which cursors can't follow.
+    cursor_ordering= ("-created",)
+    validator_fields= ("modified", "user__modified", "user__profile__modified")
 
     def dispatch(self, request, *args, **kwargs):
         """Verify that the Circle exists"""
 
         slug_name= kwargs["slug_name"]
-        self.circle= get_object_or_404(Circle, slug_name=slug_name)
+        self.circle= slugs.get_circle_or_404(slug_name)
         return super(MembershipViewSet, self).dispatch(request, *args, **kwargs)
 
     
@@ -39,6 +51,8 @@ class MembershipViewSet(mixins.ListModelMixin,
             permissions.append(IsActiveCircleMember)
         if self.action== "invitations":
             permissions.append(IsSelfMember)
+        if self.action== "import_members":
+            permissions.append(IsCircleAdminMember)
         return [p() for p in permissions]
 
 
@@ -48,25 +62,32 @@ class MembershipViewSet(mixins.ListModelMixin,
         return Membership.objects.filter(
             circle=self.circle, 
             is_active=True
-        )
+        ).select_related("user__profile", "invited_by", "circle")
     
     
     def get_object(self):
         """Return the circle member by using the user's username."""
         
         return get_object_or_404(
-            Membership,
-            user__username=self.kwargs['pk'],
-            circle=self.circle,
-            is_active=True
+            self.get_queryset(),
+            user__username=self.kwargs['pk']
         )
 
 
+    def get_validation_queryset(self):
+        """Look members up by their username, like get_object does."""
+
+        if self.action == "retrieve":
+            return self.get_queryset().filter(user__username=self.kwargs["pk"])
+        return super(MembershipViewSet, self).get_validation_queryset()
+
+
     def perform_destroy(self, instance):
         """Disable membership."""
 
-        instance.is_acive=False
+        instance.is_active=False
         instance.save()
+        Circle.objects.remove_member(self.circle)
 
 
     @action(detail=True, methods=["GET"])
@@ -79,11 +100,7 @@ class MembershipViewSet(mixins.ListModelMixin,
         """
 # This gets the circle where the membership is. 
         member= self.get_object()
-        invited_members= Membership.objects.filter(
-            circle=self.circle,
-            invited_by=request.user,
-            is_active=True
-        )
+        invited_members= self.get_queryset().filter(invited_by=request.user)
 
         unused_invitations= Invitation.objects.filter(
             circle=self.circle,
@@ -94,14 +111,8 @@ class MembershipViewSet(mixins.ListModelMixin,
         
 # Since we don't want them in the "queryset" format, we do a loop.
         invitations= [x[0] for x in unused_invitations]
-
-        for i in range(0, diff):
-            invitations.append(
-                Invitation.objects.create(
-                    issued_by=request.user,
-                    circle=self.circle
-                ).code
-            )
+        if diff > 0:
+            invitations += Invitation.objects.issue(self.circle, request.user, diff)
 
         data= {
             "used_invitations": MembershipModelSerializer(invited_members, many=True).data,
@@ -109,6 +120,56 @@ class MembershipViewSet(mixins.ListModelMixin,
         }
         return Response(data)
 
+    @action(detail=False, methods=["GET"])
+    def leaderboard(self, request, *args, **kwargs):
+        """Rank the circle's members by a stat.
+
+        Returns the top members and the requesting user's own rank, both
+        read from the precomputed leaderboards, which don't query members
+        when kept in Redis. Boards that lost members are rebuilt first.
+        """
+
+        serializer= LeaderboardSerializer(data=request.query_params)
+        serializer.is_valid(raise_exception=True)
+        board, limit= serializer.validated_data["by"], serializer.validated_data["limit"]
+
+        leaderboards.check(self.circle, board)
+        rankings= leaderboards.get_leaderboards()
+        cast= float if board == "reputation" else int
+        results= [
+            {"rank": rank, "username": username, "score": cast(score)}
+            for rank, (member, username, score) in enumerate(rankings.top(self.circle.pk, board, limit), 1)
+        ]
+        own= rankings.rank(self.circle.pk, board, request.user.pk)
+
+        data= {
+            "by": board,
+            "size": rankings.size(self.circle.pk, board),
+            "results": results,
+            "me": {"rank": own[0] + 1, "score": cast(own[1])} if own else None
+        }
+        return Response(data)
+
+    @action(detail=False, methods=["POST"], url_path="import", parser_classes=[MultiPartParser])
+    def import_members(self, request, *args, **kwargs):
+        """Add the people of an uploaded CSV or NDJSON file as members.
+
+        Progress is streamed as one JSON line per imported chunk, followed
+        by a final line with the totals.
+        """
+
+        upload= request.FILES.get("file")
+        if upload is None:
+            return Response({"file": ["No file was submitted."]}, status=status.HTTP_400_BAD_REQUEST)
+        is_ndjson= upload.name.endswith((".ndjson", ".jsonl")) or "ndjson" in (upload.content_type or "")
+        rows= imports.read_rows(upload, "ndjson" if is_ndjson else "csv")
+        importer= imports.MembershipImport(self.circle, invited_by=request.user)
+
+# The rows are imported while the response streams, after the request's transaction ended,
+# so each chunk commits on its own.
+        progress= (json.dumps(line) + "\n" for line in importer.run(rows))
+        return stream(request, progress, content_type="application/x-ndjson")
+
     def create(self, request, *args, **kwargs):
         """Handle member creation from an invitation code."""
 
@@ -0,0 +1,54 @@
+"""Ride availability events.
+
+Every change to a ride's availability is published on its circle's
+channel once the transaction commits, so clients streaming the channel
+can update seat counts without polling the ride list.
+"""
+
+# Django
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+
+# Local modules
+from cride.utils import events
+
+# Utilities
+import json
+
+
+CREATED= "ride.created"
+JOINED= "ride.joined"
+LEFT= "ride.left"
+UPDATED= "ride.updated"
+FINISHED= "ride.finished"
+
+
+def get_channel(slug_name):
+    """Return the event channel of a circle's rides."""
+    return f"rides:{slug_name}"
+
+
+def serialize(event, ride):
+    """Return the message of a ride event."""
+
+    return json.dumps({
+        "type": event,
+        "ride": ride.pk,
+        "available_seats": ride.available_seats,
+        "is_active": ride.is_active,
+        "departure_date": ride.departure_date,
+    }, cls=DjangoJSONEncoder)
+
+
+def publish(slug_name, event, *rides):
+    """Publish an event of some rides of a circle once the transaction commits."""
+
+    channel= get_channel(slug_name)
+    messages= [serialize(event, ride) for ride in rides]
+
+    def send():
+        broker= events.get_broker()
+        for message in messages:
+            broker.publish(channel, message)
+
+    transaction.on_commit(send)
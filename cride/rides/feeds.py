@@ -0,0 +1,53 @@
+"""Ride feed cache.
+
+Serialized ride list pages are cached per circle. Every entry is keyed
+with the circle's feed version, which is bumped whenever one of its rides
+is created, joined, updated, finished or rated. Views can add other parts
+to the key, like the validators of the profiles nested in the rides.
+"""
+
+# Django
+from django.core.cache import cache
+
+# Local modules
+from cride.utils import cache as cache_utils
+
+# Utilities
+import time
+
+
+FEED_TIMEOUT= 60
+STATS_NAMESPACE= "rides:feed"
+
+
+def get_namespace(slug_name):
+    """Return the cache namespace of a circle's ride feed."""
+    return f"rides:feed:{slug_name}"
+
+
+def invalidate(slug_name):
+    """Drop the cached ride feed of a circle."""
+    cache_utils.bump_version(get_namespace(slug_name))
+
+
+def get_page(slug_name, request, build, *parts):
+    """Return a feed page from the cache, or build it and cache it.
+
+    Returns the page data and whether it came from the cache.
+    """
+
+    start= time.perf_counter()
+    key= cache_utils.make_key(get_namespace(slug_name), request.build_absolute_uri(), *parts)
+    data= cache.get(key)
+    hit= data is not None
+    if not hit:
+        data= build()
+        cache.set(key, data, FEED_TIMEOUT)
+
+    cache_utils.record_lookup(STATS_NAMESPACE, hit, time.perf_counter() - start)
+    return data, hit
+
+
+def get_stats():
+    """Return the feed cache hit rate and latencies."""
+    return cache_utils.get_stats(STATS_NAMESPACE)
@@ -0,0 +1,27 @@
+"""Ride filters."""
+
+# Django
+from django_filters import rest_framework as filters
+
+# Local modules
+from cride.rides.models import Ride
+
+
+class RideFilter(filters.FilterSet):
+    """Ride filter set.
+
+    Time windows on departure and arrival dates, e.g. rides departing
+    between 7:00 and 9:00 tomorrow. Departure windows are range scans on
+    the (offered_in, is_active, departure_date) index.
+    """
+
+    departure_after= filters.IsoDateTimeFilter(field_name="departure_date", lookup_expr="gte")
+    departure_before= filters.IsoDateTimeFilter(field_name="departure_date", lookup_expr="lte")
+    arrival_after= filters.IsoDateTimeFilter(field_name="arrival_date", lookup_expr="gte")
+    arrival_before= filters.IsoDateTimeFilter(field_name="arrival_date", lookup_expr="lte")
+
+    class Meta:
+        """Meta class."""
+
+        model= Ride
+        fields= ("departure_after", "departure_before", "arrival_after", "arrival_before")
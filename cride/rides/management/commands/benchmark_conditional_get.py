@@ -0,0 +1,98 @@
+"""Conditional GET benchmark command."""
+
+# Django
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from rest_framework.test import APIClient
+
+# Local modules
+from cride.circles.models import Circle, Membership
+from cride.rides import feeds
+from cride.rides.models import Ride
+from cride.users.models import Profile, User
+from cride.utils import cache as cache_utils
+
+# Utilities
+import time
+
+
+class Command(BaseCommand):
+    """Compare full responses with 304 Not Modified ones.
+
+    A throwaway circle with members and rides is created inside a
+    transaction that is rolled back at the end. Each endpoint is fetched
+    with the ETag it returned, and then without validators, with the
+    circle's feed invalidated so its rides are serialized every time. The
+    cache is shared with the running site, so nothing else is dropped.
+    """
+
+    help= "Benchmark conditional GETs of rides, circles, members and users."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--members", type=int, default=100)
+        parser.add_argument("--rides", type=int, default=50)
+        parser.add_argument("--repeat", type=int, default=20)
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            self.run(options["members"], options["rides"], options["repeat"])
+            transaction.set_rollback(True)
+
+    def run(self, total_members, total_rides, repeat):
+        """Seed the circle and time both kinds of requests."""
+
+        circle= Circle.objects.create(name="Benchmark", slug_name="benchmark-conditional")
+        users= User.objects.bulk_create([
+            User(username=f"benchmark-conditional-{i}", email=f"benchmark-conditional-{i}@comparteride.com")
+            for i in range(total_members)
+        ])
+        profiles= Profile.objects.bulk_create([Profile(user=user) for user in users])
+        Membership.objects.bulk_create([
+            Membership(user=user, profile=profile, circle=circle)
+            for user, profile in zip(users, profiles)
+        ])
+        for i in range(total_rides):
+            ride= Ride.objects.create(
+                offered_by=users[i % total_members],
+                offered_in=circle,
+                available_seats=5,
+                departure_location="Origin",
+                arrival_location="Destination"
+            )
+            ride.passengers.add(*users[i % total_members + 1:i % total_members + 4])
+
+        client= APIClient()
+        client.force_authenticate(users[0])
+        urls= {
+            "rides": f"/circles/{circle.slug_name}/rides/?limit=50",
+            "circle": f"/circles/{circle.slug_name}/",
+            "members": f"/circles/{circle.slug_name}/members/?limit=50",
+            "member": f"/circles/{circle.slug_name}/members/{users[0].username}/",
+            "user": f"/users/{users[0].username}/",
+        }
+        for name, url in urls.items():
+            response= client.get(url, HTTP_ACCEPT="application/json")
+            if "ETag" not in response:
+                self.stderr.write(f"{name}: {response.status_code} without ETag, skipped")
+                continue
+            etag= response["ETag"]
+            conditional= self.measure(client, url, repeat, HTTP_IF_NONE_MATCH=etag)
+            full= self.measure(client, url, repeat, feed=feeds.get_namespace(circle.slug_name))
+            self.stdout.write(
+                f"{name}: {full[0]} {full[1]:.2f} ms {full[2]:.2f} ms CPU {full[3]} bytes | "
+                f"{conditional[0]} {conditional[1]:.2f} ms {conditional[2]:.2f} ms CPU {conditional[3]} bytes"
+            )
+
+    def measure(self, client, url, repeat, feed=None, **headers):
+        """Return the status, average wall and CPU milliseconds and body size of a request."""
+
+        wall, cpu= 0, 0
+        for _ in range(repeat):
+# The transaction is rolled back, so the feed can't wait for a commit to be invalidated.
+            if feed:
+                cache_utils.increment_version(feed)
+            start, start_cpu= time.perf_counter(), time.process_time()
+            response= client.get(url, HTTP_ACCEPT="application/json", **headers)
+            wall += time.perf_counter() - start
+            cpu += time.process_time() - start_cpu
+        return response.status_code, wall / repeat * 1000, cpu / repeat * 1000, len(response.content)
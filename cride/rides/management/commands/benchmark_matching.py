@@ -0,0 +1,96 @@
+"""Route matching benchmark command."""
+
+# Django
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+
+# Local modules
+from cride.circles.models import Circle
+from cride.rides import matching
+from cride.rides.models import Ride
+
+# Utilities
+import random
+import time
+from datetime import timedelta
+
+
+NEIGHBORHOODS= (
+    "Gaviotas", "Centro", "Laureles", "Belen", "Poblado", "Envigado", "Sabaneta", "Itagui",
+    "Bello", "Robledo", "Castilla", "Aranjuez", "Manrique", "Buenos Aires", "La America", "Estadio",
+)
+
+
+class Command(BaseCommand):
+    """Time route matches on a circle full of upcoming rides.
+
+    Rides between random neighborhoods, half of them with coordinates, are
+    created in a throwaway circle inside a transaction that is rolled back
+    at the end. The first match builds the circle's candidate arrays and
+    is reported apart from the rest.
+    """
+
+    help= "Benchmark route matching."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rides", type=int, default=50000)
+        parser.add_argument("--repeat", type=int, default=50)
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            self.run(options["rides"], options["repeat"])
+            transaction.set_rollback(True)
+
+    def random_end(self):
+        """Return a random location and, half of the times, coordinates near it."""
+
+        name= random.choice(NEIGHBORHOODS)
+        if random.random() < 0.5:
+            return name, None, None
+        return name, 6.25 + random.uniform(-0.05, 0.05), -75.57 + random.uniform(-0.05, 0.05)
+
+    def run(self, total, repeat):
+        """Seed the rides and time matches of random routes."""
+
+        now= timezone.now()
+        circle= Circle.objects.create(name="Benchmark", slug_name="benchmark-matching")
+        rides= []
+        for _ in range(total):
+            origin, origin_lat, origin_lng = self.random_end()
+            destination, destination_lat, destination_lng = self.random_end()
+            departure= now + timedelta(minutes=random.randint(10, 7 * 24 * 60))
+            ride= Ride(
+                offered_in=circle,
+                departure_location=f"Calle {random.randint(1, 80)} {origin}",
+                departure_latitude=origin_lat,
+                departure_longitude=origin_lng,
+                departure_date=departure,
+                arrival_location=f"Carrera {random.randint(1, 80)} {destination}",
+                arrival_latitude=destination_lat,
+                arrival_longitude=destination_lng,
+                arrival_date=departure + timedelta(minutes=40)
+            )
+            ride.update_location_fields()
+            rides.append(ride)
+        Ride.objects.bulk_create(rides, batch_size=5000)
+
+        queryset= circle.ride_set.filter(is_active=True, available_seats__gte=1)
+        timings= []
+        for _ in range(repeat + 1):
+            origin, origin_lat, origin_lng= self.random_end()
+            destination= random.choice(NEIGHBORHOODS)
+            start= time.perf_counter()
+            matching.match(
+                circle,
+                queryset,
+                {"location": origin, "latitude": origin_lat, "longitude": origin_lng},
+                {"location": destination},
+                now,
+                now + timedelta(days=1),
+                limit=10
+            )
+            timings.append((time.perf_counter() - start) * 1000)
+
+        self.stdout.write(f"{timings[0]:.2f} ms for the first match, building the arrays of {total} rides")
+        self.stdout.write(f"{sum(timings[1:]) / repeat:.2f} ms per match afterwards")
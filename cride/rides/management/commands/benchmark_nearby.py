@@ -0,0 +1,70 @@
+"""Nearby rides benchmark command."""
+
+# Django
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+# Local modules
+from cride.circles.models import Circle
+from cride.rides.models import Ride
+from cride.utils import geo
+
+# Utilities
+import random
+import time
+
+
+class Command(BaseCommand):
+    """Time nearby ride lookups on a circle full of active rides.
+
+    Rides are spread around a city center in a throwaway circle inside a
+    transaction that is rolled back at the end.
+    """
+
+    help= "Benchmark nearby ride lookups."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rides", type=int, default=100000)
+        parser.add_argument("--radius", type=float, default=2)
+        parser.add_argument("--repeat", type=int, default=50)
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            self.run(options["rides"], options["radius"], options["repeat"])
+            transaction.set_rollback(True)
+
+    def run(self, total, radius, repeat):
+        """Seed the rides and time lookups around random points."""
+
+        latitude, longitude, spread= 19.4326, -99.1332, 0.25
+        circle= Circle.objects.create(name="Benchmark", slug_name="benchmark-nearby")
+
+        rides= []
+        for _ in range(total):
+            lat= latitude + random.uniform(-spread, spread)
+            lng= longitude + random.uniform(-spread, spread)
+            rides.append(Ride(
+                offered_in=circle,
+                departure_location="Origin",
+                departure_latitude=lat,
+                departure_longitude=lng,
+                departure_geohash=geo.encode(lat, lng),
+                arrival_location="Destination"
+            ))
+        Ride.objects.bulk_create(rides, batch_size=5000)
+
+        queryset= circle.ride_set.filter(is_active=True)
+        found= 0
+        start= time.perf_counter()
+        for _ in range(repeat):
+            found += len(queryset.nearby(
+                latitude + random.uniform(-spread, spread),
+                longitude + random.uniform(-spread, spread),
+                radius,
+                limit=20
+            ))
+        elapsed= (time.perf_counter() - start) / repeat * 1000
+        self.stdout.write(
+            f"{elapsed:.2f} ms per lookup within {radius} km of {total} rides "
+            f"({found / repeat:.0f} rides returned on average)"
+        )
@@ -0,0 +1,71 @@
+"""Pagination benchmark command."""
+
+# Django
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+# Local modules
+from cride.circles.models import Circle
+from cride.rides.models import Ride
+from cride.utils.pagination import KeysetPagination
+
+# Utilities
+import time
+
+
+class Command(BaseCommand):
+    """Compare deep page latency of offset and keyset pagination.
+
+    Rides are created in a throwaway circle inside a transaction that is
+    rolled back at the end, so the command can run against any database.
+    """
+
+    help= "Benchmark offset against keyset pagination on ride lists."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rides", type=int, default=50000)
+        parser.add_argument("--limit", type=int, default=6)
+        parser.add_argument("--repeat", type=int, default=20)
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            self.run(options["rides"], options["limit"], options["repeat"])
+            transaction.set_rollback(True)
+
+    def run(self, total, limit, repeat):
+        """Seed the rides and time the last page with both strategies."""
+
+        circle= Circle.objects.create(name="Benchmark", slug_name="benchmark-pagination")
+        Ride.objects.bulk_create(
+            [
+                Ride(
+                    offered_in=circle,
+                    available_seats=i % 5 + 1,
+                    departure_location="Origin",
+                    arrival_location="Destination"
+                )
+                for i in range(total)
+            ],
+            batch_size=5000
+        )
+        queryset= circle.ride_set.filter(is_active=True).order_by("-created")
+        factory= APIRequestFactory()
+        offset= total - limit
+
+        paginator= KeysetPagination()
+        paginator.ordering= paginator.get_ordering(queryset)
+        row= queryset.order_by(*paginator.ordering)[offset - 1]
+        cursor= paginator.encode_cursor(paginator.get_position(row), reverse=False)
+
+        requests= {
+            "offset": Request(factory.get("/", {"offset": offset, "limit": limit})),
+            "keyset": Request(factory.get("/", {"cursor": cursor, "limit": limit})),
+        }
+        for name, request in requests.items():
+            start= time.perf_counter()
+            for _ in range(repeat):
+                page= KeysetPagination().paginate_queryset(queryset, request)
+            elapsed= (time.perf_counter() - start) / repeat * 1000
+            self.stdout.write(f"{name}: {elapsed:.2f} ms per page at row {offset} ({len(page)} rides)")
@@ -0,0 +1,137 @@
+"""Ride event stream load test command."""
+
+# Django
+from django.conf import settings
+from django.core.asgi import get_asgi_application
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from rest_framework.authtoken.models import Token
+
+# Local modules
+from cride.circles.models import Circle, Membership
+from cride.rides import events
+from cride.rides.models import Ride
+from cride.users.models import Profile, User
+from cride.utils.events import get_broker
+
+# Utilities
+import asyncio
+import resource
+import time
+
+
+class Command(BaseCommand):
+    """Measure how many event stream subscribers one worker can hold.
+
+    Subscribers are ASGI connections made in process to the application,
+    so the numbers cover the whole request path without the network.
+    Events are then published on the circle's channel and timed until
+    every subscriber got them. The throwaway circle and user are deleted
+    at the end.
+    """
+
+    help= "Load test the ride event stream with concurrent subscribers."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--subscribers", type=int, default=1000)
+        parser.add_argument("--events", type=int, default=20)
+
+    def handle(self, *args, **options):
+# Leftovers of an interrupted run.
+        User.objects.filter(username="loadtest-events").delete()
+        Circle.objects.filter(slug_name="loadtest-events").delete()
+
+        user= User.objects.create(username="loadtest-events", email="loadtest-events@comparteride.com")
+        circle= Circle.objects.create(name="Load test", slug_name="loadtest-events")
+        Membership.objects.create(user=user, profile=Profile.objects.create(user=user), circle=circle)
+        token= Token.objects.create(user=user).key
+        try:
+            asyncio.run(self.run(circle.slug_name, token, options["subscribers"], options["events"]))
+        finally:
+            circle.delete()
+            user.delete()
+
+    async def run(self, slug_name, token, total, count):
+        """Connect the subscribers, publish the events and report."""
+
+        application= get_asgi_application()
+        host= next((host.lstrip(".") for host in settings.ALLOWED_HOSTS if host != "*"), "localhost")
+        connected= asyncio.Semaphore(0)
+        refused= []
+        received= [[] for _ in range(count)]
+        disconnect= asyncio.Event()
+
+        async def subscribe():
+            requested= False
+
+            async def receive():
+                nonlocal requested
+                if not requested:
+                    requested= True
+                    return {"type": "http.request", "body": b"", "more_body": False}
+                await disconnect.wait()
+                return {"type": "http.disconnect"}
+
+            async def send(message):
+                body= message.get("body", b"")
+                if message["type"] == "http.response.start" and message["status"] != 200:
+                    refused.append(message["status"])
+                    connected.release()
+                elif body.startswith(b"retry:"):
+                    connected.release()
+                elif body.startswith(b"data:"):
+                    received[int(body.split(b'"ride": ', 1)[1].split(b",", 1)[0])].append(time.perf_counter())
+
+            path= f"/circles/{slug_name}/rides/events/"
+            await application({
+                "type": "http",
+                "asgi": {"version": "3.0"},
+                "http_version": "1.1",
+                "method": "GET",
+                "scheme": "http",
+                "path": path,
+                "raw_path": path.encode(),
+                "query_string": b"",
+                "root_path": "",
+                "headers": [(b"host", host.encode()), (b"authorization", f"Token {token}".encode())],
+                "client": ("127.0.0.1", 0),
+                "server": (host, 80),
+            }, receive, send)
+
+# The first subscriber loads the URLs and views, so it is left out of the measures.
+        connections= [asyncio.create_task(subscribe())]
+        await connected.acquire()
+        baseline= resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        start= time.perf_counter()
+        connections += [asyncio.create_task(subscribe()) for _ in range(total - 1)]
+        for _ in range(total - 1):
+            await connected.acquire()
+        connect_seconds= time.perf_counter() - start
+# Peak resident size, in KiB on Linux.
+        memory= resource.getrusage(resource.RUSAGE_SELF).ru_maxrss - baseline
+        if refused:
+            disconnect.set()
+            await asyncio.gather(*connections)
+            self.stderr.write(f"{len(refused)} subscribers were refused with status {refused[0]}")
+            return
+
+        channel= events.get_channel(slug_name)
+        broker= get_broker()
+        latencies= []
+        for i in range(count):
+            ride= Ride(pk=i, available_seats=i % 4, departure_date=timezone.now(), is_active=True)
+            published= time.perf_counter()
+            broker.publish(channel, events.serialize(events.UPDATED, ride))
+            while len(received[i]) < total:
+                await asyncio.sleep(0.001)
+            latencies.append((max(received[i]) - published) * 1000)
+
+        disconnect.set()
+        await asyncio.gather(*connections)
+
+        self.stdout.write(f"{total} subscribers connected in {connect_seconds:.2f} s, {memory / max(total - 1, 1):.1f} KiB each")
+        self.stdout.write(
+            f"{count} events delivered to every subscriber in {sum(latencies) / count:.2f} ms on average, "
+            f"{max(latencies):.2f} ms at worst"
+        )
+        self.stdout.write(f"{broker.count(channel)} subscriptions left after disconnecting")
@@ -0,0 +1,68 @@
+"""Rebuild rating aggregates command."""
+
+# Django
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count, Sum
+from django.utils import timezone
+
+# Local modules
+from cride.rides.models import Rating, Ride
+from cride.users.models import Profile
+
+
+class Command(BaseCommand):
+    """Rebuild rating aggregates.
+
+    Recompute the rating sums, counts and averages stored on rides and
+    profiles from the Rating table, to reconcile them after bulk edits
+    or to backfill rides rated before the aggregates existed.
+    """
+
+    help= "Rebuild ride ratings and profile reputations from the Rating table."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=1000)
+
+    @transaction.atomic
+    def handle(self, *args, **options):
+        batch_size= options["batch_size"]
+        now= timezone.now()
+
+        Ride.objects.update(rating=None, rating_sum=0, rating_count=0, modified=now)
+        rides= [
+            Ride(
+                pk=row["ride"],
+                rating_sum=row["total"],
+                rating_count=row["count"],
+                rating=round(row["total"] / row["count"], 1),
+                modified=now
+            )
+            for row in Rating.objects.values("ride").annotate(total=Sum("rating"), count=Count("id")).order_by()
+        ]
+        Ride.objects.bulk_update(
+            rides, ["rating", "rating_sum", "rating_count", "modified"], batch_size=batch_size
+        )
+
+        Profile.objects.update(reputation=5.0, ratings_sum=0, ratings_count=0, modified=now)
+        profile_ids= dict(Profile.objects.values_list("user_id", "pk"))
+        profiles= [
+            Profile(
+                pk=profile_ids[row["rated_user"]],
+                ratings_sum=row["total"],
+                ratings_count=row["count"],
+                reputation=round(row["total"] / row["count"], 1),
+                modified=now
+            )
+            for row in Rating.objects.filter(
+                rated_user__isnull=False
+            ).values("rated_user").annotate(total=Sum("rating"), count=Count("id")).order_by()
+            if row["rated_user"] in profile_ids
+        ]
+        Profile.objects.bulk_update(
+            profiles, ["reputation", "ratings_sum", "ratings_count", "modified"], batch_size=batch_size
+        )
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Rebuilt ratings of {len(rides)} rides and {len(profiles)} profiles."
+        ))
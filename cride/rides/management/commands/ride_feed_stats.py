@@ -0,0 +1,17 @@
+"""Ride feed cache stats command."""
+
+# Django
+from django.core.management.base import BaseCommand
+
+# Local modules
+from cride.rides import feeds
+
+
+class Command(BaseCommand):
+    """Print the ride feed cache hit rate and latencies."""
+
+    help= "Show ride feed cache stats."
+
+    def handle(self, *args, **options):
+        for name, value in feeds.get_stats().items():
+            self.stdout.write(f"{name}: {value if value is not None else '-'}")
@@ -0,0 +1 @@
+from .rides import *
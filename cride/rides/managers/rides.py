@@ -0,0 +1,52 @@
+"""Ride managers."""
+
+# Django
+from django.db import models
+
+# Local modules
+from cride.utils import geo
+
+
+class RideQuerySet(models.QuerySet):
+    """Ride queryset.
+
+    Adds the geospatial lookups used to match riders with nearby rides.
+    """
+
+    def nearby(self, latitude, longitude, radius, limit=None):
+        """Return the rides departing within radius kilometers of a point.
+
+        Candidates are narrowed down in the database with the geohash
+        cells covering the search area and its bounding box, and only their
+        coordinates are fetched to compute exact distances. The result is a
+        list of at most limit rides sorted by distance and departure date,
+        with a 'distance' attribute on each ride.
+        """
+
+        south, west, north, east= geo.bounding_box(latitude, longitude, radius)
+        candidates= self.filter(
+            departure_latitude__range=(south, north),
+            departure_longitude__range=(west, east)
+        ).values_list(
+            "pk", "departure_latitude", "departure_longitude", "departure_date"
+        ).order_by()
+
+# One range scan per group of cells keeps every part of the query on the geohash index.
+        ranges= [
+            candidates.filter(departure_geohash__range=bounds)
+            for bounds in geo.covering_ranges(south, west, north, east)
+        ]
+        candidates= ranges[0].union(*ranges[1:], all=True)
+
+        matches= []
+        for pk, ride_latitude, ride_longitude, departure_date in candidates:
+            distance= geo.distance(latitude, longitude, ride_latitude, ride_longitude)
+            if distance <= radius:
+                matches.append((distance, departure_date, pk))
+        matches.sort()
+        matches= matches[:limit]
+
+        rides= self.in_bulk([pk for _, _, pk in matches])
+        for distance, _, pk in matches:
+            rides[pk].distance= distance
+        return [rides[pk] for _, _, pk in matches]
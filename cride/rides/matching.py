@@ -0,0 +1,188 @@
+"""Ride route matching.
+
+Ranks the upcoming rides of a circle by how similar their route is to
+the one a passenger wants to take. Each end of the route is scored by
+distance when both the ride and the passenger give coordinates for it,
+and by the words of its location otherwise. Scoring runs with NumPy over
+arrays holding every candidate ride of the circle, which are kept in
+memory per version of the circle's ride feed, so they are only rebuilt
+after its rides change.
+"""
+
+# Django
+from django.utils import timezone
+
+# Local modules
+from cride.rides import feeds
+from cride.rides.models import Ride
+from cride.rides.search import normalize
+from cride.utils import cache as cache_utils
+from cride.utils.geo import EARTH_RADIUS
+
+# Utilities
+import bisect
+import threading
+from collections import OrderedDict
+from difflib import get_close_matches
+
+import numpy as np
+
+
+ENDS= ("departure", "arrival")
+# Kilometers at which the proximity score of an end of the route drops to 1/e.
+DISTANCE_SCALE= 2.0
+MIN_SCORE= 0.25
+MAX_CIRCLES= 64
+
+_indexes= OrderedDict()
+_lock= threading.Lock()
+
+
+class RouteIndex:
+    """Candidate ride arrays of a circle.
+
+    Holds the primary keys, departure timestamps and coordinates of the
+    rides in parallel arrays, and for each end of the route an inverted
+    index from location words to the positions of the rides using them.
+    """
+
+    def __init__(self, rides):
+        self.pks= np.array([ride["pk"] for ride in rides], dtype=np.int64)
+        self.departures= np.array([ride["departure_date"].timestamp() for ride in rides], dtype=np.float64)
+        self.points= {}
+        self.postings= {}
+        self.words= {}
+
+        for end in ENDS:
+            self.points[end]= np.radians(np.array(
+                [
+                    (ride[f"{end}_latitude"], ride[f"{end}_longitude"])
+                    if ride[f"{end}_latitude"] is not None and ride[f"{end}_longitude"] is not None
+                    else (np.nan, np.nan)
+                    for ride in rides
+                ],
+                dtype=np.float64
+            ).reshape(-1, 2))
+
+            postings= {}
+            for position, ride in enumerate(rides):
+                for word in set(normalize(ride[f"{end}_location"]).split()):
+                    postings.setdefault(word, []).append(position)
+            self.postings[end]= {word: np.array(positions, dtype=np.int64) for word, positions in postings.items()}
+            self.words[end]= sorted(postings)
+
+    def __len__(self):
+        return len(self.pks)
+
+    def expand(self, end, term):
+        """Return the indexed words a term matches: words it prefixes, or close typos."""
+
+        words= self.words[end]
+        matches= []
+        i= bisect.bisect_left(words, term)
+        while i < len(words) and words[i].startswith(term):
+            matches.append(words[i])
+            i += 1
+        return matches or get_close_matches(term, words, n=3, cutoff=0.8)
+
+    def text_scores(self, end, text):
+        """Return the fraction of the words of a location each ride matches."""
+
+        terms= normalize(text).split()
+        scores= np.zeros(len(self), dtype=np.float64)
+        for term in terms:
+            hits= np.zeros(len(self), dtype=bool)
+            for word in self.expand(end, term):
+                hits[self.postings[end][word]]= True
+            scores += hits
+        return scores / len(terms) if terms else scores
+
+    def distance_scores(self, end, latitude, longitude):
+        """Return the proximity of each ride to a point, from 1 down to 0, or NaN without coordinates."""
+
+        points= self.points[end]
+        latitude, longitude= np.radians(latitude), np.radians(longitude)
+        a= (
+            np.sin((points[:, 0] - latitude) / 2) ** 2
+            + np.cos(latitude) * np.cos(points[:, 0]) * np.sin((points[:, 1] - longitude) / 2) ** 2
+        )
+        distances= 2 * EARTH_RADIUS * np.arcsin(np.sqrt(a))
+        return np.exp(-distances / DISTANCE_SCALE)
+
+    def end_scores(self, end, location="", latitude=None, longitude=None):
+        """Return how well each ride matches one end of the route."""
+
+        scores= self.text_scores(end, location)
+        if latitude is not None and longitude is not None:
+            proximity= self.distance_scores(end, latitude, longitude)
+            scores= np.where(np.isnan(proximity), scores, proximity)
+        return scores
+
+    def match(self, origin, destination, after, before, limit):
+        """Return the primary keys and scores of the best matching rides.
+
+        The origin and destination are dicts with a 'location' and
+        optional 'latitude' and 'longitude'. Rides scoring at least
+        MIN_SCORE are ranked by score and then by departure.
+        """
+
+        scores= (self.end_scores("departure", **origin) + self.end_scores("arrival", **destination)) / 2
+        mask= (scores >= MIN_SCORE) & (self.departures >= after.timestamp()) & (self.departures <= before.timestamp())
+
+        candidates= np.flatnonzero(mask)
+        if len(candidates) > limit:
+            candidates= candidates[np.argpartition(-scores[candidates], limit - 1)[:limit]]
+        candidates= candidates[np.lexsort((self.departures[candidates], -scores[candidates]))]
+        return [(int(self.pks[i]), float(scores[i])) for i in candidates]
+
+
+def build_index(circle):
+    """Return the route index of the circle's upcoming rides with free seats."""
+
+    rides= Ride.objects.filter(
+        offered_in=circle,
+        is_active=True,
+        available_seats__gte=1,
+        departure_date__gt=timezone.now()
+    ).values(
+        "pk",
+        "departure_date",
+        *[f"{end}_{field}" for end in ENDS for field in ("location", "latitude", "longitude")]
+    ).order_by()
+    return RouteIndex(list(rides))
+
+
+def get_index(circle):
+    """Return the route index of a circle, rebuilding it if its feed changed."""
+
+    version= cache_utils.get_version(feeds.get_namespace(circle.slug_name))
+    with _lock:
+        cached= _indexes.get(circle.pk)
+        if cached and cached[0] == version:
+            _indexes.move_to_end(circle.pk)
+            return cached[1]
+
+    index= build_index(circle)
+    with _lock:
+        _indexes[circle.pk]= (version, index)
+        _indexes.move_to_end(circle.pk)
+        while len(_indexes) > MAX_CIRCLES:
+            _indexes.popitem(last=False)
+    return index
+
+
+def match(circle, queryset, origin, destination, after, before, limit=10):
+    """Return the rides of a circle that best match a route.
+
+    Matches are loaded from queryset, which drops the rides that changed
+    since the index was built, and get a 'score' attribute.
+    """
+
+    matches= get_index(circle).match(origin, destination, after, before, limit)
+    rides= queryset.in_bulk([pk for pk, _ in matches])
+    result= []
+    for pk, score in matches:
+        if pk in rides:
+            rides[pk].score= score
+            result.append(rides[pk])
+    return result
@@ -0,0 +1,51 @@
+# Generated by Django 5.2.18 on 2026-10-18 06:25
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery, Sum
+from django.utils import timezone
+
+
+def backfill_ratings(apps, schema_editor):
+    """Fill in the rated user of past ratings and the rating totals of rated rides."""
+
+    Rating= apps.get_model("rides", "Rating")
+    Ride= apps.get_model("rides", "Ride")
+
+    Rating.objects.filter(rated_user__isnull=True).update(
+        rated_user=Subquery(Ride.objects.filter(pk=OuterRef("ride_id")).values("offered_by_id")[:1])
+    )
+    ratings= Rating.objects.filter(ride=OuterRef("pk")).order_by().values("ride")
+    Ride.objects.filter(pk__in=Rating.objects.values("ride")).update(
+        rating_sum=Subquery(ratings.annotate(total=Sum("rating")).values("total")),
+        rating_count=Subquery(ratings.annotate(count=Count("id")).values("count")),
+        modified=timezone.now()
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('rides', '0002_rating'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='rating',
+            name='rated_user',
+            field=models.ForeignKey(help_text='User that receives the rating.', null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='rated_user', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddField(
+            model_name='ride',
+            name='rating_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='ride',
+            name='rating_sum',
+            field=models.FloatField(default=0, help_text='Running total of the ratings, used to update the average without scanning them.'),
+        ),
+        migrations.RunPython(backfill_ratings, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,58 @@
+# Generated by Django 5.2.18 on 2026-10-18 06:27
+
+import re
+import unicodedata
+
+from django.db import migrations, models
+
+
+# A frozen copy of cride.rides.search.normalize, so later changes to it don't alter this migration.
+def normalize(text):
+    """Return lowercase ASCII words of a text, space separated."""
+
+    text = unicodedata.normalize('NFKD', text or '').encode('ascii', 'ignore').decode()
+    return ' '.join(re.findall(r'[a-z0-9]+', text.lower()))
+
+
+def fill_search_text(apps, schema_editor):
+    """Normalize the locations of existing rides."""
+
+    Ride = apps.get_model('rides', 'Ride')
+    rides = list(Ride.objects.only('departure_location', 'arrival_location'))
+    for ride in rides:
+        ride.search_text = normalize(f'{ride.departure_location} {ride.arrival_location}')
+    Ride.objects.bulk_update(rides, ['search_text'], batch_size=1000)
+
+
+def create_trigram_index(apps, schema_editor):
+    """Index the search column with trigrams on PostgreSQL."""
+
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    schema_editor.execute(
+        'CREATE INDEX IF NOT EXISTS rides_ride_search_text_trgm '
+        'ON rides_ride USING gin (search_text gin_trgm_ops)'
+    )
+
+
+def drop_trigram_index(apps, schema_editor):
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.execute('DROP INDEX IF EXISTS rides_ride_search_text_trgm')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('rides', '0003_rating_rated_user_ride_rating_count_ride_rating_sum'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='ride',
+            name='search_text',
+            field=models.CharField(blank=True, editable=False, help_text='Normalized departure and arrival locations, used by the ride search.', max_length=511),
+        ),
+        migrations.RunPython(fill_search_text, migrations.RunPython.noop),
+        migrations.RunPython(create_trigram_index, drop_trigram_index),
+    ]
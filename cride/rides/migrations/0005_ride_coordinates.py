@@ -0,0 +1,45 @@
+# Generated by Django 5.2.18 on 2026-10-18 06:31
+
+import django.core.validators
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('rides', '0004_ride_search_text'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='ride',
+            name='arrival_latitude',
+            field=models.FloatField(blank=True, null=True, validators=[django.core.validators.MinValueValidator(-90), django.core.validators.MaxValueValidator(90)]),
+        ),
+        migrations.AddField(
+            model_name='ride',
+            name='arrival_longitude',
+            field=models.FloatField(blank=True, null=True, validators=[django.core.validators.MinValueValidator(-180), django.core.validators.MaxValueValidator(180)]),
+        ),
+        migrations.AddField(
+            model_name='ride',
+            name='departure_geohash',
+            field=models.CharField(blank=True, editable=False, help_text='Geohash of the departure coordinates, used to find nearby rides.', max_length=9),
+        ),
+        migrations.AddField(
+            model_name='ride',
+            name='departure_latitude',
+            field=models.FloatField(blank=True, null=True, validators=[django.core.validators.MinValueValidator(-90), django.core.validators.MaxValueValidator(90)]),
+        ),
+        migrations.AddField(
+            model_name='ride',
+            name='departure_longitude',
+            field=models.FloatField(blank=True, null=True, validators=[django.core.validators.MinValueValidator(-180), django.core.validators.MaxValueValidator(180)]),
+        ),
+        migrations.AddIndex(
+            model_name='ride',
+            index=models.Index(fields=['offered_in', 'departure_geohash'], name='rides_ride_offered_a1e5b8_idx'),
+        ),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 5.2.18 on 2026-10-18 06:35
+
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('rides', '0005_ride_coordinates'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='ride',
+            name='arrival_date',
+            field=models.DateTimeField(default=django.utils.timezone.now),
+        ),
+        migrations.AlterField(
+            model_name='ride',
+            name='departure_date',
+            field=models.DateTimeField(default=django.utils.timezone.now),
+        ),
+        migrations.AddIndex(
+            model_name='ride',
+            index=models.Index(fields=['offered_in', 'is_active', 'departure_date'], name='rides_ride_offered_4999c0_idx'),
+        ),
+    ]
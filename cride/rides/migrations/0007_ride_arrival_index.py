@@ -0,0 +1,19 @@
+# Generated by Django 5.2.18 on 2026-10-18 06:36
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('rides', '0006_ride_departure_window'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='ride',
+            index=models.Index(fields=['is_active', 'arrival_date'], name='rides_ride_is_acti_92ea24_idx'),
+        ),
+    ]
@@ -0,0 +1,52 @@
+# Generated by Django 5.2.18 on 2026-10-18 06:37
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('circles', '0002_initial'),
+        ('rides', '0007_ride_arrival_index'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RideSchedule',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created', models.DateTimeField(auto_now_add=True, help_text='DateTime in which the object was created', verbose_name='created at')),
+                ('modified', models.DateTimeField(auto_now=True, help_text='DateTime in which the object was last modified', verbose_name='modified at')),
+                ('available_seats', models.PositiveSmallIntegerField(default=1)),
+                ('comments', models.TextField(blank=True)),
+                ('departure_location', models.CharField(max_length=255)),
+                ('departure_latitude', models.FloatField(blank=True, null=True)),
+                ('departure_longitude', models.FloatField(blank=True, null=True)),
+                ('departure_time', models.TimeField()),
+                ('arrival_location', models.CharField(max_length=255)),
+                ('arrival_latitude', models.FloatField(blank=True, null=True)),
+                ('arrival_longitude', models.FloatField(blank=True, null=True)),
+                ('arrival_time', models.TimeField(help_text='Arrivals before the departure time happen the next day.')),
+                ('weekdays', models.CharField(help_text='Days of the week the ride happens as digits, Monday being 0.', max_length=7)),
+                ('starts_on', models.DateField()),
+                ('ends_on', models.DateField(blank=True, null=True)),
+                ('materialized_until', models.DateField(blank=True, help_text='Last day whose rides have already been created.', null=True)),
+                ('is_active', models.BooleanField(default=True, help_text="Inactive schedules don't create new rides.", verbose_name='active status')),
+                ('offered_by', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL)),
+                ('offered_in', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='circles.circle')),
+            ],
+            options={
+                'ordering': ['-created', '-modified'],
+                'get_latest_by': 'created',
+                'abstract': False,
+            },
+        ),
+        migrations.AddField(
+            model_name='ride',
+            name='schedule',
+            field=models.ForeignKey(blank=True, help_text='Recurring schedule the ride was created from.', null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='rides', to='rides.rideschedule'),
+        ),
+    ]
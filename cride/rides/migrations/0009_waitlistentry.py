@@ -0,0 +1,33 @@
+# Generated by Django 5.2.18 on 2026-10-18 06:38
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('rides', '0008_rideschedule'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='WaitlistEntry',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created', models.DateTimeField(auto_now_add=True, help_text='DateTime in which the object was created', verbose_name='created at')),
+                ('modified', models.DateTimeField(auto_now=True, help_text='DateTime in which the object was last modified', verbose_name='modified at')),
+                ('ride', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='waitlist', to='rides.ride')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['id'],
+                'get_latest_by': 'created',
+                'abstract': False,
+                'indexes': [models.Index(fields=['ride', 'id'], name='rides_waitl_ride_id_f9fde5_idx')],
+                'constraints': [models.UniqueConstraint(fields=('ride', 'user'), name='unique_waitlist_entry')],
+            },
+        ),
+    ]
@@ -0,0 +1,62 @@
+# Generated by Django 5.2.18 on 2026-10-18 07:05
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('rides', '0009_waitlistentry'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        # The implicit passengers table becomes the through model's table as is.
+        migrations.SeparateDatabaseAndState(
+            state_operations=[
+                migrations.CreateModel(
+                    name='RidePassenger',
+                    fields=[
+                        ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                        ('ride', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='rides.ride')),
+                        ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL)),
+                    ],
+                    options={
+                        'ordering': ['-created', '-modified'],
+                        'get_latest_by': 'created',
+                        'abstract': False,
+                        'db_table': 'rides_ride_passengers',
+                        'unique_together': {('ride', 'user')},
+                    },
+                ),
+                migrations.AlterField(
+                    model_name='ride',
+                    name='passengers',
+                    field=models.ManyToManyField(related_name='passangers', through='rides.RidePassenger', to=settings.AUTH_USER_MODEL),
+                ),
+            ],
+        ),
+        migrations.AddField(
+            model_name='ridepassenger',
+            name='created',
+            field=models.DateTimeField(auto_now_add=True, default=django.utils.timezone.now, help_text='DateTime in which the object was created', verbose_name='created at'),
+            preserve_default=False,
+        ),
+        migrations.AddField(
+            model_name='ridepassenger',
+            name='modified',
+            field=models.DateTimeField(auto_now=True, help_text='DateTime in which the object was last modified', verbose_name='modified at'),
+        ),
+        migrations.AddField(
+            model_name='ridepassenger',
+            name='seat_number',
+            field=models.PositiveSmallIntegerField(blank=True, help_text='Seat taken by the passenger, starting at 1.', null=True),
+        ),
+        migrations.AddConstraint(
+            model_name='ridepassenger',
+            constraint=models.UniqueConstraint(fields=('ride', 'seat_number'), name='unique_ride_seat'),
+        ),
+    ]
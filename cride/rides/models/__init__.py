@@ -1,2 +1,5 @@
 from .rides import Ride
-from .ratings import Rating
\ No newline at end of file
+from .passengers import RidePassenger
+from .ratings import Rating
+from .schedules import RideSchedule
+from .waitlists import WaitlistEntry
@@ -0,0 +1,38 @@
+"""Ride passengers model."""
+
+# Django REST Framework
+from django.db import models
+
+# Local modules
+from cride.utils.models import CRideModel
+
+
+class RidePassenger(CRideModel):
+    """Ride passenger.
+
+    Through model of Ride.passengers, keeping when the user joined the
+    ride and the seat they took. It reuses the table of the former
+    implicit many to many relation, whose unique (ride, user) index
+    answers "is this user on this ride" with a single probe.
+    """
+
+    ride= models.ForeignKey("rides.Ride", on_delete=models.CASCADE)
+    user= models.ForeignKey("users.User", on_delete=models.CASCADE)
+
+    seat_number= models.PositiveSmallIntegerField(
+        null=True,
+        blank=True,
+        help_text="Seat taken by the passenger, starting at 1."
+    )
+
+    class Meta(CRideModel.Meta):
+        """Meta class."""
+
+        db_table= "rides_ride_passengers"
+        unique_together= [("ride", "user")]
+        constraints= [
+            models.UniqueConstraint(fields=["ride", "seat_number"], name="unique_ride_seat"),
+        ]
+
+    def __str__(self) -> str:
+        return f"@{self.user} on ride {self.ride_id}, seat {self.seat_number}"
@@ -31,6 +31,13 @@ class Rating(CRideModel):
         help_text="User that rates the ride.",
         related_name="rating_user"
     )
+    rated_user= models.ForeignKey(
+        "users.User",
+        on_delete=models.SET_NULL,
+        null=True,
+        help_text="User that receives the rating.",
+        related_name="rated_user"
+    )
 
     comments= models.TextField(blank=True)
     rating= models.FloatField(default=1)
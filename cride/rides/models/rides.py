@@ -2,9 +2,14 @@
 
 # Django REST Framework
 from django.db import models
+from django.core.validators import MaxValueValidator, MinValueValidator
+from django.utils import timezone
 
 # Local modules
 from cride.utils.models import CRideModel
+from cride.rides.search import build_search_text
+from cride.rides.managers import RideQuerySet
+from cride.utils import geo
 
 
 class Ride(CRideModel):
@@ -13,17 +18,66 @@ class Ride(CRideModel):
     offered_by= models.ForeignKey("users.User", on_delete=models.SET_NULL, null=True)
     offered_in= models.ForeignKey("circles.Circle", on_delete=models.SET_NULL, null=True)
 
-    passengers= models.ManyToManyField("users.User", related_name="passangers")
+    passengers= models.ManyToManyField(
+        "users.User",
+        through="rides.RidePassenger",
+        related_name="passangers"
+    )
+    schedule= models.ForeignKey(
+        "rides.RideSchedule",
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name="rides",
+        help_text="Recurring schedule the ride was created from."
+    )
 
     available_seats= models.PositiveSmallIntegerField(default=1)
     comments= models.TextField(blank=True)
 
     departure_location= models.CharField(max_length=255)
-    departure_date= models.DateTimeField(auto_now_add=True)
+    departure_latitude= models.FloatField(
+        null=True,
+        blank=True,
+        validators=[MinValueValidator(-90), MaxValueValidator(90)]
+    )
+    departure_longitude= models.FloatField(
+        null=True,
+        blank=True,
+        validators=[MinValueValidator(-180), MaxValueValidator(180)]
+    )
+    departure_geohash= models.CharField(
+        max_length=geo.MAX_PRECISION,
+        blank=True,
+        editable=False,
+        help_text="Geohash of the departure coordinates, used to find nearby rides."
+    )
+    departure_date= models.DateTimeField(default=timezone.now)
     arrival_location= models.CharField(max_length=255)
-    arrival_date= models.DateTimeField(auto_now=True)
+    arrival_latitude= models.FloatField(
+        null=True,
+        blank=True,
+        validators=[MinValueValidator(-90), MaxValueValidator(90)]
+    )
+    arrival_longitude= models.FloatField(
+        null=True,
+        blank=True,
+        validators=[MinValueValidator(-180), MaxValueValidator(180)]
+    )
+    arrival_date= models.DateTimeField(default=timezone.now)
+    search_text= models.CharField(
+        max_length=511,
+        blank=True,
+        editable=False,
+        help_text="Normalized departure and arrival locations, used by the ride search."
+    )
 
     rating= models.FloatField(null=True)
+    rating_sum= models.FloatField(
+        default=0,
+        help_text="Running total of the ratings, used to update the average without scanning them."
+    )
+    rating_count= models.PositiveIntegerField(default=0)
     
     is_active= models.BooleanField(
         "active status",
@@ -31,5 +85,42 @@ class Ride(CRideModel):
         help_text="Used for cancelling the ride or making it as finished."
     )
 
+    objects= RideQuerySet.as_manager()
+
+    class Meta(CRideModel.Meta):
+        """Meta class."""
+
+        indexes= [
+            models.Index(fields=["offered_in", "departure_geohash"]),
+# Commute window lookups filter active rides of a circle by departure range.
+            models.Index(fields=["offered_in", "is_active", "departure_date"]),
+            models.Index(fields=["is_active", "arrival_date"]),
+        ]
+
+    def save(self, *args, **kwargs):
+        """Keep the search and geohash columns in sync with the locations."""
+
+        self.update_location_fields()
+        if kwargs.get("update_fields") is not None:
+            kwargs["update_fields"]= {*kwargs["update_fields"], "search_text", "departure_geohash"}
+        return super(Ride, self).save(*args, **kwargs)
+
+    def update_location_fields(self):
+        """Compute the search and geohash columns.
+
+        Called on save, and must be called by hand on rides created with
+        bulk_create.
+        """
+
+        self.search_text= build_search_text(self.departure_location, self.arrival_location)
+        self.departure_geohash= self.get_departure_geohash()
+
+    def get_departure_geohash(self):
+        """Return the geohash of the departure coordinates, if any."""
+
+        if self.departure_latitude is None or self.departure_longitude is None:
+            return ""
+        return geo.encode(self.departure_latitude, self.departure_longitude)
+
     def __str__(self) -> str:
         return f"{self.departure_location} to {self.arrival_location} | {self.departure_date.strftime('%a %d, %b')} {self.departure_date.strftime('%I:%M %p')} - {self.arrival_date.strftime('%I:%M')}"
\ No newline at end of file
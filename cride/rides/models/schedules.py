@@ -0,0 +1,128 @@
+"""Ride schedules model."""
+
+# Django REST Framework
+from django.db import models, transaction
+from django.utils import timezone
+
+# Local modules
+from cride.utils.models import CRideModel
+from cride.circles import leaderboards
+from cride.circles.models import Circle, Membership
+from cride.rides.models.rides import Ride
+from cride.users.models import Profile
+from cride.utils import counters
+from cride.rides import events, feeds
+
+# Utilities
+from datetime import datetime, timedelta
+
+
+class RideSchedule(CRideModel):
+    """Ride schedule.
+
+    A schedule is a ride that repeats on some days of the week, like a
+    daily commute. Its rides are created ahead of time for a rolling window
+    of days, which is extended by a periodic task.
+    """
+
+    WINDOW_DAYS= 14
+
+    offered_by= models.ForeignKey("users.User", on_delete=models.CASCADE)
+    offered_in= models.ForeignKey("circles.Circle", on_delete=models.CASCADE)
+
+    available_seats= models.PositiveSmallIntegerField(default=1)
+    comments= models.TextField(blank=True)
+
+    departure_location= models.CharField(max_length=255)
+    departure_latitude= models.FloatField(null=True, blank=True)
+    departure_longitude= models.FloatField(null=True, blank=True)
+    departure_time= models.TimeField()
+    arrival_location= models.CharField(max_length=255)
+    arrival_latitude= models.FloatField(null=True, blank=True)
+    arrival_longitude= models.FloatField(null=True, blank=True)
+    arrival_time= models.TimeField(help_text="Arrivals before the departure time happen the next day.")
+
+    weekdays= models.CharField(
+        max_length=7,
+        help_text="Days of the week the ride happens as digits, Monday being 0."
+    )
+    starts_on= models.DateField()
+    ends_on= models.DateField(null=True, blank=True)
+    materialized_until= models.DateField(
+        null=True,
+        blank=True,
+        help_text="Last day whose rides have already been created."
+    )
+
+    is_active= models.BooleanField(
+        "active status",
+        default=True,
+        help_text="Inactive schedules don't create new rides."
+    )
+
+    def __str__(self) -> str:
+        return f"{self.departure_location} to {self.arrival_location} | {self.weekdays} {self.departure_time.strftime('%I:%M %p')}"
+
+    def build_rides(self, until):
+        """Return the unsaved rides of the days after materialized_until, up to until."""
+
+        now= timezone.now()
+        day= max(self.starts_on, timezone.localdate())
+        if self.materialized_until:
+            day= max(day, self.materialized_until + timedelta(days=1))
+        if self.ends_on:
+            until= min(until, self.ends_on)
+
+        rides= []
+        while day <= until:
+            if str(day.weekday()) in self.weekdays:
+                departure= timezone.make_aware(datetime.combine(day, self.departure_time))
+                arrival= timezone.make_aware(datetime.combine(day, self.arrival_time))
+                if arrival <= departure:
+                    arrival += timedelta(days=1)
+                if departure > now:
+                    ride= Ride(
+                        schedule=self,
+                        offered_by_id=self.offered_by_id,
+                        offered_in_id=self.offered_in_id,
+                        available_seats=self.available_seats,
+                        comments=self.comments,
+                        departure_location=self.departure_location,
+                        departure_latitude=self.departure_latitude,
+                        departure_longitude=self.departure_longitude,
+                        departure_date=departure,
+                        arrival_location=self.arrival_location,
+                        arrival_latitude=self.arrival_latitude,
+                        arrival_longitude=self.arrival_longitude,
+                        arrival_date=arrival
+                    )
+                    ride.update_location_fields()
+                    rides.append(ride)
+            day += timedelta(days=1)
+        return rides
+
+    def materialize(self, membership, until=None):
+        """Create the schedule's rides up to until, by default the end of its window.
+
+        Rides are inserted with a single bulk_create and the stats
+        counters are bumped once for the whole batch.
+        Returns the created rides.
+        """
+
+        until= until or timezone.localdate() + timedelta(days=self.WINDOW_DAYS)
+        if self.materialized_until and self.materialized_until >= until:
+            return []
+
+        with transaction.atomic():
+            rides= Ride.objects.bulk_create(self.build_rides(until))
+            self.materialized_until= until
+            RideSchedule.objects.filter(pk=self.pk).update(materialized_until=until)
+
+            if rides:
+                counters.increment(Circle, self.offered_in_id, "rides_offered", len(rides))
+                counters.increment(Membership, membership.pk, "rides_offered", len(rides))
+                counters.increment(Profile, membership.profile_id, "rides_offered", len(rides))
+                leaderboards.increment(membership, "rides_offered", len(rides))
+                feeds.invalidate(self.offered_in.slug_name)
+                events.publish(self.offered_in.slug_name, events.CREATED, *rides)
+        return rides
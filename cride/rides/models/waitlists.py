@@ -0,0 +1,42 @@
+"""Ride waitlists model."""
+
+# Django REST Framework
+from django.db import models
+
+# Local modules
+from cride.utils.models import CRideModel
+
+
+class WaitlistEntry(CRideModel):
+    """Ride waitlist entry.
+
+    Users wait for a seat on a full ride in first come, first served
+    order, given by the entry's primary key. The (ride, id) index makes
+    both taking the head of the queue and counting the entries ahead of
+    a user index range scans.
+    """
+
+    ride= models.ForeignKey(
+        "rides.Ride",
+        on_delete=models.CASCADE,
+        related_name="waitlist"
+    )
+    user= models.ForeignKey("users.User", on_delete=models.CASCADE)
+
+    class Meta(CRideModel.Meta):
+        """Meta class."""
+
+        ordering= ["id"]
+        constraints= [
+            models.UniqueConstraint(fields=["ride", "user"], name="unique_waitlist_entry"),
+        ]
+        indexes= [
+            models.Index(fields=["ride", "id"]),
+        ]
+
+    def __str__(self) -> str:
+        return f"@{self.user} waiting for ride {self.ride_id}"
+
+    def get_position(self):
+        """Return the entry's position in the queue, starting at 1."""
+        return WaitlistEntry.objects.filter(ride_id=self.ride_id, pk__lte=self.pk).count()
@@ -0,0 +1,107 @@
+"""Ride location search.
+
+Rides keep a normalized copy of their locations in 'search_text'. On
+PostgreSQL it is covered by a trigram GIN index, so searches are index
+lookups ranked by word similarity. Other databases, like the SQLite used
+in tests, get a pure Python fallback with the same prefix and typo
+tolerant matching.
+"""
+
+# Django REST Framework
+from django.db import connection
+from django.db.models import BooleanField, Case, F, FloatField, Func, Value, When
+from rest_framework.filters import SearchFilter
+
+# Utilities
+import re
+import unicodedata
+from difflib import SequenceMatcher
+
+
+def normalize(text):
+    """Return lowercase ASCII words of a text, space separated."""
+
+    text= unicodedata.normalize("NFKD", text or "").encode("ascii", "ignore").decode()
+    return " ".join(re.findall(r"[a-z0-9]+", text.lower()))
+
+
+def build_search_text(*locations):
+    """Return the search column value of some locations."""
+    return normalize(" ".join(locations))
+
+
+def word_score(term, text):
+    """Return how well a term matches the best word of a text, from 0 to 1.
+
+    Prefixes of a word count as full matches; otherwise the similarity
+    ratio of the word tolerates small typos.
+    """
+
+    best= 0.0
+    for word in text.split():
+        if word.startswith(term):
+            return 1.0
+        best= max(best, SequenceMatcher(None, term, word[:len(term) + 1]).ratio())
+    return best
+
+
+class WordSimilar(Func):
+    """PostgreSQL 'term <% column' trigram word similarity match."""
+
+    arg_joiner= " <%% "
+    output_field= BooleanField()
+
+
+class WordSimilarity(Func):
+    """PostgreSQL trigram word similarity of a term and a column."""
+
+    function= "WORD_SIMILARITY"
+    output_field= FloatField()
+
+
+class RideSearchFilter(SearchFilter):
+    """Ride location search filter.
+
+    Matches every search term against the ride's locations and ranks
+    results by how well they match, ahead of the view's ordering. It must
+    come after the ordering filter in the view's filter backends.
+    """
+
+    min_score= 0.6
+
+    def filter_queryset(self, request, queryset, view):
+        """Filter and rank rides by the search terms."""
+
+        terms= normalize(" ".join(self.get_search_terms(request))).split()
+        if not terms:
+            return queryset
+
+        if connection.vendor == "postgresql":
+            queryset= self.search_postgresql(queryset, terms)
+        else:
+            queryset= self.search_python(queryset, terms)
+        return queryset.order_by("-search_rank", *queryset.query.order_by)
+
+    def search_postgresql(self, queryset, terms):
+        """Use the trigram index to match and rank rides."""
+
+        rank= Value(0.0)
+        for term in terms:
+            queryset= queryset.filter(WordSimilar(Value(term), F("search_text")))
+            rank= rank + WordSimilarity(Value(term), F("search_text"))
+        return queryset.annotate(search_rank=rank)
+
+    def search_python(self, queryset, terms):
+        """Match and rank rides in Python."""
+
+        scores= {}
+        for pk, text in queryset.values_list("pk", "search_text").order_by():
+            matches= [word_score(term, text) for term in terms]
+            if min(matches) >= self.min_score:
+                scores[pk]= sum(matches)
+
+        return queryset.filter(pk__in=scores).annotate(search_rank=Case(
+            *[When(pk=pk, then=Value(score)) for pk, score in scores.items()],
+            default=Value(0.0),
+            output_field=FloatField()
+        ))
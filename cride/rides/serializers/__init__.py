@@ -1,2 +1,4 @@
-from .rides import CreateRideSerializer, JoinRideSerializer, EndRideSerializer, RideModelSerializer
-from .ratings import CreateRideRatingSerializer
\ No newline at end of file
+from .rides import CreateRideSerializer, JoinRideSerializer, LeaveRideSerializer, EndRideSerializer, RideModelSerializer, NearbyRidesSerializer, MatchRidesSerializer
+from .ratings import CreateRideRatingSerializer
+from .schedules import RideScheduleModelSerializer, CreateRideScheduleSerializer
+from .waitlists import WaitlistEntryModelSerializer, JoinWaitlistSerializer
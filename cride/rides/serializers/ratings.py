@@ -2,12 +2,26 @@
 
 # Django REST Framework
 from rest_framework import serializers
-from django.db.models import fields, Avg
+from django.db.models import fields, F, DecimalField
+from django.db.models.functions import Cast, Round
+from django.utils import timezone
 
 # Local modules
-from cride.rides.models import Rating
+from cride.circles import leaderboards, resolver
+from cride.rides.models import Rating, Ride, RidePassenger
+from cride.users.models import Profile
 
 
+def running_average(sum_field, count_field, rating):
+    """Return the average after adding a rating, rounded to one decimal.
+
+    The expression reads the stored sum and count before the update
+    applies, so it can be set in the same UPDATE that bumps them.
+    """
+
+    average= (F(sum_field) + rating) / (F(count_field) + 1)
+    return Round(Cast(average, DecimalField(max_digits=6, decimal_places=3)), 1)
+
 
 class CreateRideRatingSerializer(serializers.ModelSerializer):
     """Create ride serializer."""
@@ -27,7 +41,7 @@ class CreateRideRatingSerializer(serializers.ModelSerializer):
         user= self.context["request"].user
         ride= self.context["ride"]
 
-        if not ride.passengers.filter(pk=user.pk).exists():
+        if not RidePassenger.objects.filter(ride=ride, user=user).exists():
             raise serializers.ValidationError("User is not a passenger.")
         
         q= Rating.objects.filter(
@@ -40,33 +54,42 @@ class CreateRideRatingSerializer(serializers.ModelSerializer):
         return data
 
     def create(self, data):
-        """Create rating."""
+        """Create rating.
 
-        offered_by= self.context["ride"].offered_by
+        The ride's rating and the driver's reputation are kept as running
+        sums and counts, so each new rating updates them in place instead
+        of averaging every rating ever received.
+        """
+
+        ride= self.context["ride"]
+        offered_by= ride.offered_by
 
         Rating.objects.create(
             circle=self.context["circle"],
-            ride=self.context["ride"],
+            ride=ride,
             rating_user=self.context["request"].user,
             rated_user= offered_by,
             **data
         )
 
-        ride_avg= round(
-            Rating.objects.filter(
-                circle=self.context["circle"],
-                ride=self.context["ride"]
-            ).aggregate(Avg("rating"))["rating__avg"], 1
+        rating= data["rating"]
+        now= timezone.now()
+        Ride.objects.filter(pk=ride.pk).update(
+            rating_sum=F("rating_sum") + rating,
+            rating_count=F("rating_count") + 1,
+            rating=running_average("rating_sum", "rating_count", rating),
+            modified=now
         )
-        self.context["ride"].rating = ride_avg
-        self.context["ride"].save()
-
-        user_avg= round(
-            Rating.objects.filter(
-                rated_user=offered_by
-            ).aggregate(Avg("rating"))["rating__avg"], 1
+        Profile.objects.filter(user=offered_by).update(
+            ratings_sum=F("ratings_sum") + rating,
+            ratings_count=F("ratings_count") + 1,
+            reputation=running_average("ratings_sum", "ratings_count", rating),
+            modified=now
         )
-        offered_by.profile.reputation = user_avg
-        offered_by.profile.save()
+        reputation= Profile.objects.filter(user=offered_by).values_list("reputation", flat=True).first()
+        if reputation is not None:
+            circles= resolver.get_memberships(offered_by.pk, self.context["request"])
+            leaderboards.set_reputation(offered_by.pk, circles, reputation)
 
-        return self.context["ride"]
\ No newline at end of file
+        ride.refresh_from_db(fields=["rating", "rating_sum", "rating_count"])
+        return ride
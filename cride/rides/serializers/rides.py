@@ -2,13 +2,20 @@
 
 # Django REST Framework
 from rest_framework import serializers
-from django.db.models import fields
+from django.db import transaction
+from django.utils import timezone
+from django.db.models import fields, F
 
 # Local modules
-from cride.circles.models import Membership
+from cride.circles import leaderboards, resolver
+from cride.circles.models import Circle, Membership
 from cride.users.serializers import UserModelSerializer
-from cride.rides.models import Ride
-from cride.users.models import User
+from cride.rides.models import Ride, RidePassenger
+from cride.users.models import Profile
+from cride.utils import counters
+
+# Utilities
+from datetime import timedelta
 
 
 class RideModelSerializer(serializers.ModelSerializer):
@@ -23,11 +30,21 @@ class RideModelSerializer(serializers.ModelSerializer):
         """Meta class."""
 
         model = Ride
-        fields = '__all__'
+        exclude = ('search_text', 'departure_geohash', 'rating_sum', 'rating_count')
+# Passengers joined the ride for its route and times, so they are only validated and set on creation.
         read_only_fields = (
             'offered_by',
             'offered_in',
-            'rating'
+            'departure_location',
+            'departure_latitude',
+            'departure_longitude',
+            'departure_date',
+            'arrival_location',
+            'arrival_latitude',
+            'arrival_longitude',
+            'arrival_date',
+            'rating',
+            'schedule'
         )
 
     def update(self, instance, data):
@@ -43,12 +60,20 @@ class CreateRideSerializer(serializers.ModelSerializer):
 
     offered_by = serializers.HiddenField(default=serializers.CurrentUserDefault())
     available_seats = serializers.IntegerField(min_value=1, max_value=15)
+    departure_date = serializers.DateTimeField()
+    arrival_date = serializers.DateTimeField()
 
     class Meta:
         """Meta class."""
 
         model = Ride
-        exclude = ('offered_in', 'passengers', 'rating', 'is_active')
+        exclude = ('offered_in', 'passengers', 'rating', 'rating_sum', 'rating_count', 'is_active', 'schedule')
+
+    def validate_departure_date(self, data):
+        """Verify the ride hasn't departed yet."""
+        if data <= timezone.now():
+            raise serializers.ValidationError('Departure date must be in the future.')
+        return data
 
     def validate(self, data):
         """Validate.
@@ -58,15 +83,15 @@ class CreateRideSerializer(serializers.ModelSerializer):
         if self.context['request'].user != data['offered_by']:
             raise serializers.ValidationError('Rides offered on behalf of others are not allowed.')
 
-        user = data['offered_by']
-        circle = self.context['circle']
-        try:
-            membership = Membership.objects.get(
-                user=user,
-                circle=circle,
-                is_active=True
-            )
-        except Membership.DoesNotExist:
+        if data['arrival_date'] <= data['departure_date']:
+            raise serializers.ValidationError('Arrival date must come after the departure date.')
+
+        for point in ('departure', 'arrival'):
+            if (data.get(f'{point}_latitude') is None) != (data.get(f'{point}_longitude') is None):
+                raise serializers.ValidationError(f'Both {point} latitude and longitude must be provided.')
+
+        membership = resolver.get_membership(data['offered_by'].pk, self.context['circle'].pk, self.context.get('request'))
+        if membership is None:
             raise serializers.ValidationError('User is not an active member of the circle.')
 
         self.context['membership'] = membership
@@ -77,19 +102,11 @@ class CreateRideSerializer(serializers.ModelSerializer):
         circle = self.context['circle']
         ride = Ride.objects.create(**data, offered_in=circle)
 
-        # Circle
-        circle.rides_offered += 1
-        circle.save()
-
-        # Membership
         membership = self.context['membership']
-        membership.rides_offered += 1
-        membership.save()
-
-        # Profile
-        profile = data['offered_by'].profile
-        profile.rides_offered += 1
-        profile.save()
+        counters.increment(Circle, circle.pk, 'rides_offered')
+        counters.increment(Membership, membership.pk, 'rides_offered')
+        counters.increment(Profile, membership.profile_id, 'rides_offered')
+        leaderboards.increment(membership, 'rides_offered')
 
         return ride
 
@@ -107,22 +124,10 @@ class JoinRideSerializer(serializers.ModelSerializer):
 
     def validate_passenger(self, data):
         """Verify passenger exists and is a circle member."""
-        try:
-            user = User.objects.get(pk=data)
-        except User.DoesNotExist:
-            raise serializers.ValidationError('Invalid passenger.')
-
-        circle = self.context['circle']
-        try:
-            membership = Membership.objects.get(
-                user=user,
-                circle=circle,
-                is_active=True
-            )
-        except Membership.DoesNotExist:
+        membership = resolver.get_membership(data, self.context['circle'].pk, self.context.get('request'))
+        if membership is None:
             raise serializers.ValidationError('User is not an active member of the circle.')
 
-        self.context['user'] = user
         self.context['member'] = membership
         return data
 
@@ -133,36 +138,154 @@ class JoinRideSerializer(serializers.ModelSerializer):
         if ride.available_seats < 1:
             raise serializers.ValidationError("Ride is already full!")
 
-        if Ride.objects.filter(passengers__pk=data['passenger']):
+        if RidePassenger.objects.filter(ride=ride, user_id=data['passenger']).exists():
             raise serializers.ValidationError('Passenger is already in this trip')
 
         return data
 
     def update(self, instance, data):
-        """Add passenger to ride, and update stats."""
+        """Add passenger to ride, and update stats.
+
+        The seat is claimed with a conditional update so concurrent joins
+        can never take more seats than the ride has left. Stats go through
+        the write-behind counters so joins don't write the circle row.
+        """
         ride = self.context['ride']
-        user = self.context['user']
+        member = self.context['member']
 
-        ride.passengers.add(user)
+        with transaction.atomic():
+            claimed = Ride.objects.filter(
+                pk=ride.pk,
+                available_seats__gte=1
+            ).update(available_seats=F('available_seats') - 1)
+            if not claimed:
+                raise serializers.ValidationError("Ride is already full!")
+
+# The update above holds the ride's row lock, so joins on this ride, and users queueing for it, are serialized from here on.
+# Seats freed while users are waiting go to the head of the waitlist, not to whoever asks first.
+            if not self.context.get('promotion') and ride.waitlist.exists():
+                raise serializers.ValidationError('Ride has a waitlist, join it instead.')
+            seats = RidePassenger.objects.filter(ride=ride).values_list('user_id', 'seat_number')
+            if any(passenger == member.user_id for passenger, seat in seats):
+                raise serializers.ValidationError('Passenger is already in this trip')
+            taken = {seat for passenger, seat in seats}
+            RidePassenger.objects.create(
+                ride=ride,
+                user_id=member.user_id,
+                seat_number=next(n for n in range(1, len(taken) + 2) if n not in taken)
+            )
 
-        # Profile
-        profile = user.profile
-        profile.rides_taken += 1
-        profile.save()
+            counters.increment(Profile, member.profile_id, 'rides_taken')
+            counters.increment(Membership, member.pk, 'rides_taken')
+            leaderboards.increment(member, 'rides_taken')
+            counters.increment(Circle, self.context['circle'].pk, 'rides_taken')
 
-        # Membership
-        member = self.context['member']
-        member.rides_taken += 1
-        member.save()
+        ride.refresh_from_db(fields=['available_seats'])
+# The passengers prefetched along with the ride don't include the new one.
+        getattr(ride, '_prefetched_objects_cache', {}).pop('passengers', None)
+        return ride
 
-        # Circle
-        circle = self.context['circle']
-        circle.rides_taken += 1
-        circle.save()
 
+class LeaveRideSerializer(serializers.ModelSerializer):
+    """Leave ride serializer."""
+
+    passenger = serializers.IntegerField()
+
+    class Meta:
+        """Meta class."""
+
+        model = Ride
+        fields = ('passenger',)
+
+    def validate_passenger(self, data):
+        """Verify the user is a passenger of the ride."""
+        ride = self.context['ride']
+        if not RidePassenger.objects.filter(ride=ride, user_id=data).exists():
+            raise serializers.ValidationError('User is not a passenger of this trip.')
+        return data
+
+    def validate(self, data):
+        """Allow leaving only before departure."""
+        if self.context['ride'].departure_date <= timezone.now():
+            raise serializers.ValidationError('Ongoing rides cannot be left.')
+        return data
+
+    def update(self, instance, data):
+        """Remove passenger from ride, release the seat and update stats."""
+        ride = self.context['ride']
+
+        with transaction.atomic():
+            removed = RidePassenger.objects.filter(ride=ride, user_id=data['passenger']).delete()[0]
+            if not removed:
+                raise serializers.ValidationError('User is not a passenger of this trip.')
+            Ride.objects.filter(pk=ride.pk).update(available_seats=F('available_seats') + 1)
+
+            member = resolver.get_membership(data['passenger'], self.context['circle'].pk, self.context.get('request'))
+            if member:
+                counters.increment(Profile, member.profile_id, 'rides_taken', -1)
+                counters.increment(Membership, member.pk, 'rides_taken', -1)
+                leaderboards.increment(member, 'rides_taken', -1)
+            counters.increment(Circle, self.context['circle'].pk, 'rides_taken', -1)
+
+        ride.refresh_from_db(fields=['available_seats'])
+# The passengers prefetched along with the ride still include the one who left.
+        getattr(ride, '_prefetched_objects_cache', {}).pop('passengers', None)
         return ride
 
 
+class NearbyRidesSerializer(serializers.Serializer):
+    """Nearby rides query serializer.
+
+    Validates the point, radius in kilometers and time window in minutes
+    of a nearby rides search.
+    """
+
+    latitude = serializers.FloatField(min_value=-90, max_value=90)
+    longitude = serializers.FloatField(min_value=-180, max_value=180)
+    radius = serializers.FloatField(min_value=0.1, max_value=50, default=2)
+    within = serializers.IntegerField(min_value=1, max_value=24 * 60, default=60)
+    limit = serializers.IntegerField(min_value=1, max_value=50, default=20)
+
+
+class MatchRidesSerializer(serializers.Serializer):
+    """Ride match query serializer.
+
+    Each end of the route needs a location, coordinates, or both. The
+    departure window defaults to the next 24 hours.
+    """
+
+    origin = serializers.CharField(max_length=255, required=False, default='')
+    origin_latitude = serializers.FloatField(min_value=-90, max_value=90, required=False)
+    origin_longitude = serializers.FloatField(min_value=-180, max_value=180, required=False)
+    destination = serializers.CharField(max_length=255, required=False, default='')
+    destination_latitude = serializers.FloatField(min_value=-90, max_value=90, required=False)
+    destination_longitude = serializers.FloatField(min_value=-180, max_value=180, required=False)
+    departure_after = serializers.DateTimeField(required=False)
+    departure_before = serializers.DateTimeField(required=False)
+    limit = serializers.IntegerField(min_value=1, max_value=50, default=10)
+
+    def validate(self, data):
+        """Verify both ends of the route are given and build the departure window."""
+        for end in ('origin', 'destination'):
+            coordinates = (data.get(f'{end}_latitude'), data.get(f'{end}_longitude'))
+            if (coordinates[0] is None) != (coordinates[1] is None):
+                raise serializers.ValidationError(f'Both {end} latitude and longitude must be provided.')
+            if not data[end].strip() and coordinates[0] is None:
+                raise serializers.ValidationError(f'The {end} location or coordinates are required.')
+            data[end] = {
+                'location': data[end],
+                'latitude': coordinates[0],
+                'longitude': coordinates[1]
+            }
+
+        now = timezone.now()
+        data['departure_after'] = max(data.get('departure_after', now), now)
+        data['departure_before'] = data.get('departure_before', now + timedelta(days=1))
+        if data['departure_before'] <= data['departure_after']:
+            raise serializers.ValidationError('The departure window must end after it starts.')
+        return data
+
+
 class EndRideSerializer(serializers.ModelSerializer):
     """Ride end serializer."""
 
@@ -0,0 +1,72 @@
+"""Ride schedules serializers."""
+
+# Django REST Framework
+from rest_framework import serializers
+from django.utils import timezone
+
+# Local modules
+from cride.circles import resolver
+from cride.rides.models import RideSchedule
+
+
+class RideScheduleModelSerializer(serializers.ModelSerializer):
+    """Ride schedule model serializer."""
+
+    offered_by = serializers.StringRelatedField()
+    offered_in = serializers.StringRelatedField()
+    weekdays = serializers.SerializerMethodField()
+
+    class Meta:
+        """Meta class."""
+
+        model = RideSchedule
+        fields = '__all__'
+
+    def get_weekdays(self, obj):
+        """Return the weekdays as a list of numbers."""
+        return [int(day) for day in obj.weekdays]
+
+
+class CreateRideScheduleSerializer(serializers.ModelSerializer):
+    """Create ride schedule serializer.
+
+    Creates the schedule and the rides of its first window.
+    """
+
+    offered_by = serializers.HiddenField(default=serializers.CurrentUserDefault())
+    available_seats = serializers.IntegerField(min_value=1, max_value=15)
+    weekdays = serializers.ListField(
+        child=serializers.IntegerField(min_value=0, max_value=6),
+        min_length=1,
+        max_length=7
+    )
+
+    class Meta:
+        """Meta class."""
+
+        model = RideSchedule
+        exclude = ('offered_in', 'materialized_until', 'is_active')
+
+    def validate_weekdays(self, data):
+        """Store the weekdays as sorted digits."""
+        return ''.join(str(day) for day in sorted(set(data)))
+
+    def validate(self, data):
+        """Verify the schedule's dates and that the driver is a circle member."""
+        if data['starts_on'] < timezone.localdate():
+            raise serializers.ValidationError('Schedules cannot start in the past.')
+        if data.get('ends_on') and data['ends_on'] < data['starts_on']:
+            raise serializers.ValidationError('Schedules cannot end before they start.')
+
+        membership = resolver.get_membership(data['offered_by'].pk, self.context['circle'].pk, self.context.get('request'))
+        if membership is None:
+            raise serializers.ValidationError('User is not an active member of the circle.')
+
+        self.context['membership'] = membership
+        return data
+
+    def create(self, data):
+        """Create the schedule and its first rides."""
+        schedule = RideSchedule.objects.create(**data, offered_in=self.context['circle'])
+        schedule.materialize(self.context['membership'])
+        return schedule
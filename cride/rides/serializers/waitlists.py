@@ -0,0 +1,62 @@
+"""Ride waitlists serializers."""
+
+# Django REST Framework
+from django.db import transaction
+from rest_framework import serializers
+
+# Local modules
+from cride.circles import resolver
+from cride.rides.models import Ride, RidePassenger, WaitlistEntry
+
+
+class WaitlistEntryModelSerializer(serializers.ModelSerializer):
+    """Waitlist entry model serializer."""
+
+    position = serializers.SerializerMethodField()
+    size = serializers.SerializerMethodField()
+
+    class Meta:
+        """Meta class."""
+
+        model = WaitlistEntry
+        fields = ('ride', 'position', 'size', 'created')
+        read_only_fields = fields
+
+    def get_position(self, obj):
+        """Return how many users are ahead in the queue, plus one."""
+        return obj.get_position()
+
+    def get_size(self, obj):
+        """Return how many users are waiting for the ride."""
+        return obj.ride.waitlist.count()
+
+
+class JoinWaitlistSerializer(serializers.Serializer):
+    """Join ride waitlist serializer.
+
+    Only full rides, or rides that still have users waiting for a freed
+    seat, can be waited for. The ride's seats are checked under its row
+    lock, the same one joins take to claim a seat, so a user can't queue
+    for a seat that a concurrent join or leave just freed.
+    """
+
+    def validate(self, data):
+        """Verify the user is a member of the circle."""
+        user = self.context['request'].user
+        if resolver.get_membership(user.pk, self.context['circle'].pk, self.context['request']) is None:
+            raise serializers.ValidationError('User is not an active member of the circle.')
+        return data
+
+    def create(self, data):
+        """Add the user to the end of the queue, keeping their place if already in it."""
+        user = self.context['request'].user
+
+        with transaction.atomic():
+            ride = Ride.objects.select_for_update().only('available_seats').get(pk=self.context['ride'].pk)
+            if RidePassenger.objects.filter(ride=ride, user=user).exists():
+                raise serializers.ValidationError('Passenger is already in this trip')
+            if ride.available_seats >= 1 and not ride.waitlist.exists():
+                raise serializers.ValidationError('Ride has available seats, join it instead.')
+
+            entry, created = WaitlistEntry.objects.get_or_create(ride=ride, user=user)
+        return entry
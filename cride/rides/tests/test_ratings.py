@@ -0,0 +1,118 @@
+"""Ratings tests."""
+
+# Django REST Framework
+from django.core.cache import cache
+from django.core.management import call_command
+from rest_framework.test import APITestCase
+from rest_framework.authtoken.models import Token
+
+# Local modules
+from cride.circles.models import Circle, Membership
+from cride.rides.models import Rating, Ride
+from cride.users.models import User, Profile
+
+# Utilities
+from io import StringIO
+
+
+class RideRatingAPITestCase(APITestCase):
+    """Ride rating API test case."""
+
+    def setUp(self):
+        """Test case set up."""
+
+        self.circle= Circle.objects.create(
+            name="Gaviotas",
+            slug_name="gaviota",
+            about="Circulo el barrio Gaviotas",
+            is_verified=True
+        )
+        self.driver= self.create_member("driver")
+        self.ride= self.create_ride()
+        cache.clear()
+
+    def create_member(self, username):
+        """Create a user with its profile and circle membership."""
+
+        user= User.objects.create(
+            first_name=username,
+            last_name="Betancur",
+            email=f"{username}@test.com",
+            username=username,
+            password="admin12345"
+        )
+        Membership.objects.create(
+            user=user, profile=Profile.objects.create(user=user), circle=self.circle
+        )
+        return user
+
+    def create_ride(self):
+        """Create a ride offered by the driver."""
+
+        return Ride.objects.create(
+            offered_by=self.driver,
+            offered_in=self.circle,
+            available_seats=5,
+            departure_location="Gaviotas",
+            arrival_location="Centro"
+        )
+
+    def rate(self, ride, username, rating):
+        """Rate the ride as a new passenger."""
+
+        passenger= self.create_member(username)
+        ride.passengers.add(passenger)
+        token= Token.objects.create(user=passenger).key
+        self.client.credentials(HTTP_AUTHORIZATION=f"Token {token}")
+        return self.client.post(
+            f"/circles/{self.circle.slug_name}/rides/{ride.pk}/rate/",
+            {"rating": rating}
+        )
+
+    def test_rating_updates_running_averages(self):
+        """Ride rating and driver reputation should follow each new rating."""
+
+        self.assertEqual(self.rate(self.ride, "ana", 5).status_code, 201)
+        response= self.rate(self.ride, "beto", 4)
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data["rating"], 4.5)
+        self.assertNotIn("rating_sum", response.data)
+
+        self.rate(self.create_ride(), "carla", 2)
+
+        profile= Profile.objects.get(user=self.driver)
+        self.assertEqual(profile.ratings_count, 3)
+        self.assertEqual(profile.reputation, 3.7)
+
+    def test_ratings_change_validators(self):
+        """Copies showing the driver's reputation should not be confirmed once it changes."""
+
+        self.rate(self.ride, "ana", 5)
+        urls= (f"/users/{self.driver.username}/", f"/circles/{self.circle.slug_name}/rides/")
+        etags= [self.client.get(url)["ETag"] for url in urls]
+
+# Rating a ride of another circle leaves this circle's feed alone.
+        self.circle= Circle.objects.create(name="Centro", slug_name="centro")
+        Membership.objects.create(user=self.driver, profile=self.driver.profile, circle=self.circle)
+        self.assertEqual(self.rate(self.create_ride(), "beto", 1).status_code, 201)
+
+        self.client.credentials(HTTP_AUTHORIZATION=f"Token {Token.objects.get(user__username='ana').key}")
+        for url, etag in zip(urls, etags):
+            response= self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+            self.assertEqual(response.status_code, 200)
+            self.assertNotEqual(response["ETag"], etag)
+
+    def test_rebuild_matches_running_averages(self):
+        """Rebuilding the aggregates should reproduce the running values."""
+
+        self.rate(self.ride, "ana", 5)
+        self.rate(self.ride, "beto", 2)
+        expected= Profile.objects.get(user=self.driver).reputation
+
+        Ride.objects.update(rating=None, rating_sum=0, rating_count=0)
+        call_command("rebuild_ratings", stdout=StringIO())
+
+        self.ride.refresh_from_db()
+        self.assertEqual(self.ride.rating, 3.5)
+        self.assertEqual(self.ride.rating_count, Rating.objects.count())
+        self.assertEqual(Profile.objects.get(user=self.driver).reputation, expected)
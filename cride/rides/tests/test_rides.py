@@ -0,0 +1,781 @@
+"""Rides tests."""
+
+# Utilities
+import asyncio
+import json
+import threading
+from asgiref.sync import sync_to_async
+from datetime import timedelta
+from unittest import mock
+
+# Django REST Framework
+from django.core.cache import cache
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import connection, DatabaseError
+from django.utils import timezone
+from django.test import TestCase, TransactionTestCase, skipUnlessDBFeature
+from django.test.utils import CaptureQueriesContext
+from rest_framework.exceptions import ValidationError
+from rest_framework.test import APIRequestFactory, APITestCase
+from rest_framework.authtoken.models import Token
+from redis.exceptions import RedisError
+
+# Local modules
+from cride.circles.models import Circle, Membership
+from cride.rides import events
+from cride.rides.models import Ride, RidePassenger, RideSchedule
+from cride.rides.serializers import JoinRideSerializer, JoinWaitlistSerializer
+from cride.taskapp.tasks import finish_departed_rides, extend_ride_schedules, promote_waitlist
+from cride.users.models import User, Profile
+from cride.utils import counters
+from cride.utils.events import get_broker
+
+
+class RideListAPITestCase(APITestCase):
+    """Ride list API test case."""
+
+    def setUp(self):
+        """Test case set up."""
+
+        self.user= self.create_user("velo")
+        self.circle= Circle.objects.create(
+            name="Gaviotas",
+            slug_name="gaviota",
+            about="Circulo el barrio Gaviotas",
+            is_verified=True
+        )
+        Membership.objects.create(
+            user=self.user, profile=self.user.profile,
+            circle=self.circle, remaining_invitations=10
+        )
+        self.token= Token.objects.create(user=self.user).key
+        self.client.credentials(HTTP_AUTHORIZATION=f"Token {self.token}")
+        self.url= f"/circles/{self.circle.slug_name}/rides/"
+        cache.clear()
+
+    def create_user(self, username):
+        """Create a user along with its profile."""
+
+        user= User.objects.create(
+            first_name=username,
+            last_name="Betancur",
+            email=f"{username}@test.com",
+            username=username,
+            password="admin12345"
+        )
+        Profile.objects.create(user=user)
+        return user
+
+    def create_rides(self, count, passengers):
+        """Create rides offered in the circle, each with some passengers."""
+
+        for i in range(count):
+            owner= self.create_user(f"owner{Ride.objects.count()}")
+            ride= Ride.objects.create(
+                offered_by=owner,
+                offered_in=self.circle,
+                available_seats=passengers + 1,
+                departure_location="Gaviotas",
+                arrival_location="Centro"
+            )
+            ride.passengers.add(*[
+                self.create_user(f"passenger{ride.pk}x{j}") for j in range(passengers)
+            ])
+
+    def count_list_queries(self):
+        """Return the number of queries a ride list request costs."""
+
+        cache.clear()
+        with CaptureQueriesContext(connection) as context:
+            response= self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        return len(context.captured_queries)
+
+    def test_list_queries_are_constant(self):
+        """Listing rides should not issue queries per ride or passenger."""
+
+        self.create_rides(count=1, passengers=1)
+        baseline= self.count_list_queries()
+
+        self.create_rides(count=5, passengers=3)
+        self.assertEqual(self.count_list_queries(), baseline)
+
+    def test_pending_counters_are_read_at_once(self):
+        """The buffered counters of every profile on a page should be read in one lookup."""
+
+        self.create_rides(count=3, passengers=2)
+        lookups= []
+
+        class Buffer:
+            def get_many(self, keys):
+                lookups.append(keys)
+                return {key: 1 for key in keys}
+
+        cache.clear()
+        with mock.patch.object(counters, "_buffer", Buffer()):
+            response= self.client.get(self.url)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(lookups), 1)
+# Three rides with an owner and two passengers each, two counters per profile.
+        self.assertEqual(len(lookups[0]), 3 * 3 * 2)
+        self.assertEqual(response.data["results"][0]["offered_by"]["profile"]["rides_taken"], 1)
+
+    def test_counters_are_written_through_when_redis_is_down(self):
+        """Increments that can't be buffered after commit should not be lost."""
+
+        class Buffer:
+            def add(self, key, amount):
+                raise RedisError("Connection refused")
+
+        with self.assertLogs("cride.utils.counters", "ERROR"), mock.patch.object(counters, "_buffer", Buffer()):
+            with self.captureOnCommitCallbacks(execute=True):
+                counters.increment(Circle, self.circle.pk, "rides_taken")
+
+        self.circle.refresh_from_db()
+        self.assertEqual(self.circle.rides_taken, 1)
+
+    def test_feed_cache_is_invalidated_by_new_rides(self):
+        """Cached pages should be served until a ride is created."""
+
+        self.create_rides(count=1, passengers=0)
+        self.assertEqual(self.client.get(self.url)["X-Cache"], "MISS")
+        with CaptureQueriesContext(connection) as context:
+            response= self.client.get(self.url)
+        self.assertEqual(response["X-Cache"], "HIT")
+# Only the validators of the nested profiles are looked up.
+        self.assertFalse([
+            query for query in context.captured_queries
+            if "rides_ride" in query["sql"] and "MAX(" not in query["sql"]
+        ])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            response= self.client.post(self.url, {
+                "available_seats": 3,
+                "departure_location": "Gaviotas",
+                "departure_date": timezone.now() + timedelta(hours=1),
+                "arrival_location": "Centro",
+                "arrival_date": timezone.now() + timedelta(hours=2)
+            })
+        self.assertEqual(response.status_code, 201)
+
+        response= self.client.get(self.url)
+        self.assertEqual(response["X-Cache"], "MISS")
+        self.assertEqual(len(response.data["results"]), 2)
+
+    def test_keyset_pages_are_stable(self):
+        """Cursor pages should cover every ride once, even with new rides coming in."""
+
+        self.create_rides(count=9, passengers=0)
+        expected= set(Ride.objects.values_list("pk", flat=True))
+
+        seen= []
+        url= f"{self.url}?cursor=&limit=4"
+        while url:
+            with CaptureQueriesContext(connection) as context:
+                response= self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            self.assertNotIn("count", response.data)
+            self.assertFalse(any("COUNT(" in q["sql"] for q in context.captured_queries))
+
+            seen += [ride["id"] for ride in response.data["results"]]
+            self.create_rides(count=1, passengers=0)
+            url= response.data["next"]
+
+        self.assertEqual(len(seen), len(set(seen)))
+        self.assertTrue(expected.issubset(seen))
+
+    def test_keyset_pages_reject_mutable_orderings(self):
+        """Cursor pages should not follow seat counts, which change as riders join."""
+
+        self.create_rides(count=3, passengers=0)
+
+        response= self.client.get(f"{self.url}?cursor=&limit=2&ordering=-available_seats")
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("ordering", response.data)
+        response= self.client.get(f"{self.url}?limit=2&ordering=-available_seats")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["count"], 3)
+
+    def test_keyset_previous_page(self):
+        """Following the previous link should return the page before."""
+
+        self.create_rides(count=5, passengers=0)
+        first= self.client.get(f"{self.url}?cursor=&limit=2").data
+        second= self.client.get(first["next"]).data
+        back= self.client.get(second["previous"]).data
+        self.assertEqual(back["results"], first["results"])
+
+    def test_search_matches_prefixes_and_typos(self):
+        """Search should match word prefixes and small typos, best matches first."""
+
+        for departure, arrival in [
+            ("Gaviotas", "Ciudad Universitaria"),
+            ("Coyoacán", "Centro Histórico"),
+            ("Polanco", "Santa Fe"),
+        ]:
+            Ride.objects.create(
+                offered_by=self.user,
+                offered_in=self.circle,
+                departure_location=departure,
+                arrival_location=arrival
+            )
+
+        def search(term):
+            response= self.client.get(self.url, {"search": term})
+            self.assertFalse(any("search_text" in ride for ride in response.data["results"]))
+            return [ride["departure_location"] for ride in response.data["results"]]
+
+        self.assertEqual(search("coyo"), ["Coyoacán"])
+        self.assertEqual(search("univrsitaria"), ["Gaviotas"])
+        self.assertEqual(search("historico centro"), ["Coyoacán"])
+        self.assertEqual(search("tijuana"), [])
+
+    def test_nearby_rides(self):
+        """Nearby should list rides within the radius, closest first."""
+
+        for location, latitude, longitude in [
+            ("Zocalo", 19.4326, -99.1332),
+            ("Bellas Artes", 19.4352, -99.1412),
+            ("Ciudad Universitaria", 19.3324, -99.1870),
+        ]:
+            Ride.objects.create(
+                offered_by=self.user,
+                offered_in=self.circle,
+                departure_location=location,
+                departure_latitude=latitude,
+                departure_longitude=longitude,
+                departure_date=timezone.now() + timedelta(minutes=30),
+                arrival_location="Santa Fe"
+            )
+
+        response= self.client.get(
+            f"{self.url}nearby/",
+            {"latitude": 19.4340, "longitude": -99.1390, "radius": 2}
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            [ride["departure_location"] for ride in response.data],
+            ["Bellas Artes", "Zocalo"]
+        )
+        self.assertLess(response.data[0]["distance"], response.data[1]["distance"])
+        self.assertNotIn("departure_geohash", response.data[0])
+
+    def test_match_ranks_similar_routes(self):
+        """Match should rank rides by route similarity, ignoring other routes."""
+
+        for departure, latitude, longitude, arrival in [
+            ("Calle 10 Gaviotas", 6.2500, -75.5700, "Centro"),
+            ("Gaviotas", None, None, "Universidad de Antioquia"),
+            ("Parque Gaviotas", 6.3000, -75.5000, "Aeropuerto"),
+            ("Belen", 6.2300, -75.6000, "Aeropuerto"),
+        ]:
+            Ride.objects.create(
+                offered_by=self.user,
+                offered_in=self.circle,
+                departure_location=departure,
+                departure_latitude=latitude,
+                departure_longitude=longitude,
+                departure_date=timezone.now() + timedelta(hours=1),
+                arrival_location=arrival
+            )
+
+        params= {"origin": "gaviotas", "origin_latitude": 6.2505, "origin_longitude": -75.5705, "destination": "centr"}
+        response= self.client.get(f"{self.url}match/", params)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            [ride["departure_location"] for ride in response.data],
+            ["Calle 10 Gaviotas", "Gaviotas"]
+        )
+        self.assertGreater(response.data[0]["score"], response.data[1]["score"])
+
+        response= self.client.get(f"{self.url}match/", {"origin": "gaviotas"})
+        self.assertEqual(response.status_code, 400)
+
+    def test_departure_window(self):
+        """Rides should be filtered by their departure time."""
+
+        tomorrow= timezone.now().replace(hour=0, minute=0, second=0, microsecond=0) + timedelta(days=1)
+        for hour in (6, 7, 8, 10):
+            Ride.objects.create(
+                offered_by=self.user,
+                offered_in=self.circle,
+                departure_location=f"{hour}:00",
+                departure_date=tomorrow + timedelta(hours=hour),
+                arrival_location="Centro",
+                arrival_date=tomorrow + timedelta(hours=hour + 1)
+            )
+
+        response= self.client.get(self.url, {
+            "departure_after": (tomorrow + timedelta(hours=7)).isoformat(),
+            "departure_before": (tomorrow + timedelta(hours=9)).isoformat()
+        })
+        self.assertEqual(
+            [ride["departure_location"] for ride in response.data["results"]],
+            ["7:00", "8:00"]
+        )
+
+    def test_ride_times_are_fixed_once_offered(self):
+        """Owners should not move a ride's route or times, which were only validated on creation."""
+
+        departure= timezone.now() + timedelta(hours=1)
+        ride= Ride.objects.create(
+            offered_by=self.user,
+            offered_in=self.circle,
+            departure_location="Gaviotas",
+            departure_date=departure,
+            arrival_location="Centro",
+            arrival_date=departure + timedelta(hours=1)
+        )
+
+        response= self.client.patch(f"{self.url}{ride.pk}/", {
+            "departure_date": (departure - timedelta(days=1)).isoformat(),
+            "arrival_date": (departure - timedelta(days=2)).isoformat(),
+            "arrival_location": "Polanco",
+            "comments": "Salgo puntual"
+        }, HTTP_ACCEPT="application/json")
+        self.assertEqual(response.status_code, 200)
+        ride.refresh_from_db()
+        self.assertEqual(ride.arrival_location, "Centro")
+        self.assertEqual(ride.departure_date, departure)
+        self.assertEqual(ride.arrival_date, departure + timedelta(hours=1))
+        self.assertEqual(ride.comments, "Salgo puntual")
+
+    def test_invalid_cursor(self):
+        """Forged cursors should be rejected."""
+
+        response= self.client.get(f"{self.url}?cursor=forged")
+        self.assertEqual(response.status_code, 404)
+
+    def test_conditional_list(self):
+        """Current copies should be confirmed without a body until a ride changes."""
+
+        self.create_rides(2, 1)
+        response= self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        etag= response["ETag"]
+
+        with CaptureQueriesContext(connection) as context:
+            response= self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.content, b"")
+        self.assertFalse([
+            query for query in context.captured_queries
+            if "rides_ride" in query["sql"] and "MAX(" not in query["sql"]
+        ])
+
+        ride= Ride.objects.first()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(f"{self.url}{ride.pk}/join/")
+        response= self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response["ETag"], etag)
+
+    def test_join_checks_only_the_joined_ride(self):
+        """Passengers of other rides can join, once, taking the lowest free seat."""
+
+        self.create_rides(2, 1)
+        for ride in Ride.objects.all():
+            response= self.client.post(f"{self.url}{ride.pk}/join/")
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(response.data["available_seats"], 1)
+            self.assertIn("velo", [passenger["username"] for passenger in response.data["passengers"]])
+            self.assertEqual(RidePassenger.objects.get(ride=ride, user=self.user).seat_number, 1)
+
+        Ride.objects.update(available_seats=1)
+        response= self.client.post(f"{self.url}{ride.pk}/join/")
+        self.assertEqual(response.status_code, 400)
+
+    def test_join_losing_the_race_for_the_last_seat(self):
+        """A join validated against a seat someone else claimed meanwhile should fail without side effects."""
+
+        self.create_rides(1, 0)
+        ride= Ride.objects.get()
+        request= APIRequestFactory().post(f"{self.url}{ride.pk}/join/")
+        request.user= self.user
+        serializer= JoinRideSerializer(
+            ride,
+            data={"passenger": self.user.pk},
+            context={"ride": ride, "circle": self.circle, "request": request}
+        )
+        self.assertTrue(serializer.is_valid())
+
+# Another rider takes the last seat between validation and the seat claim.
+        Ride.objects.filter(pk=ride.pk).update(available_seats=0)
+        with self.assertRaisesMessage(ValidationError, "Ride is already full!"):
+            serializer.save()
+        self.assertFalse(RidePassenger.objects.filter(ride=ride).exists())
+        self.assertEqual(Ride.objects.get(pk=ride.pk).available_seats, 0)
+        self.assertEqual(Membership.objects.get(user=self.user).rides_taken, 0)
+
+    def test_membership_checks(self):
+        """Only active members get in, checked without queries once their memberships are cached."""
+
+        self.create_rides(1, 0)
+        ride= Ride.objects.get()
+        urls= (self.url, f"{self.url}{ride.pk}/", f"/circles/{self.circle.slug_name}/members/")
+        for url in urls:
+            self.assertEqual(self.client.get(url).status_code, 200)
+
+        for url in urls:
+            with CaptureQueriesContext(connection) as context:
+                self.assertEqual(self.client.get(url).status_code, 200)
+            lookup= f'"circles_membership"."user_id" = {self.user.pk}'
+            self.assertFalse([query for query in context if lookup in query["sql"]])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            membership= Membership.objects.get(user=self.user)
+            membership.is_active= False
+            membership.save()
+        for url in urls:
+            self.assertEqual(self.client.get(url).status_code, 403)
+
+        stranger= self.create_user("stranger")
+        self.client.force_authenticate(stranger)
+        self.assertEqual(self.client.get(self.url).status_code, 403)
+
+
+class FinishDepartedRidesTestCase(TestCase):
+    """Departed rides task test case."""
+
+    def test_finishes_only_arrived_rides(self):
+        """Rides whose arrival date passed should be finished in batches."""
+
+        circle= Circle.objects.create(name="Gaviotas", slug_name="gaviota")
+        now= timezone.now()
+        for hours in (-3, -2, -1, 1):
+            Ride.objects.create(
+                offered_in=circle,
+                departure_location="Gaviotas",
+                departure_date=now + timedelta(hours=hours - 1),
+                arrival_location="Centro",
+                arrival_date=now + timedelta(hours=hours)
+            )
+
+        stats= finish_departed_rides(batch_size=2)
+
+        self.assertEqual(stats["finished"], 3)
+        self.assertEqual(Ride.objects.filter(is_active=True).count(), 1)
+        self.assertEqual(finish_departed_rides()["finished"], 0)
+
+
+# SQLite locks whole tables, so concurrent joins fail with lock errors instead of racing for seats.
+@skipUnlessDBFeature("has_select_for_update")
+class JoinRideConcurrencyTestCase(TransactionTestCase):
+    """Concurrent join test case."""
+
+    SEATS= 3
+    PASSENGERS= 12
+
+    def setUp(self):
+        """Test case set up."""
+
+        self.circle= Circle.objects.create(
+            name="Gaviotas",
+            slug_name="gaviota",
+            about="Circulo el barrio Gaviotas",
+            is_verified=True
+        )
+        owner= self.create_member("owner")
+        self.ride= Ride.objects.create(
+            offered_by=owner,
+            offered_in=self.circle,
+            available_seats=self.SEATS,
+            departure_location="Gaviotas",
+            arrival_location="Centro"
+        )
+        self.passengers= [self.create_member(f"passenger{i}") for i in range(self.PASSENGERS)]
+
+    def create_member(self, username):
+        """Create a user with its profile and circle membership."""
+
+        user= User.objects.create(
+            first_name=username,
+            last_name="Betancur",
+            email=f"{username}@test.com",
+            username=username,
+            password="admin12345"
+        )
+        Membership.objects.create(
+            user=user, profile=Profile.objects.create(user=user), circle=self.circle
+        )
+        return user
+
+    def join(self, user, barrier, results):
+        """Try to join the ride as the given user and record the outcome."""
+
+        try:
+            ride= Ride.objects.get(pk=self.ride.pk)
+            serializer= JoinRideSerializer(
+                ride,
+                data={"passenger": user.pk},
+                context={"ride": ride, "circle": self.circle},
+                partial=True
+            )
+            barrier.wait()
+            serializer.is_valid(raise_exception=True)
+            serializer.save()
+            results.append("joined")
+        except ValidationError as error:
+            results.append(" ".join(str(detail) for detail in error.detail))
+        except DatabaseError as error:
+            results.append(str(error))
+        finally:
+            connection.close()
+
+    def test_concurrent_joins_never_overbook(self):
+        """Simultaneous joins should never take more seats than offered."""
+
+        barrier= threading.Barrier(self.PASSENGERS)
+        results= []
+        threads= [
+            threading.Thread(target=self.join, args=(user, barrier, results))
+            for user in self.passengers
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        counters.flush()
+        self.ride.refresh_from_db()
+        self.circle.refresh_from_db()
+        passengers= self.ride.passengers.count()
+
+        self.assertEqual(results.count("joined"), self.SEATS)
+        self.assertEqual(
+            [result for result in results if result != "joined"],
+            ["Ride is already full!"] * (self.PASSENGERS - self.SEATS)
+        )
+        self.assertEqual(passengers, self.SEATS)
+        self.assertEqual(self.ride.available_seats, 0)
+        self.assertEqual(self.circle.rides_taken, passengers)
+
+
+class RideScheduleAPITestCase(APITestCase):
+    """Ride schedule API test case."""
+
+    def setUp(self):
+        """Test case set up."""
+
+        self.user= User.objects.create(
+            first_name="velo",
+            last_name="Betancur",
+            email="velo@test.com",
+            username="velo",
+            password="admin12345"
+        )
+        self.circle= Circle.objects.create(name="Gaviotas", slug_name="gaviota")
+        Membership.objects.create(
+            user=self.user, profile=Profile.objects.create(user=self.user), circle=self.circle
+        )
+        token= Token.objects.create(user=self.user).key
+        self.client.credentials(HTTP_AUTHORIZATION=f"Token {token}")
+        self.url= f"/circles/{self.circle.slug_name}/rides/schedules/"
+
+    def test_schedule_creates_window_in_bulk(self):
+        """A weekday schedule should create its rides with a handful of queries."""
+
+        tomorrow= timezone.localdate() + timedelta(days=1)
+        with CaptureQueriesContext(connection) as context:
+            response= self.client.post(self.url, {
+                "available_seats": 3,
+                "departure_location": "Gaviotas",
+                "departure_time": "07:30",
+                "arrival_location": "Centro",
+                "arrival_time": "08:15",
+                "weekdays": [0, 1, 2, 3, 4],
+                "starts_on": tomorrow.isoformat()
+            })
+        self.assertEqual(response.status_code, 201)
+        self.assertLess(len(context.captured_queries), 15)
+
+        rides= Ride.objects.filter(schedule_id=response.data["id"])
+        last_day= timezone.localdate() + timedelta(days=RideSchedule.WINDOW_DAYS)
+        weekdays= sum(
+            1 for i in range((last_day - tomorrow).days + 1)
+            if (tomorrow + timedelta(days=i)).weekday() < 5
+        )
+        self.assertEqual(rides.count(), weekdays)
+        self.assertTrue(all(ride.departure_date.weekday() < 5 for ride in rides))
+        self.assertEqual(extend_ride_schedules(), 0)
+
+
+class RideWaitlistAPITestCase(APITestCase):
+    """Ride waitlist API test case."""
+
+    def setUp(self):
+        """Test case set up."""
+
+        self.circle= Circle.objects.create(name="Gaviotas", slug_name="gaviota")
+        self.owner= self.create_member("owner")
+        self.passenger= self.create_member("passenger")
+        self.ride= Ride.objects.create(
+            offered_by=self.owner,
+            offered_in=self.circle,
+            available_seats=0,
+            departure_location="Gaviotas",
+            departure_date=timezone.now() + timedelta(hours=1),
+            arrival_location="Centro",
+            arrival_date=timezone.now() + timedelta(hours=2)
+        )
+        self.ride.passengers.add(self.passenger)
+        self.url= f"/circles/{self.circle.slug_name}/rides/{self.ride.pk}/"
+
+    def create_member(self, username):
+        """Create an active member of the circle."""
+
+        user= User.objects.create(username=username, email=f"{username}@test.com", password="admin12345")
+        Membership.objects.create(user=user, profile=Profile.objects.create(user=user), circle=self.circle)
+        return user
+
+    def as_user(self, user):
+        """Authenticate the next requests as a user."""
+
+        token, created= Token.objects.get_or_create(user=user)
+        self.client.credentials(HTTP_AUTHORIZATION=f"Token {token.key}")
+
+    def test_waitlist_is_served_in_order(self):
+        """Freed seats should go to the oldest waitlist entry."""
+
+        first, second= self.create_member("first"), self.create_member("second")
+        for position, user in enumerate((first, second), 1):
+            self.as_user(user)
+            response= self.client.post(self.url + "waitlist/")
+            self.assertEqual(response.status_code, 201)
+            self.assertEqual(response.data["position"], position)
+
+        self.as_user(self.passenger)
+        response= self.client.post(self.url + "leave/")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["available_seats"], 1)
+        self.assertEqual(response.data["passengers"], [])
+
+        self.as_user(self.create_member("latecomer"))
+        response= self.client.post(self.url + "join/")
+        self.assertEqual(response.status_code, 400)
+
+        self.assertEqual(promote_waitlist(self.ride.pk), 1)
+        self.ride.refresh_from_db()
+        self.assertEqual(self.ride.available_seats, 0)
+        self.assertEqual(list(self.ride.passengers.all()), [first])
+
+        self.as_user(second)
+        response= self.client.get(self.url + "waitlist/")
+        self.assertEqual(response.data["position"], 1)
+        self.assertEqual(self.client.delete(self.url + "waitlist/").status_code, 204)
+        self.assertFalse(self.ride.waitlist.exists())
+
+    def test_waitlist_checks_seats_freed_meanwhile(self):
+        """A seat freed after the ride was loaded should be joined, not waited for."""
+
+        user= self.create_member("eager")
+        request= APIRequestFactory().post(self.url + "waitlist/")
+        request.user= user
+        Ride.objects.filter(pk=self.ride.pk).update(available_seats=1)
+
+        serializer= JoinWaitlistSerializer(data={}, context={"ride": self.ride, "circle": self.circle, "request": request})
+        self.assertTrue(serializer.is_valid())
+        with self.assertRaisesMessage(ValidationError, "join it instead"):
+            serializer.save()
+        self.assertFalse(self.ride.waitlist.exists())
+
+    def test_seats_added_by_the_owner_go_to_the_waitlist(self):
+        """Owners raising the seats of a full ride should promote its waitlist."""
+
+        self.ride.waitlist.create(user=self.create_member("waiting"))
+        self.as_user(self.owner)
+        with mock.patch("cride.rides.views.rides.promote_waitlist") as task:
+            with self.captureOnCommitCallbacks(execute=True):
+                response= self.client.patch(self.url, {"available_seats": 1}, HTTP_ACCEPT="application/json")
+        self.assertEqual(response.status_code, 200)
+        task.delay.assert_called_once_with(self.ride.pk)
+
+    def test_rides_with_seats_cannot_be_waited_for(self):
+        """Users should join rides with free seats directly."""
+
+        Ride.objects.filter(pk=self.ride.pk).update(available_seats=2)
+        self.as_user(self.create_member("eager"))
+        response= self.client.post(self.url + "waitlist/")
+        self.assertEqual(response.status_code, 400)
+
+
+class RideEventsTestCase(TestCase):
+    """Ride event stream test case."""
+
+    def setUp(self):
+        """Test case set up."""
+
+        self.user= User.objects.create(username="velo", email="velo@test.com", password="admin12345")
+        self.circle= Circle.objects.create(name="Gaviotas", slug_name="gaviota")
+        Membership.objects.create(user=self.user, profile=Profile.objects.create(user=self.user), circle=self.circle)
+        self.ride= Ride.objects.create(
+            offered_by=self.user,
+            offered_in=self.circle,
+            available_seats=2,
+            departure_location="Gaviotas",
+            arrival_location="Centro"
+        )
+        self.token= Token.objects.create(user=self.user).key
+        self.url= f"/circles/{self.circle.slug_name}/rides/events/"
+
+    async def test_stream_pushes_ride_events(self):
+        """Members should receive the events of the circle's rides as they happen."""
+
+        response= await self.async_client.get(self.url, headers={"authorization": f"Token {self.token}"})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response["Content-Type"], "text/event-stream")
+        content= aiter(response.streaming_content)
+        self.assertTrue((await anext(content)).startswith(b"retry:"))
+
+        channel= events.get_channel(self.circle.slug_name)
+        self.assertEqual(get_broker().count(channel), 1)
+
+        def join():
+            with self.captureOnCommitCallbacks(execute=True):
+                events.publish(self.circle.slug_name, events.JOINED, self.ride)
+        await sync_to_async(join)()
+
+        message= await asyncio.wait_for(anext(content), 1)
+        self.assertTrue(message.startswith(b"data: "))
+        self.assertEqual(json.loads(message[6:]), {
+            "type": "ride.joined",
+            "ride": self.ride.pk,
+            "available_seats": 2,
+            "is_active": True,
+            "departure_date": json.loads(json.dumps(self.ride.departure_date, cls=DjangoJSONEncoder)),
+        })
+
+# Servers cancel the response task when the client disconnects.
+        waiting= asyncio.ensure_future(anext(content))
+        await asyncio.sleep(0)
+        waiting.cancel()
+        with self.assertRaises(asyncio.CancelledError):
+            await waiting
+        self.assertEqual(get_broker().count(channel), 0)
+
+    def test_stream_over_wsgi(self):
+        """Streams should also be pushed by WSGI servers, like the development server."""
+
+        response= self.client.get(self.url, HTTP_AUTHORIZATION=f"Token {self.token}")
+        self.assertEqual(response.status_code, 200)
+        content= iter(response.streaming_content)
+        self.assertTrue(next(content).startswith(b"retry:"))
+
+        channel= events.get_channel(self.circle.slug_name)
+        get_broker().publish(channel, '{"type": "ride.joined"}')
+        self.assertEqual(next(content), b'data: {"type": "ride.joined"}\n\n')
+
+        response.close()
+        self.assertEqual(get_broker().count(channel), 0)
+
+    async def test_stream_requires_membership(self):
+        """Only authenticated active members can subscribe."""
+
+        response= await self.async_client.get(self.url)
+        self.assertEqual(response.status_code, 401)
+
+        outsider= await User.objects.acreate(username="outsider", email="outsider@test.com")
+        token= await Token.objects.acreate(user=outsider)
+        response= await self.async_client.get(self.url, headers={"authorization": f"Token {token.key}"})
+        self.assertEqual(response.status_code, 403)
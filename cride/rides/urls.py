@@ -5,9 +5,17 @@ from rest_framework.routers import DefaultRouter
 from django.urls import include, path
 
 # Views
+from .views import events as event_views
 from .views import rides as ride_views
+from .views import schedules as schedule_views
 
 router = DefaultRouter()
+# Registered before rides so 'schedules' isn't taken for a ride id.
+router.register(
+    r'circles/(?P<slug_name>[a-zA-Z0-9_-]+)/rides/schedules',
+    schedule_views.RideScheduleViewSet,
+    basename='ride-schedule'
+)
 router.register(
     r'circles/(?P<slug_name>[a-zA-Z0-9_-]+)/rides',
     ride_views.RideViewSet,
@@ -15,6 +23,11 @@ router.register(
 )
 
 urlpatterns = [
+    path(
+        'circles/<slug:slug_name>/rides/events/',
+        event_views.ride_events,
+        name='ride-events'
+    ),
     path('', include(router.urls))
 ]
 
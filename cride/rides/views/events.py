@@ -0,0 +1,104 @@
+"""Ride event stream views."""
+
+# Django REST Framework
+from django.core.handlers.asgi import ASGIRequest
+from django.db import transaction
+from django.http import JsonResponse, StreamingHttpResponse
+from rest_framework.authentication import get_authorization_header
+from rest_framework.authtoken.models import Token
+
+# Local modules
+from cride.circles import slugs
+from cride.circles.models import Membership
+from cride.rides import events
+from cride.utils.events import get_broker
+
+# Utilities
+import asyncio
+from asgiref.sync import sync_to_async
+
+
+HEARTBEAT_INTERVAL= 15
+RETRY_MS= 5000
+
+
+async def authenticate(request):
+    """Return the active user of the request's token, if any."""
+
+    auth= get_authorization_header(request).split()
+    if len(auth) != 2 or auth[0].lower() != b"token":
+        return None
+    token= await Token.objects.select_related("user").filter(key=auth[1].decode()).afirst()
+    if token is None or not token.user.is_active:
+        return None
+    return token.user
+
+
+async def stream(subscription):
+    """Yield the subscription's messages as server-sent events.
+
+    Every event is a JSON message with its 'type'. Comments are sent
+    while there are no events so proxies keep the connection open and
+    dead clients are noticed.
+    """
+
+    try:
+        yield f"retry: {RETRY_MS}\n\n"
+        while True:
+            try:
+                message= await asyncio.wait_for(subscription.get(), HEARTBEAT_INTERVAL)
+            except asyncio.TimeoutError:
+                yield ": keepalive\n\n"
+                continue
+            yield f"data: {message}\n\n"
+    finally:
+        subscription.close()
+
+
+def stream_sync(subscription):
+    """Yield the subscription's messages as server-sent events, from a WSGI worker thread."""
+
+    try:
+        yield f"retry: {RETRY_MS}\n\n"
+        while True:
+            message= subscription.get(HEARTBEAT_INTERVAL)
+            if message is None:
+                yield ": keepalive\n\n"
+                continue
+            yield f"data: {message}\n\n"
+    finally:
+        subscription.close()
+
+
+# Requests are atomic by default, which async views don't support.
+@transaction.non_atomic_requests
+async def ride_events(request, slug_name):
+    """Stream the availability changes of a circle's rides to its active members.
+
+    Clients subscribe once instead of polling the ride list. In production
+    the stream is served by the ASGI events service. Under WSGI, like on
+    the development server, each stream holds a worker thread instead.
+    """
+
+    user= await authenticate(request)
+    if user is None:
+        return JsonResponse({"detail": "Authentication credentials were not provided."}, status=401)
+
+    circle= await sync_to_async(slugs.get_circle)(slug_name)
+    if circle is None:
+        return JsonResponse({"detail": "Not found."}, status=404)
+
+    is_member= await Membership.objects.filter(user=user, circle=circle, is_active=True).aexists()
+    if not is_member:
+        return JsonResponse({"detail": "You do not have permission to perform this action."}, status=403)
+
+    channel= events.get_channel(slug_name)
+# WSGI servers can only stream sync iterators; they would wait for an async one to end.
+    if isinstance(request, ASGIRequest):
+        content= stream(get_broker().subscribe(channel))
+    else:
+        content= stream_sync(get_broker().subscribe_sync(channel))
+    response= StreamingHttpResponse(content, content_type="text/event-stream")
+    response["Cache-Control"]= "no-cache"
+    response["X-Accel-Buffering"]= "no"
+    return response
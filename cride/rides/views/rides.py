@@ -6,32 +6,62 @@ from rest_framework.decorators import action
 from rest_framework.generics import get_object_or_404
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
-from rest_framework.filters import SearchFilter, OrderingFilter
+from rest_framework.filters import OrderingFilter
+from rest_framework.renderers import JSONRenderer
+from django.db import transaction
+from django.db.models import Max, Prefetch
+from django_filters.rest_framework import DjangoFilterBackend
+from django.utils import timezone
 
 # Local modules
-from cride.rides.serializers import CreateRideSerializer, RideModelSerializer, JoinRideSerializer, EndRideSerializer, CreateRideRatingSerializer
+from cride.rides.serializers import (
+    CreateRideSerializer,
+    RideModelSerializer,
+    JoinRideSerializer,
+    LeaveRideSerializer,
+    EndRideSerializer,
+    CreateRideRatingSerializer,
+    NearbyRidesSerializer,
+    MatchRidesSerializer,
+    JoinWaitlistSerializer,
+    WaitlistEntryModelSerializer
+)
 from cride.circles.permissions import IsActiveCircleMember
 from cride.rides.permissions import IsRideOwner, IsNotRideOwner
-from cride.circles.models import Circle
-from datetime import timezone
+from cride.rides.search import RideSearchFilter
+from cride.rides.filters import RideFilter
+from cride.rides import events, feeds, matching
+from cride.circles import slugs
+from cride.users.models import User
+from cride.taskapp.tasks import promote_waitlist
+from cride.utils.pagination import KeysetPagination
+from cride.utils.views import ConditionalGetMixin
+from cride.utils import cache as cache_utils
+from datetime import timedelta
+import time
 
-class RideViewSet(mixins.CreateModelMixin,
+class RideViewSet(ConditionalGetMixin,
+    mixins.CreateModelMixin,
     mixins.ListModelMixin,
     mixins.RetrieveModelMixin,
     mixins.UpdateModelMixin,
     viewsets.GenericViewSet):
     """Ride view set."""
 
-    filter_backends= (SearchFilter, OrderingFilter)
-    ordering= ("available_seats")
-    ordering_fields= ("available_seats")
+    pagination_class= KeysetPagination
+    filter_backends= (DjangoFilterBackend, OrderingFilter, RideSearchFilter)
+    filterset_class= RideFilter
+    ordering= ("departure_date",)
+    ordering_fields= ("departure_date", "arrival_date", "available_seats")
+# Ride times and locations are read-only once offered, so dates and search ranks never change between pages.
+    cursor_ordering_fields= ("departure_date", "arrival_date", "search_rank", "created")
     search_fields= ("departure_location", "arrival_location")
 
     def dispatch(self, request, *args, **kwargs):
         """Verify that the Circle exists"""
 
         slug_name= kwargs["slug_name"]
-        self.circle= get_object_or_404(Circle, slug_name=slug_name)
+        self.circle= slugs.get_circle_or_404(slug_name)
         return super(RideViewSet, self).dispatch(request, *args, **kwargs)
         
     def get_permissions(self):
@@ -41,7 +71,7 @@ class RideViewSet(mixins.CreateModelMixin,
 
         if self.action in ["update", "partial_update", "finish"]:
             permissions.append(IsRideOwner)
-        if self.action == "join":
+        if self.action in ["join", "waitlist"]:
             permissions.append(IsNotRideOwner)
         return [p() for p in permissions]
 
@@ -58,8 +88,10 @@ class RideViewSet(mixins.CreateModelMixin,
 
         if self.action == "create":
             return CreateRideSerializer
-        if self.action == "update":
+        if self.action in ["update", "join"]:
             return JoinRideSerializer
+        if self.action == "leave":
+            return LeaveRideSerializer
         if self.action == "finish":
             return EndRideSerializer
         if self.action == "rate":
@@ -67,13 +99,127 @@ class RideViewSet(mixins.CreateModelMixin,
         return RideModelSerializer
 
     def get_queryset(self):
-        """Return active circle rides."""
+        """Return active circle rides.
 
-        return self.circle.ride_set.filter(
-            is_active=True,
-            available_seats__gte=1
+        Owners, passengers and their profiles are loaded up front so
+        serializing a page costs the same number of queries regardless
+        of how many rides or passengers it holds. Full rides are only
+        reachable by their passengers leaving, by their waitlist and by
+        their owners editing them.
+        """
+
+        queryset = self.circle.ride_set.filter(is_active=True)
+        if self.action not in ["leave", "waitlist", "partial_update"]:
+            queryset = queryset.filter(available_seats__gte=1)
+        return queryset.select_related(
+            "offered_by__profile",
+            "offered_in"
+        ).prefetch_related(
+            Prefetch("passengers", queryset=User.objects.select_related("profile"))
+        )
+
+    def get_validators(self):
+        """Use the circle's feed version, which every change to its rides bumps.
+
+        The owner and passenger profiles nested in the rides change on
+        their own, like when they are rated in another circle, so their
+        latest 'modified' dates are added too.
+        """
+
+        version= cache_utils.get_version(feeds.get_namespace(self.circle.slug_name))
+        profiles= self.get_validation_queryset().order_by().aggregate(
+            owners=Max("offered_by__profile__modified"),
+            passengers=Max("passengers__profile__modified")
+        )
+        return [version, profiles["owners"], profiles["passengers"]], None
+
+    def list(self, request, *args, **kwargs):
+        """List circle rides, served from the feed cache when possible."""
+
+        start= time.perf_counter()
+        data, hit= feeds.get_page(
+            self.circle.slug_name,
+            request,
+            lambda: super(RideViewSet, self).list(request, *args, **kwargs).data,
+            self.etag
+        )
+        elapsed= (time.perf_counter() - start) * 1000
+
+        response= Response(data)
+        response["X-Cache"]= "HIT" if hit else "MISS"
+        response["Server-Timing"]= f"feed;desc={response['X-Cache']};dur={elapsed:.2f}"
+        return response
+
+    def perform_create(self, serializer):
+        """Create the ride, invalidate the circle feed and announce it."""
+
+        ride= serializer.save()
+        feeds.invalidate(self.circle.slug_name)
+        events.publish(self.circle.slug_name, events.CREATED, ride)
+
+    def perform_update(self, serializer):
+        """Update the ride, invalidate the circle feed and announce it.
+
+        Seats added by the owner go to the waitlist first.
+        """
+
+        ride = serializer.save()
+        feeds.invalidate(self.circle.slug_name)
+        events.publish(self.circle.slug_name, events.UPDATED, ride)
+        self.promote_waitlist(ride)
+
+    def promote_waitlist(self, ride):
+        """Hand the ride's free seats to its waitlist once the transaction commits."""
+
+        if ride.available_seats >= 1 and ride.waitlist.exists():
+            transaction.on_commit(lambda: promote_waitlist.delay(ride.pk))
+
+    @action(detail=False, methods=["GET"])
+    def nearby(self, request, *args, **kwargs):
+        """List rides departing near a point, closest and soonest first."""
+
+        serializer= NearbyRidesSerializer(data=request.query_params)
+        serializer.is_valid(raise_exception=True)
+        params= serializer.validated_data
+
+        now= timezone.now()
+        rides= self.get_queryset().filter(
+            departure_date__range=(now, now + timedelta(minutes=params["within"]))
+        ).nearby(
+            params["latitude"],
+            params["longitude"],
+            params["radius"],
+            limit=params["limit"]
         )
 
+        data= RideModelSerializer(rides, many=True).data
+        for item, ride in zip(data, rides):
+            item["distance"]= round(ride.distance, 3)
+        return Response(data, status=status.HTTP_200_OK)
+
+    @action(detail=False, methods=["GET"])
+    def match(self, request, *args, **kwargs):
+        """List the rides whose route best matches the passenger's, best first."""
+
+        serializer= MatchRidesSerializer(data=request.query_params)
+        serializer.is_valid(raise_exception=True)
+        params= serializer.validated_data
+
+        rides= matching.match(
+            self.circle,
+            self.get_queryset(),
+            params["origin"],
+            params["destination"],
+            params["departure_after"],
+            params["departure_before"],
+            limit=params["limit"]
+        )
+
+        data= RideModelSerializer(rides, many=True).data
+        for item, ride in zip(data, rides):
+            item["score"]= round(ride.score, 3)
+        return Response(data, status=status.HTTP_200_OK)
+
     @action(detail=True, methods=["POST"])
     def join(self, request, *args, **kwargs):
         """Add requesting user to ride."""
@@ -83,15 +229,60 @@ class RideViewSet(mixins.CreateModelMixin,
         serializer= serializer_class(
             ride,
             data= {"passenger": request.user.pk},
-            context={"ride": ride, "circle": self.circle},
+            context={"ride": ride, "circle": self.circle, "request": request},
             partial=True
         )
         serializer.is_valid(raise_exception=True)
         ride = serializer.save()
+        feeds.invalidate(self.circle.slug_name)
+        events.publish(self.circle.slug_name, events.JOINED, ride)
         data= RideModelSerializer(ride).data
         return Response(data, status=status.HTTP_200_OK)
     
 
+    @action(detail=True, methods=["POST"])
+    def leave(self, request, *args, **kwargs):
+        """Remove requesting user from ride and release their seat."""
+
+        ride = self.get_object()
+        serializer_class = self.get_serializer_class()
+        serializer = serializer_class(
+            ride,
+            data={"passenger": request.user.pk},
+            context={"ride": ride, "circle": self.circle, "request": request},
+            partial=True
+        )
+        serializer.is_valid(raise_exception=True)
+        ride = serializer.save()
+        feeds.invalidate(self.circle.slug_name)
+        events.publish(self.circle.slug_name, events.LEFT, ride)
+        self.promote_waitlist(ride)
+        data = RideModelSerializer(ride).data
+        return Response(data, status=status.HTTP_200_OK)
+
+# The browsable API would check the ride permissions against the waitlist entry.
+    @action(detail=True, methods=["GET", "POST", "DELETE"], renderer_classes=[JSONRenderer])
+    def waitlist(self, request, *args, **kwargs):
+        """Show, take or give up the requesting user's place in the ride's waitlist."""
+
+        ride = self.get_object()
+        if request.method == "POST":
+            serializer = JoinWaitlistSerializer(
+                data={},
+                context={"ride": ride, "circle": self.circle, "request": request}
+            )
+            serializer.is_valid(raise_exception=True)
+            entry = serializer.save()
+            data = WaitlistEntryModelSerializer(entry).data
+            return Response(data, status=status.HTTP_201_CREATED)
+
+        entry = get_object_or_404(ride.waitlist, user=request.user)
+        if request.method == "DELETE":
+            entry.delete()
+            return Response(status=status.HTTP_204_NO_CONTENT)
+        data = WaitlistEntryModelSerializer(entry).data
+        return Response(data, status=status.HTTP_200_OK)
+
     @action(detail=True, methods=["POST"])
     def finish(self, request, *args, **kwargs):
         """Called by owners to finish a ride."""
@@ -106,6 +297,8 @@ class RideViewSet(mixins.CreateModelMixin,
         )
         serializer.is_valid(raise_exception=True)
         ride = serializer.save()
+        feeds.invalidate(self.circle.slug_name)
+        events.publish(self.circle.slug_name, events.FINISHED, ride)
         data= RideModelSerializer(ride).data
         return Response(data, status=status.HTTP_200_OK)
 
@@ -122,6 +315,7 @@ class RideViewSet(mixins.CreateModelMixin,
         serializer.is_valid(raise_exception=True)
 
         ride = serializer.save()
+        feeds.invalidate(self.circle.slug_name)
         data= RideModelSerializer(ride).data
         return Response(data, status=status.HTTP_201_CREATED)
 
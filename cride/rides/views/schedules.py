@@ -0,0 +1,89 @@
+"""Ride schedule views."""
+
+# Django REST Framework
+from rest_framework import mixins, viewsets, status
+from rest_framework.response import Response
+from rest_framework.permissions import IsAuthenticated
+from django.utils import timezone
+
+# Local modules
+from cride.rides.serializers import RideScheduleModelSerializer, CreateRideScheduleSerializer
+from cride.circles.permissions import IsActiveCircleMember
+from cride.rides.permissions import IsRideOwner
+from cride.rides.models import Ride
+from cride.circles import slugs
+from cride.rides import events, feeds
+
+
+class RideScheduleViewSet(mixins.CreateModelMixin,
+    mixins.ListModelMixin,
+    mixins.RetrieveModelMixin,
+    mixins.DestroyModelMixin,
+    viewsets.GenericViewSet):
+    """Ride schedule view set.
+
+    Recurring rides of a circle. Creating a schedule creates the rides of
+    its first window right away.
+    """
+
+    def dispatch(self, request, *args, **kwargs):
+        """Verify that the Circle exists"""
+
+        slug_name= kwargs["slug_name"]
+        self.circle= slugs.get_circle_or_404(slug_name)
+        return super(RideScheduleViewSet, self).dispatch(request, *args, **kwargs)
+
+    def get_permissions(self):
+        """Assign permission based on action."""
+
+        permissions= [IsAuthenticated, IsActiveCircleMember]
+        if self.action == "destroy":
+            permissions.append(IsRideOwner)
+        return [p() for p in permissions]
+
+    def get_serializer_context(self):
+        """Add circle to serializer context."""
+
+        context= super(RideScheduleViewSet, self).get_serializer_context()
+        context["circle"]= self.circle
+        return context
+
+    def get_serializer_class(self):
+        """Return serializer based on action."""
+
+        if self.action == "create":
+            return CreateRideScheduleSerializer
+        return RideScheduleModelSerializer
+
+    def get_queryset(self):
+        """Return active circle schedules."""
+
+        return self.circle.rideschedule_set.filter(
+            is_active=True
+        ).select_related("offered_by", "offered_in")
+
+    def create(self, request, *args, **kwargs):
+        """Create a schedule and its first rides."""
+
+        serializer= self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        schedule= serializer.save()
+        data= RideScheduleModelSerializer(schedule).data
+        return Response(data, status=status.HTTP_201_CREATED)
+
+    def perform_destroy(self, instance):
+        """Disable the schedule and cancel its upcoming rides nobody joined."""
+
+        instance.is_active= False
+        instance.save()
+        rides= list(Ride.objects.filter(
+            schedule=instance,
+            is_active=True,
+            departure_date__gt=timezone.now(),
+            passengers__isnull=True
+        ))
+        Ride.objects.filter(pk__in=[ride.pk for ride in rides]).update(is_active=False)
+        for ride in rides:
+            ride.is_active= False
+        feeds.invalidate(self.circle.slug_name)
+        events.publish(self.circle.slug_name, events.FINISHED, *rides)
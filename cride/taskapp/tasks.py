@@ -5,19 +5,29 @@ from django.core.mail import EmailMultiAlternatives
 from django.template.loader import render_to_string
 from django.conf import settings
 from django.utils import timezone
+from django.db import transaction
+from django.db.models import Q
+from rest_framework.exceptions import ValidationError
 
 # Celery
 from celery import Celery
 
 # Local modules
 from cride.users.models import User
+from cride.rides.models import Ride, RideSchedule, WaitlistEntry
+from cride.circles import leaderboards
+from cride.circles.models import Circle, Membership
+from cride.rides import events, feeds
+from cride.utils import counters
 
 # Utilities
 import jwt
 import time
+import logging
 from datetime import timedelta
 
 app = Celery()
+logger = logging.getLogger(__name__)
 
 
 def gen_verification_token(user):
@@ -52,3 +62,142 @@ def send_confirmation_email(user_pk):
     msg= EmailMultiAlternatives(subject, content, from_email, [user.email])
     msg.attach_alternative(content, "text/html")
     msg.send()
+
+
+@app.task(name="flush_counters", max_retries=3)
+def flush_counters():
+    """Apply the buffered stats increments to the database."""
+
+    return counters.flush()
+
+
+@app.task(name="rebuild_leaderboards", max_retries=3)
+def rebuild_leaderboards():
+    """Recompute the leaderboards of every circle, restoring the ones Redis lost."""
+
+    counters.flush()
+    return leaderboards.rebuild(Circle.objects.order_by("pk").values_list("pk", flat=True))
+
+
+@app.task(name="finish_departed_rides", max_retries=3)
+def finish_departed_rides(batch_size=1000):
+    """Finish the active rides that have already arrived.
+
+    Rides are deactivated with one bulk UPDATE per batch of primary keys,
+    each committed on its own, so an interrupted run just resumes from the
+    rides that are still active on the next one.
+    """
+
+    now= timezone.now()
+    start= time.perf_counter()
+    finished, last_pk, circles= 0, 0, set()
+
+    while True:
+        batch= list(
+            Ride.objects.filter(
+                is_active=True,
+                arrival_date__lt=now,
+                pk__gt=last_pk
+            ).order_by("pk").values_list("pk", "offered_in__slug_name", "available_seats", "departure_date")[:batch_size]
+        )
+        if not batch:
+            break
+
+        pks= [pk for pk, *_ in batch]
+        finished += Ride.objects.filter(pk__in=pks, is_active=True).update(is_active=False, modified=now)
+        last_pk= pks[-1]
+        for pk, slug_name, available_seats, departure_date in batch:
+            if slug_name:
+                circles.add(slug_name)
+                ride= Ride(pk=pk, available_seats=available_seats, departure_date=departure_date, is_active=False)
+                events.publish(slug_name, events.FINISHED, ride)
+
+    for slug_name in circles:
+        feeds.invalidate(slug_name)
+
+    elapsed= time.perf_counter() - start
+    stats= {
+        "finished": finished,
+        "circles": len(circles),
+        "seconds": round(elapsed, 3),
+        "rows_per_second": round(finished / elapsed, 1) if elapsed else None,
+    }
+    logger.info("Finished departed rides: %s", stats)
+    return stats
+
+
+@app.task(name="extend_ride_schedules", max_retries=3)
+def extend_ride_schedules():
+    """Create the rides of active schedules up to the end of their window."""
+
+    today= timezone.localdate()
+    until= today + timedelta(days=RideSchedule.WINDOW_DAYS)
+    schedules= RideSchedule.objects.filter(
+        Q(materialized_until__isnull=True) | Q(materialized_until__lt=until),
+        Q(ends_on__isnull=True) | Q(ends_on__gte=today),
+        is_active=True
+    ).select_related("offered_in")
+
+    created= 0
+    for schedule in schedules.iterator():
+        membership= Membership.objects.filter(
+            user_id=schedule.offered_by_id,
+            circle_id=schedule.offered_in_id,
+            is_active=True
+        ).first()
+        if membership is None:
+            RideSchedule.objects.filter(pk=schedule.pk).update(is_active=False)
+            continue
+        created += len(schedule.materialize(membership, until))
+    return created
+
+
+@app.task(name="promote_waitlist", max_retries=3)
+def promote_waitlist(ride_pk):
+    """Give a ride's free seats to the users at the head of its waitlist.
+
+    Each promotion pops the oldest entry and joins its user through the
+    regular join serializer, inside one transaction, so the seat claim is
+    the same conditional update used by joins. Entries of users who can no
+    longer join, like former circle members, are dropped. Concurrent runs
+    skip the entries locked by each other.
+    Returns the number of promoted users.
+    """
+
+# Imported here because the users serializers import this module.
+    from cride.rides.serializers import JoinRideSerializer
+
+    ride= Ride.objects.select_related("offered_in").get(pk=ride_pk)
+    promoted= 0
+
+    while True:
+        with transaction.atomic():
+            entry= WaitlistEntry.objects.select_for_update(skip_locked=True).filter(ride=ride).order_by("pk").first()
+            if entry is None:
+                break
+            ride.refresh_from_db(fields=["available_seats", "is_active"])
+            if ride.available_seats < 1 or not ride.is_active:
+                break
+
+            entry.delete()
+            serializer= JoinRideSerializer(
+                ride,
+                data={"passenger": entry.user_id},
+                context={"ride": ride, "circle": ride.offered_in, "promotion": True},
+                partial=True
+            )
+            if not serializer.is_valid():
+                continue
+            try:
+                serializer.save()
+            except ValidationError:
+# The seat was taken meanwhile, keep the entry at the head of the queue.
+                transaction.set_rollback(True)
+                break
+            events.publish(ride.offered_in.slug_name, events.JOINED, ride)
+            promoted += 1
+
+    if promoted:
+        feeds.invalidate(ride.offered_in.slug_name)
+    logger.info("Promoted %s users from the waitlist of ride %s", promoted, ride_pk)
+    return promoted
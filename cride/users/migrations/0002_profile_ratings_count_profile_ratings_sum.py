@@ -0,0 +1,41 @@
+# Generated by Django 5.2.18 on 2026-10-18 06:25
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery, Sum
+from django.utils import timezone
+
+
+def backfill_ratings(apps, schema_editor):
+    """Fill in the rating totals of the profiles that were already rated."""
+
+    Rating= apps.get_model("rides", "Rating")
+    Profile= apps.get_model("users", "Profile")
+
+    ratings= Rating.objects.filter(rated_user=OuterRef("user_id")).order_by().values("rated_user")
+    Profile.objects.filter(user__in=Rating.objects.values("rated_user")).update(
+        ratings_sum=Subquery(ratings.annotate(total=Sum("rating")).values("total")),
+        ratings_count=Subquery(ratings.annotate(count=Count("id")).values("count")),
+        modified=timezone.now()
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0001_initial'),
+        ('rides', '0003_rating_rated_user_ride_rating_count_ride_rating_sum'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='profile',
+            name='ratings_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='profile',
+            name='ratings_sum',
+            field=models.FloatField(default=0, help_text='Running total of the ratings received, used to update the reputation.'),
+        ),
+        migrations.RunPython(backfill_ratings, migrations.RunPython.noop),
+    ]
@@ -28,6 +28,11 @@ class Profile(CRideModel):
         default=5.0,
         help_text="User's reputation based on the rides taken and offered."
     )
+    ratings_sum= models.FloatField(
+        default=0,
+        help_text="Running total of the ratings received, used to update the reputation."
+    )
+    ratings_count= models.PositiveIntegerField(default=0)
 
     def __str__(self):
         """Return user str representation."""
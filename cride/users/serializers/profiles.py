@@ -6,11 +6,14 @@ from django.db.models import fields
 
 # Local modules
 from cride.users.models import Profile
+from cride.utils.serializers import PendingCountersMixin
 
 
-class ProfileModelSerializer(serializers.ModelSerializer):
+class ProfileModelSerializer(PendingCountersMixin, serializers.ModelSerializer):
     """Profile model serializer."""
 
+    counter_fields= ("rides_taken", "rides_offered")
+
     class Meta:
         model= Profile
         fields= (
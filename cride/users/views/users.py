@@ -6,6 +6,7 @@ from rest_framework.decorators import action
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework.permissions import AllowAny, IsAuthenticated
+from django.db.models import Count, Max
 
 # Local modules
 from cride.users.serializers import UserLoginSerializer, UserModelSerializer, UserSignupSerializer, AccountVerificationSerializer, ProfileModelSerializer
@@ -13,9 +14,10 @@ from cride.circles.serializers import CircleModelSerializer
 from cride.users.models import User
 from cride.circles.models import Circle
 from cride.users.permissions import IsAccountOwner
+from cride.utils.views import ConditionalGetMixin
 
 
-class UserViewSet(mixins.RetrieveModelMixin, mixins.UpdateModelMixin, viewsets.GenericViewSet):
+class UserViewSet(ConditionalGetMixin, mixins.RetrieveModelMixin, mixins.UpdateModelMixin, viewsets.GenericViewSet):
     """User view set
     
     Handles sign up, login and account verification.
@@ -24,6 +26,7 @@ class UserViewSet(mixins.RetrieveModelMixin, mixins.UpdateModelMixin, viewsets.G
     queryset = User.objects.filter(is_active=True, is_client=True)
     serializer_class= UserModelSerializer
     lookup_field= "username"
+    validator_fields= ("modified", "profile__modified")
 
     def get_permissions(self):
         """Assign permissions based on action."""
@@ -78,6 +81,19 @@ class UserViewSet(mixins.RetrieveModelMixin, mixins.UpdateModelMixin, viewsets.G
         return Response(data, status=status.HTTP_200_OK)
 
 
+    def get_validators(self):
+        """Add the requesting user's circles, which are part of the response."""
+
+        parts, last_modified= super(UserViewSet, self).get_validators()
+        circles= Circle.objects.filter(
+            members=self.request.user,
+            membership__is_active=True
+        ).aggregate(last_modified=Max("modified"), count=Count("pk"))
+        if circles["last_modified"] and (not last_modified or circles["last_modified"] > last_modified):
+            last_modified= circles["last_modified"]
+        return [*parts, self.request.user.pk, circles["count"], circles["last_modified"]], last_modified
+
+
     def retrieve(self, request, *args, **kwargs):
         """Add extra data to the response."""
 
@@ -0,0 +1,133 @@
+"""Cache utilities."""
+
+# Django
+from django.core.cache import cache
+from django.db import transaction
+
+# Utilities
+import hashlib
+import threading
+import time
+from collections import defaultdict
+
+
+STATS_FLUSH_INTERVAL= 10
+
+_stats= defaultdict(int)
+_stats_lock= threading.Lock()
+_stats_flushed= time.monotonic()
+
+
+def get_version(namespace):
+    """Return the current version of a cache namespace.
+
+    Entries are keyed with the version of their namespace, so bumping it
+    invalidates all of them at once.
+    """
+
+    key= f"version:{namespace}"
+    version= cache.get(key)
+    if version is None:
+# Start from the clock so a lost version never reuses the number of a stale entry.
+        cache.add(key, int(time.time() * 1000), timeout=None)
+        version= cache.get(key)
+    return version
+
+
+def bump_version(namespace):
+    """Invalidate every entry of a namespace once the transaction commits."""
+    transaction.on_commit(lambda: increment_version(namespace))
+
+
+def increment_version(namespace):
+    """Invalidate every entry of a namespace right away."""
+
+    try:
+        cache.incr(f"version:{namespace}")
+    except ValueError:
+        get_version(namespace)
+
+
+def make_key(namespace, *parts):
+    """Return a key for an entry of the current version of a namespace."""
+
+    digest= hashlib.md5("|".join(str(part) for part in parts).encode()).hexdigest()
+    return f"{namespace}:{get_version(namespace)}:{digest}"
+
+
+def get_or_build(key, build, timeout, lock_timeout=10, wait=5):
+    """Return an entry from the cache, or build it and cache it.
+
+    Only the first request that misses an entry builds it. Concurrent
+    misses wait for it to show up instead of rebuilding it too, and build
+    it themselves only if it takes longer than wait seconds.
+    Returns the entry and whether it came from the cache.
+    """
+
+    data= cache.get(key)
+    if data is not None:
+        return data, True
+
+    lock= f"lock:{key}"
+    deadline= time.monotonic() + wait
+    while not cache.add(lock, 1, timeout=lock_timeout):
+        time.sleep(0.05)
+        data= cache.get(key)
+        if data is not None:
+            return data, True
+        if time.monotonic() > deadline:
+            return build(), False
+
+    try:
+        data= build()
+        cache.set(key, data, timeout)
+    finally:
+        cache.delete(lock)
+    return data, False
+
+
+def record_lookup(namespace, hit, elapsed):
+    """Count a cache lookup and its latency in seconds.
+
+    Lookups are added up in the process and written to the cache at most
+    once every STATS_FLUSH_INTERVAL seconds, so requests don't all write
+    the same few keys.
+    """
+
+    global _stats_flushed
+    outcome= "hits" if hit else "misses"
+    with _stats_lock:
+        _stats[f"stats:{namespace}:{outcome}"] += 1
+        _stats[f"stats:{namespace}:{outcome}_us"] += int(elapsed * 1000000)
+        if time.monotonic() - _stats_flushed < STATS_FLUSH_INTERVAL:
+            return
+        _stats_flushed= time.monotonic()
+    flush_stats()
+
+
+def flush_stats():
+    """Write the lookups counted by this process to the cache."""
+
+    with _stats_lock:
+        pending= dict(_stats)
+        _stats.clear()
+    for key, amount in pending.items():
+        if not cache.add(key, amount, timeout=None):
+            cache.incr(key, amount)
+
+
+def get_stats(namespace):
+    """Return the hit rate and average latencies of a cache namespace."""
+
+    flush_stats()
+    names= ("hits", "misses", "hits_us", "misses_us")
+    values= cache.get_many([f"stats:{namespace}:{name}" for name in names])
+    hits, misses, hits_us, misses_us= (values.get(f"stats:{namespace}:{name}", 0) for name in names)
+    lookups= hits + misses
+    return {
+        "hits": hits,
+        "misses": misses,
+        "hit_rate": hits / lookups if lookups else None,
+        "hit_ms": hits_us / hits / 1000 if hits else None,
+        "miss_ms": misses_us / misses / 1000 if misses else None,
+    }
@@ -0,0 +1,218 @@
+"""Write-behind stats counters.
+
+Rides offered and taken are tracked on circles, memberships and profiles.
+Bumping them with a row write on every ride create and join makes popular
+circles a contention point, so increments are recorded in a buffer instead
+and applied later by the 'flush_counters' task as aggregated F() updates.
+
+Serializers add the pending increments back to the stored values, so
+clients always read their own writes even before a flush.
+
+The buffer lives in Redis, shared by the web and Celery processes. When
+the default cache isn't Redis, which means local development and tests,
+there is nowhere to share it, so increments are written through instead.
+"""
+
+# Django
+from django.apps import apps
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import F
+from django.db.models.functions import Greatest
+from django.utils import timezone
+
+# Utilities
+import logging
+from collections import defaultdict
+from redis.exceptions import RedisError
+
+
+PENDING_KEY= "counters:pending"
+FLUSHING_KEY= "counters:flushing"
+FLUSH_LOCK_KEY= "counters:flush-lock"
+
+logger= logging.getLogger(__name__)
+
+
+class RedisCounterBuffer:
+    """Counter buffer kept in Redis hashes shared by every worker."""
+
+    def __init__(self):
+        from django_redis import get_redis_connection
+        self.client= get_redis_connection("default")
+
+    def add(self, key, amount):
+        """Add amount to the pending value of key."""
+        self.client.hincrby(PENDING_KEY, key, amount)
+
+    def get_many(self, keys):
+        """Return the pending and in-flight amounts of the given keys."""
+        if not keys:
+            return {}
+        pipe= self.client.pipeline()
+        pipe.hmget(PENDING_KEY, keys)
+        pipe.hmget(FLUSHING_KEY, keys)
+        pending, flushing= pipe.execute()
+
+        values= {}
+        for key, current, inflight in zip(keys, pending, flushing):
+            amount= int(current or 0) + int(inflight or 0)
+            if amount:
+                values[key]= amount
+        return values
+
+    def drain(self):
+        """Move the pending amounts aside and return them for flushing.
+
+        Amounts left over by a flush that failed halfway are returned
+        again instead of being overwritten.
+        """
+        if not self.client.exists(FLUSHING_KEY) and self.client.exists(PENDING_KEY):
+            self.client.renamenx(PENDING_KEY, FLUSHING_KEY)
+        return {
+            key.decode(): int(value)
+            for key, value in self.client.hgetall(FLUSHING_KEY).items()
+        }
+
+    def ack(self):
+        """Forget the amounts returned by the last drain."""
+        self.client.delete(FLUSHING_KEY)
+
+
+_buffer= None
+
+
+def get_buffer():
+    """Return the counter buffer, or None when the cache isn't Redis."""
+
+    global _buffer
+    if _buffer is None and settings.CACHES["default"]["BACKEND"].startswith("django_redis."):
+        _buffer= RedisCounterBuffer()
+    return _buffer
+
+
+def make_key(model, pk, field):
+    """Return the buffer key of a model instance counter."""
+    return f"{model._meta.label_lower}:{pk}:{field}"
+
+
+def apply(field, amount):
+    """Return the expression adding amount to a counter, which never goes below zero."""
+    return Greatest(F(field) + amount, 0)
+
+
+def write(model, pk, field, amount):
+    """Apply an increment to the database right away."""
+    model.objects.filter(pk=pk).update(modified=timezone.now(), **{field: apply(field, amount)})
+
+
+def increment(model, pk, field, amount=1):
+    """Record an increment of a counter.
+
+    The increment is only buffered once the current transaction
+    commits, so rolled back requests don't leak into the stats. Without
+    a buffer it is written through in the current transaction.
+    """
+
+    buffer= get_buffer()
+    if buffer is None:
+        write(model, pk, field, amount)
+    else:
+        key= make_key(model, pk, field)
+        transaction.on_commit(lambda: buffer_increment(buffer, model, pk, field, key, amount))
+
+
+def buffer_increment(buffer, model, pk, field, key, amount):
+    """Buffer a committed increment, writing it through if Redis is down.
+
+    It runs after the request's transaction committed, so errors are
+    logged instead of failing a request whose changes are already saved.
+    """
+
+    try:
+        buffer.add(key, amount)
+    except RedisError:
+        logger.exception("Could not buffer counter %s, writing it through", key)
+        try:
+            write(model, pk, field, amount)
+        except Exception:
+            logger.exception("Could not write counter %s", key)
+
+
+def get_pending(keys):
+    """Return the buffered increments of the given keys, missing when none."""
+
+    buffer= get_buffer()
+    if buffer is None or not keys:
+        return {}
+    try:
+        return buffer.get_many(list(keys))
+    except RedisError:
+        logger.exception("Could not read buffered counters")
+        return {}
+
+
+def pending(instance, fields):
+    """Return the buffered increments of an instance's counters."""
+
+    model= type(instance)
+    keys= {make_key(model, instance.pk, field): field for field in fields}
+    return {keys[key]: amount for key, amount in get_pending(keys).items()}
+
+
+def add_pending(model, items, fields):
+    """Add the buffered increments to serialized instances, identified by their 'id'."""
+
+    keys= {
+        make_key(model, item["id"], field): (item, field)
+        for item in items
+        for field in fields
+        if field in item
+    }
+    for key, amount in get_pending(keys).items():
+        item, field= keys[key]
+        item[field] += amount
+    return items
+
+
+def flush():
+    """Apply the buffered increments to the database.
+
+    Rows receiving the same increments are updated together, so each
+    flush issues one UPDATE per distinct set of increments.
+    Returns the number of rows updated.
+    """
+
+    buffer= get_buffer()
+    if buffer is None:
+        return 0
+    if not cache.add(FLUSH_LOCK_KEY, True, timeout=5 * 60):
+        return 0
+
+    try:
+        drained= buffer.drain()
+
+        rows= defaultdict(dict)
+        for key, amount in drained.items():
+            label, pk, field= key.rsplit(":", 2)
+            if amount:
+                rows[(label, int(pk))][field]= amount
+
+        batches= defaultdict(list)
+        for (label, pk), amounts in rows.items():
+            batches[(label, frozenset(amounts.items()))].append(pk)
+
+        updated= 0
+        now= timezone.now()
+        with transaction.atomic():
+            for (label, amounts), pks in batches.items():
+                model= apps.get_model(label)
+                updated += model.objects.filter(pk__in=pks).update(
+                    modified=now,
+                    **{field: apply(field, amount) for field, amount in amounts}
+                )
+        buffer.ack()
+        return updated
+    finally:
+        cache.delete(FLUSH_LOCK_KEY)
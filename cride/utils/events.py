@@ -0,0 +1,237 @@
+"""Event broker.
+
+Delivers messages published on a channel to the async subscribers of
+that channel, like the clients of a server-sent event stream. Messages
+are fire and forget: subscribers only get what is published while they
+are connected.
+"""
+
+# Django
+from django.conf import settings
+
+# Utilities
+import asyncio
+import logging
+import queue
+import threading
+import time
+from collections import defaultdict
+
+
+CHANNEL_PREFIX= "events:"
+QUEUE_SIZE= 100
+
+logger= logging.getLogger(__name__)
+
+
+class Subscription:
+    """Queue of the messages of a channel for one subscriber.
+
+    Must be created inside the event loop that consumes it. When a slow
+    subscriber falls QUEUE_SIZE messages behind, its oldest ones are dropped.
+    """
+
+    def __init__(self, broker, channel):
+        self.broker= broker
+        self.channel= channel
+        self.loop= asyncio.get_running_loop()
+        self.queue= asyncio.Queue(QUEUE_SIZE)
+
+    def send(self, message):
+        """Hand a message to the subscription's event loop, from any thread."""
+        self.loop.call_soon_threadsafe(self.deliver, message)
+
+    def deliver(self, message):
+        """Queue a message, from the subscription's event loop."""
+        if self.queue.full():
+            self.queue.get_nowait()
+        self.queue.put_nowait(message)
+
+    async def get(self):
+        """Wait for the next message."""
+        return await self.queue.get()
+
+    def close(self):
+        """Stop receiving messages."""
+        self.broker.unsubscribe(self)
+
+
+class SyncSubscription(Subscription):
+    """Subscription consumed by a thread instead of an event loop.
+
+    Used by streams served over WSGI, like those of the development server.
+    """
+
+    def __init__(self, broker, channel):
+        self.broker= broker
+        self.channel= channel
+        self.queue= queue.Queue(QUEUE_SIZE)
+
+    def send(self, message):
+        """Queue a message, from any thread."""
+        self.deliver(message)
+
+    def deliver(self, message):
+        """Queue a message, dropping the oldest one when full."""
+        while True:
+            try:
+                self.queue.put_nowait(message)
+                return
+            except queue.Full:
+                try:
+                    self.queue.get_nowait()
+                except queue.Empty:
+                    pass
+
+    def get(self, timeout=None):
+        """Wait for the next message, returning None if none came within timeout seconds."""
+        try:
+            return self.queue.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+
+class LocalEventBroker:
+    """Process-local event broker.
+
+    Used when the default cache isn't Redis, which means local
+    development and tests, where publishers and subscribers share a
+    process. Messages can be published from any thread.
+    """
+
+    def __init__(self):
+        self.lock= threading.Lock()
+        self.subscriptions= defaultdict(set)
+
+    def subscribe(self, channel):
+        """Return a new subscription to a channel."""
+        return self.add(Subscription(self, channel))
+
+    def subscribe_sync(self, channel):
+        """Return a new subscription to a channel for a thread to consume."""
+        return self.add(SyncSubscription(self, channel))
+
+    def add(self, subscription):
+        """Start delivering messages to a subscription."""
+        with self.lock:
+            self.subscriptions[subscription.channel].add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        """Remove a subscription."""
+        with self.lock:
+            subscriptions= self.subscriptions.get(subscription.channel, set())
+            subscriptions.discard(subscription)
+            if not subscriptions:
+                self.subscriptions.pop(subscription.channel, None)
+
+    def count(self, channel=None):
+        """Return the number of subscriptions, to a channel or in total."""
+        with self.lock:
+            if channel is not None:
+                return len(self.subscriptions.get(channel, ()))
+            return sum(len(subscriptions) for subscriptions in self.subscriptions.values())
+
+    def publish(self, channel, message):
+        """Send a message to the subscribers of a channel."""
+        self.dispatch(channel, message)
+
+    def dispatch(self, channel, message, kind=None):
+        """Hand a message to each subscription, or to those of one kind."""
+        with self.lock:
+            subscriptions= [
+                subscription for subscription in self.subscriptions.get(channel, ())
+                if kind is None or type(subscription) is kind
+            ]
+        for subscription in subscriptions:
+            try:
+                subscription.send(message)
+            except RuntimeError:
+# The subscriber's event loop is gone.
+                self.unsubscribe(subscription)
+
+
+class RedisEventBroker(LocalEventBroker):
+    """Event broker shared by every worker through Redis pub/sub.
+
+    Messages are published to Redis, and each worker keeps a single
+    pattern subscription that relays them to its local subscribers, so a
+    worker needs one Redis connection however many clients it streams to.
+    Subscriptions consumed by threads get their own relay thread.
+    """
+
+    def __init__(self):
+        super(RedisEventBroker, self).__init__()
+        from django_redis import get_redis_connection
+        self.client= get_redis_connection("default")
+        self.listener= None
+        self.relay= None
+
+    def subscribe(self, channel):
+        """Return a new subscription, starting the worker's relay if needed."""
+        subscription= super(RedisEventBroker, self).subscribe(channel)
+        if self.listener is None or self.listener.done() or self.listener.get_loop() is not subscription.loop:
+            self.listener= subscription.loop.create_task(self.listen())
+        return subscription
+
+    def subscribe_sync(self, channel):
+        """Return a new subscription for a thread, starting the worker's relay thread if needed."""
+        subscription= super(RedisEventBroker, self).subscribe_sync(channel)
+        with self.lock:
+            if self.relay is None or not self.relay.is_alive():
+                self.relay= threading.Thread(target=self.listen_sync, daemon=True)
+                self.relay.start()
+        return subscription
+
+    def publish(self, channel, message):
+        """Publish a message to the subscribers of every worker."""
+        self.client.publish(f"{CHANNEL_PREFIX}{channel}", message)
+
+    async def listen(self):
+        """Relay the messages of every channel to the local subscribers."""
+        from redis.asyncio import Redis
+
+        while True:
+            try:
+                client= Redis.from_url(settings.CACHES["default"]["LOCATION"])
+                async with client.pubsub() as pubsub:
+                    await pubsub.psubscribe(f"{CHANNEL_PREFIX}*")
+                    async for message in pubsub.listen():
+                        if message["type"] == "pmessage":
+                            channel= message["channel"].decode()[len(CHANNEL_PREFIX):]
+                            self.dispatch(channel, message["data"].decode(), Subscription)
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("Event relay disconnected from Redis, reconnecting")
+                await asyncio.sleep(1)
+
+    def listen_sync(self):
+        """Relay the messages of every channel to the local thread subscribers."""
+        while True:
+            try:
+                pubsub= self.client.pubsub(ignore_subscribe_messages=True)
+                pubsub.psubscribe(f"{CHANNEL_PREFIX}*")
+                for message in pubsub.listen():
+                    if message["type"] == "pmessage":
+                        channel= message["channel"].decode()[len(CHANNEL_PREFIX):]
+                        self.dispatch(channel, message["data"].decode(), SyncSubscription)
+            except Exception:
+                logger.exception("Event relay disconnected from Redis, reconnecting")
+                time.sleep(1)
+
+
+_broker= None
+
+
+def get_broker():
+    """Return the event broker for the configured cache."""
+
+    global _broker
+    if _broker is None:
+        backend= settings.CACHES["default"]["BACKEND"]
+        if backend.startswith("django_redis."):
+            _broker= RedisEventBroker()
+        else:
+            _broker= LocalEventBroker()
+    return _broker
@@ -0,0 +1,123 @@
+"""Geospatial utilities.
+
+Coordinates are indexed with geohashes: every point gets a base 32 string
+where each extra character narrows it down to a smaller grid cell, so the
+points inside a cell all share its prefix and can be found with a plain
+B-tree index on any database.
+"""
+
+# Utilities
+from math import asin, ceil, cos, degrees, radians, sin, sqrt
+
+
+BASE32= "0123456789bcdefghjkmnpqrstuvwxyz"
+EARTH_RADIUS= 6371.0
+MAX_PRECISION= 9
+
+
+def encode(latitude, longitude, precision=MAX_PRECISION):
+    """Return the geohash of a point."""
+
+    lat_range, lng_range= [-90.0, 90.0], [-180.0, 180.0]
+    geohash, bits, value, even= [], 0, 0, True
+    while len(geohash) < precision:
+        interval, coordinate= (lng_range, longitude) if even else (lat_range, latitude)
+        middle= (interval[0] + interval[1]) / 2
+        value <<= 1
+        if coordinate >= middle:
+            value |= 1
+            interval[0]= middle
+        else:
+            interval[1]= middle
+        even= not even
+        bits += 1
+        if bits == 5:
+            geohash.append(BASE32[value])
+            bits, value= 0, 0
+    return "".join(geohash)
+
+
+def cell_size(precision):
+    """Return the height and width in degrees of the cells of a precision."""
+
+    bits= precision * 5
+    return 180.0 / 2 ** (bits // 2), 360.0 / 2 ** ceil(bits / 2)
+
+
+def bounding_box(latitude, longitude, radius):
+    """Return the south, west, north and east bounds around a point.
+
+    The radius is in kilometers. Boxes crossing the antimeridian are
+    clamped to it.
+    """
+
+    delta_lat= degrees(radius / EARTH_RADIUS)
+    delta_lng= delta_lat / max(cos(radians(latitude)), 0.01)
+    return (
+        max(latitude - delta_lat, -90.0),
+        max(longitude - delta_lng, -180.0),
+        min(latitude + delta_lat, 90.0),
+        min(longitude + delta_lng, 180.0),
+    )
+
+
+def covering_cells(south, west, north, east, max_cells=64):
+    """Return the geohash prefixes of the cells that cover a box.
+
+    Uses the finest precision whose covering takes at most max_cells cells.
+    """
+
+    for precision in range(MAX_PRECISION, 0, -1):
+        height, width= cell_size(precision)
+        rows= int((north - south) // height) + 2
+        columns= int((east - west) // width) + 2
+        if rows * columns <= max_cells:
+            break
+
+    cells= set()
+    for row in range(rows):
+        latitude= min(south + row * height, north)
+        for column in range(columns):
+            longitude= min(west + column * width, east)
+            cells.add(encode(latitude, longitude, precision))
+    return sorted(cells)
+
+
+def covering_ranges(south, west, north, east, max_cells=64):
+    """Return the geohash ranges that cover a box.
+
+    Cells that follow each other in geohash order are merged into a single
+    range, so each range can be fetched with one index range scan. Bounds
+    are inclusive and padded to the maximum precision.
+    """
+
+    ranges= []
+    for cell in covering_cells(south, west, north, east, max_cells):
+        if ranges and successor(ranges[-1][1]) == cell:
+            ranges[-1][1]= cell
+        else:
+            ranges.append([cell, cell])
+
+    padding= BASE32[-1] * MAX_PRECISION
+    return [(low, (high + padding)[:MAX_PRECISION]) for low, high in ranges]
+
+
+def successor(geohash):
+    """Return the geohash of the next cell with the same precision."""
+
+    digits= list(geohash)
+    for i in range(len(digits) - 1, -1, -1):
+        index= BASE32.index(digits[i])
+        if index + 1 < len(BASE32):
+            digits[i]= BASE32[index + 1]
+            return "".join(digits)
+        digits[i]= BASE32[0]
+    return None
+
+
+def distance(lat1, lng1, lat2, lng2):
+    """Return the great circle distance between two points in kilometers."""
+
+    lat1, lng1, lat2, lng2= map(radians, (lat1, lng1, lat2, lng2))
+    a= sin((lat2 - lat1) / 2) ** 2 + cos(lat1) * cos(lat2) * sin((lng2 - lng1) / 2) ** 2
+    return 2 * EARTH_RADIUS * asin(sqrt(a))
@@ -0,0 +1,181 @@
+"""Django REST Framework pagination utilities."""
+
+# Django REST Framework
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+from rest_framework import serializers
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import LimitOffsetPagination
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+# Utilities
+import json
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from datetime import date, datetime
+
+
+class KeysetPagination(LimitOffsetPagination):
+    """Limit/offset pagination with an opt-in keyset mode.
+
+    Clients switch to keyset mode by sending the 'cursor' parameter, empty
+    for the first page. Each page is then fetched by filtering on the values
+    the previous page ended with, using the view's ordering plus the primary
+    key as tie breaker, so there is no COUNT(*) and no OFFSET scan and pages
+    stay stable while rows are being inserted.
+
+    A row whose ordering values change between pages would be skipped or
+    repeated, so cursors only follow the fields listed in the view's
+    'cursor_ordering_fields', which must be non-nullable and never
+    updated, and orderings by any other field are rejected. Views whose
+    default ordering can't be followed set a 'cursor_ordering' used by
+    keyset pages when the client doesn't choose one.
+    """
+
+    cursor_query_param= "cursor"
+    cursor_ordering_fields= ("created",)
+    invalid_cursor_message= "Invalid cursor."
+
+    def paginate_queryset(self, queryset, request, view=None):
+        """Paginate by offset unless a cursor was sent."""
+
+        self.keyset= self.cursor_query_param in request.query_params
+        if not self.keyset:
+            return super(KeysetPagination, self).paginate_queryset(queryset, request, view)
+
+        self.request= request
+        self.limit= self.get_limit(request)
+        cursor_ordering= getattr(view, "cursor_ordering", None)
+        if cursor_ordering and api_settings.ORDERING_PARAM not in request.query_params:
+            queryset= queryset.order_by(*cursor_ordering)
+        self.ordering= self.get_ordering(queryset, view)
+        position, reverse= self.decode_cursor(request)
+
+        ordering= [self.invert(field) for field in self.ordering] if reverse else self.ordering
+        if position is not None:
+            try:
+                queryset= queryset.filter(self.get_position_filter(ordering, position))
+            except (TypeError, ValueError, ValidationError):
+                raise NotFound(self.invalid_cursor_message)
+
+        rows= list(queryset.order_by(*ordering)[:self.limit + 1])
+        has_more= len(rows) > self.limit
+        rows= rows[:self.limit]
+        if reverse:
+            rows.reverse()
+
+        self.has_next= has_more if not reverse else True
+        self.has_previous= has_more if reverse else position is not None
+        self.first= self.get_position(rows[0]) if rows else None
+        self.last= self.get_position(rows[-1]) if rows else None
+        return rows
+
+    def get_paginated_response(self, data):
+        """Leave the count out of keyset pages."""
+
+        if not self.keyset:
+            return super(KeysetPagination, self).get_paginated_response(data)
+        return Response({
+            "next": self.get_next_link(),
+            "previous": self.get_previous_link(),
+            "results": data
+        })
+
+    def get_next_link(self):
+        """Return the link to the next page, or None on the last one."""
+
+        if not self.keyset:
+            return super(KeysetPagination, self).get_next_link()
+        if not self.has_next or self.last is None:
+            return None
+        return self.get_cursor_link(self.last, reverse=False)
+
+    def get_previous_link(self):
+        """Return the link to the previous page, or None on the first one."""
+
+        if not self.keyset:
+            return super(KeysetPagination, self).get_previous_link()
+        if not self.has_previous or self.first is None:
+            return None
+        return self.get_cursor_link(self.first, reverse=True)
+
+    def get_ordering(self, queryset, view=None):
+        """Return the queryset ordering with the primary key appended."""
+
+        keys= {"pk", queryset.model._meta.pk.name}
+        allowed= keys | set(getattr(view, "cursor_ordering_fields", self.cursor_ordering_fields))
+        ordering, direction= [], ""
+        for field in (queryset.query.order_by or queryset.model._meta.ordering):
+            if not isinstance(field, str):
+                continue
+            direction= "-" if field.startswith("-") else ""
+            if field.lstrip("-") not in allowed:
+                raise serializers.ValidationError({
+                    api_settings.ORDERING_PARAM: [f"Cursor pages can't be ordered by '{field.lstrip('-')}'."]
+                })
+            ordering.append(field)
+            if field.lstrip("-") in keys:
+                return ordering
+        ordering.append(f"{direction}pk")
+        return ordering
+
+    def get_position(self, instance):
+        """Return the ordering values of an instance."""
+
+        values= []
+        for field in self.ordering:
+            value= instance
+            for attr in field.lstrip("-").split("__"):
+                value= getattr(value, attr)
+            values.append(value)
+        return values
+
+    def get_position_filter(self, ordering, position):
+        """Return a filter for the rows that come after a position."""
+
+        condition= Q()
+        for i, field in enumerate(ordering):
+            name= field.lstrip("-")
+            lookup= "lt" if field.startswith("-") else "gt"
+            step= Q(**{f"{name}__{lookup}": position[i]})
+            for previous, value in zip(ordering[:i], position[:i]):
+                step &= Q(**{previous.lstrip("-"): value})
+            condition |= step
+        return condition
+
+    def get_cursor_link(self, position, reverse):
+        """Return the URL of the page starting at the given position."""
+
+        url= self.request.build_absolute_uri()
+        url= remove_query_param(url, self.offset_query_param)
+        return replace_query_param(url, self.cursor_query_param, self.encode_cursor(position, reverse))
+
+    def encode_cursor(self, position, reverse):
+        """Return an opaque cursor for a position."""
+
+        values= [
+            value.isoformat() if isinstance(value, (date, datetime)) else value
+            for value in position
+        ]
+        payload= json.dumps({"p": values, "r": reverse}, separators=(",", ":"))
+        return urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+    def decode_cursor(self, request):
+        """Return the position and direction of the requested cursor."""
+
+        cursor= request.query_params[self.cursor_query_param]
+        if not cursor:
+            return None, False
+        try:
+            payload= json.loads(urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+            position, reverse= payload["p"], bool(payload["r"])
+        except (TypeError, ValueError, KeyError):
+            raise NotFound(self.invalid_cursor_message)
+        if not isinstance(position, list) or len(position) != len(self.ordering):
+            raise NotFound(self.invalid_cursor_message)
+        return position, reverse
+
+    def invert(self, field):
+        """Flip the direction of an ordering field."""
+        return field[1:] if field.startswith("-") else f"-{field}"
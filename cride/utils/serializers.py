@@ -0,0 +1,76 @@
+"""Django REST Framework serializer utilities."""
+
+# Django REST Framework
+from django.core.exceptions import ObjectDoesNotExist
+from django.db.models import Manager
+from rest_framework.fields import SkipField
+from rest_framework.serializers import BaseSerializer, ListSerializer
+
+# Local modules
+from cride.utils import counters
+
+
+def collect_counter_keys(serializer, instance, keys):
+    """Add the buffer keys of the counters a serializer will show for instance.
+
+    Walks the nested serializers the same way their fields will be read,
+    so only already loaded or prefetched rows are visited.
+    """
+
+    if instance is None:
+        return
+    if isinstance(serializer, ListSerializer):
+        for item in instance.all() if isinstance(instance, Manager) else instance:
+            collect_counter_keys(serializer.child, item, keys)
+        return
+
+    if isinstance(serializer, PendingCountersMixin):
+        model= type(instance)
+        keys.update(counters.make_key(model, instance.pk, field) for field in serializer.counter_fields)
+    for field in serializer.fields.values():
+        if isinstance(field, BaseSerializer) and not field.write_only:
+            try:
+                collect_counter_keys(field, field.get_attribute(instance), keys)
+            except (SkipField, AttributeError, KeyError, ObjectDoesNotExist):
+                continue
+
+
+class PendingCountersMixin:
+    """Serialize stats counters including their buffered increments.
+
+    Serializers using it list the counter fields in 'counter_fields'.
+    The increments of every instance the root serializer shows, like a
+    page of rides with the profiles nested in them, are fetched from the
+    buffer at once when the first of them is serialized. Views caching
+    the stored values set 'pending_counters' to False in the context and
+    add the increments when serving them.
+    """
+
+    counter_fields= ()
+
+    def get_pending_counters(self, instance):
+        """Return the buffered increments of an instance's counters."""
+
+        if counters.get_buffer() is None or not self.context.get("pending_counters", True):
+            return {}
+        root= self.root
+        if getattr(root, "_pending_counters", None) is None:
+            keys= set()
+            collect_counter_keys(root, root.instance, keys)
+            root._pending_counters= (keys, counters.get_pending(keys))
+
+        keys, values= root._pending_counters
+        model= type(instance)
+        fields= {counters.make_key(model, instance.pk, field): field for field in self.counter_fields}
+        if not keys.issuperset(fields):
+            return counters.pending(instance, self.counter_fields)
+        return {field: values[key] for key, field in fields.items() if key in values}
+
+    def to_representation(self, instance):
+        """Add the increments that haven't been flushed yet."""
+
+        data= super().to_representation(instance)
+        for field, amount in self.get_pending_counters(instance).items():
+            if field in data:
+                data[field] += amount
+        return data
@@ -0,0 +1,129 @@
+"""Django REST Framework view utilities."""
+
+# Django
+from django.core.handlers.asgi import ASGIRequest
+from django.db.models import Count, Max
+from django.http import StreamingHttpResponse
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
+
+# Utilities
+import hashlib
+from asgiref.sync import sync_to_async
+
+
+class NotModified(Exception):
+    """Raised to short-circuit a request whose client copy is current."""
+
+    def __init__(self, response):
+        self.response= response
+
+
+class ConditionalGetMixin:
+    """Answer list and retrieve requests with 304 Not Modified.
+
+    Before the view runs, the validators of the requested data are
+    computed with cheap lookups, like the latest 'modified' date and row
+    count of the queryset, and compared with the client's If-None-Match
+    and If-Modified-Since headers, so current copies are confirmed
+    without fetching or serializing anything. Other responses get the
+    ETag and Last-Modified headers.
+
+    The 'modified' dates of related rows nested in the response are
+    listed in 'validator_fields'. Stats counters and rating averages
+    are covered by them too, since every update writing them also sets
+    the row's 'modified' date; counter increments still in the buffer
+    aren't part of the validators.
+    """
+
+    conditional_actions= ("list", "retrieve")
+    validator_fields= ("modified",)
+
+    def get_validation_queryset(self):
+        """Return the queryset whose rows make up the response."""
+
+        queryset= self.get_queryset()
+        if self.action == "list":
+            return self.filter_queryset(queryset)
+        lookup_url_kwarg= self.lookup_url_kwarg or self.lookup_field
+        return queryset.filter(**{self.lookup_field: self.kwargs[lookup_url_kwarg]})
+
+    def get_validators(self):
+        """Return the values the ETag is built from and the last modification date."""
+
+        stats= self.get_validation_queryset().order_by().aggregate(
+            count=Count("pk"),
+            **{f"modified_{i}": Max(field) for i, field in enumerate(self.validator_fields)}
+        )
+        dates= [stats[f"modified_{i}"] for i in range(len(self.validator_fields))]
+        return [stats["count"], *dates], max((date for date in dates if date), default=None)
+
+    def make_etag(self, request, parts):
+        """Return the ETag of the request's representation."""
+
+        parts= [request.get_full_path(), request.META.get("HTTP_ACCEPT", ""), *parts]
+        return quote_etag(hashlib.md5("|".join(str(part) for part in parts).encode()).hexdigest())
+
+    def initial(self, request, *args, **kwargs):
+        """Stop the request when the client's copy is current."""
+
+        super(ConditionalGetMixin, self).initial(request, *args, **kwargs)
+        self.etag, self.last_modified= None, None
+        if request.method not in ("GET", "HEAD") or self.action not in self.conditional_actions:
+            return
+
+        parts, self.last_modified= self.get_validators()
+        self.etag= self.make_etag(request, parts)
+        response= get_conditional_response(
+            request,
+            etag=self.etag,
+            last_modified=int(self.last_modified.timestamp()) if self.last_modified else None
+        )
+        if response is not None:
+            raise NotModified(response)
+
+    def handle_exception(self, exc):
+        """Return the Not Modified response as is."""
+
+        if isinstance(exc, NotModified):
+            return exc.response
+        return super(ConditionalGetMixin, self).handle_exception(exc)
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        """Add the validators to successful and Not Modified responses."""
+
+        response= super(ConditionalGetMixin, self).finalize_response(request, response, *args, **kwargs)
+        if getattr(self, "etag", None) and response.status_code in (200, 304):
+            response["ETag"]= self.etag
+            if self.last_modified:
+                response["Last-Modified"]= http_date(self.last_modified.timestamp())
+        return response
+
+
+async def iterate_in_thread(iterator):
+    """Yield the items of a sync iterator, producing each of them in the request thread."""
+
+    iterator= iter(iterator)
+    done= object()
+    try:
+        while True:
+            item= await sync_to_async(next, thread_sensitive=True)(iterator, done)
+            if item is done:
+                return
+            yield item
+    finally:
+        if hasattr(iterator, "close"):
+            await sync_to_async(iterator.close, thread_sensitive=True)()
+
+
+def stream(request, iterator, content_type):
+    """Return a response streaming the items of a sync iterator.
+
+    ASGI servers consume sync iterators whole before sending anything,
+    so under them the items are produced one by one from an async
+    iterator instead.
+    """
+
+    if isinstance(getattr(request, "_request", request), ASGIRequest):
+        iterator= iterate_in_thread(iterator)
+    return StreamingHttpResponse(iterator, content_type=content_type)